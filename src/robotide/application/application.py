@@ -19,6 +19,8 @@ from contextlib import contextmanager
 from robotide.application.updatenotifier import UpdateNotifierController, UpdateDialog
 
 from robotide.namespace import Namespace
+from robotide.spec.specstore import LibrarySpecStore
+from robotide.spec.importpool import LibraryImportPool
 from robotide.controller import ChiefController
 from robotide.ui import RideFrame, LoadProgressObserver
 from robotide.pluginapi import RideLogMessage
@@ -40,7 +42,8 @@ class RIDE(wx.App):
     def OnInit(self):
         self.settings = RideSettings()
         self.preferences = Preferences(self.settings)
-        self.namespace = Namespace(self.settings)
+        self.namespace = Namespace(self.settings, self._create_spec_store(),
+                                   self._create_import_pool())
         self._controller = ChiefController(self.namespace, self.settings)
         self.frame = RideFrame(self, self._controller)
         self._editor_provider = EditorProvider()
@@ -58,6 +61,16 @@ class RIDE(wx.App):
         wx.CallLater(200, ReleaseNotes(self).bring_to_front)
         return True
 
+    def _create_spec_store(self):
+        return LibrarySpecStore(self.settings.get_path('library_specs.db'))
+
+    def _create_import_pool(self):
+        workers = self.settings.get('library import workers', 4)
+        if not workers:
+            return None
+        return LibraryImportPool(workers,
+                                 self.settings.get('library import timeout', 30))
+
     def _publish_system_info(self):
         RideLogMessage(context.SYSTEM_INFO).publish()
 
@@ -29,14 +29,20 @@
 
 '''A Robot Framework listener that sends information to a socket
 
-This uses the "pickle" module of python to send objects to the
-listening server. It should probably be refactored to call an
-XMLRPC server.
+Listener events are sent to the listening server in length prefixed frames.
+Each frame contains a list of `(name, args)` tuples pickled with pickle
+protocol 2. After connecting, the listener reads one frame from the server
+telling which events the server wants and which attributes of the events
+it needs. Events are sent in batches, at least every `FLUSH_INTERVAL`
+seconds.
 '''
+from __future__ import with_statement
 
 import os
 import socket
+import struct
 import threading
+import time
 import SocketServer
 from robot.running.signalhandler import STOP_SIGNAL_MONITOR
 from robot.errors import ExecutionFailed
@@ -48,9 +54,37 @@ except ImportError:
 
 PORT = 5007
 HOST = "localhost"
+PICKLE_PROTOCOL = 2
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 0.1
+HANDSHAKE_TIMEOUT = 10
+# Sent regardless of the subscription because stopping the execution needs them.
+CONTROL_EVENTS = ('pid', 'port', 'close')
+_HEADER = struct.Struct('>I')
+
+
+def write_frame(stream, obj):
+    data = pickle.dumps(obj, PICKLE_PROTOCOL)
+    stream.write(_HEADER.pack(len(data)) + data)
+
+
+def read_frame(stream):
+    return pickle.loads(_read(stream, _read_length(stream)))
+
+
+def _read_length(stream):
+    return _HEADER.unpack(_read(stream, _HEADER.size))[0]
+
+
+def _read(stream, length):
+    data = stream.read(length)
+    if len(data) < length:
+        raise EOFError('Connection closed in the middle of a frame')
+    return data
+
 
 class SocketListener:
-    """Pass all listener events to a remote listener
+    """Pass listener events to a remote listener
 
     If called with one argument, that argument is a port
     If called with two, the first is a hostname, the second is a port
@@ -61,6 +95,7 @@ class SocketListener:
         self.port = PORT
         self.host = HOST
         self.sock = None
+        self.subscription = None
         if len(args) == 1:
             self.port = int(args[0])
         elif len(args) >= 2:
@@ -125,25 +160,97 @@ class SocketListener:
     def close(self):
         self._send_socket("close")
         if self.sock:
+            self.sender.close()
             self.filehandler.close()
             self.sock.close()
 
     def _connect(self):
-        '''Establish a connection for sending pickles'''
+        '''Establish a connection and read the subscription'''
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.connect((self.host, self.port))
-            self.filehandler = self.sock.makefile('w')
-            self.pickler = pickle.Pickler(self.filehandler)
-        except socket.error, e:
+            self.filehandler = self.sock.makefile('rwb')
+            self.subscription = self._read_subscription()
+            self.sender = FrameSender(self.filehandler)
+        except (socket.error, EOFError), e:
             print 'unable to open socket to "%s:%s" error: %s' % (self.host, self.port, str(e))
             self.sock = None
 
+    def _read_subscription(self):
+        self.sock.settimeout(HANDSHAKE_TIMEOUT)
+        try:
+            return read_frame(self.filehandler)
+        finally:
+            self.sock.settimeout(None)
+
     def _send_socket(self, name, *args):
-        if self.sock:
-            packet = (name, args)
-            self.pickler.dump(packet)
-            self.filehandler.flush()
+        if not self.sock:
+            return
+        if name in CONTROL_EVENTS:
+            self.sender.send(name, args, flush=True)
+        elif name in self.subscription:
+            self.sender.send(name, self._filter(args, self.subscription[name]))
+
+    def _filter(self, args, attributes):
+        if attributes is None:
+            return args
+        return tuple(self._filter_attributes(arg, attributes) for arg in args)
+
+    def _filter_attributes(self, arg, attributes):
+        if not isinstance(arg, dict):
+            return arg
+        return dict((key, arg[key]) for key in attributes if key in arg)
+
+
+class FrameSender(object):
+    """Sends events in batches of at most `batch_size` events.
+
+    Events are also sent when `flush_interval` seconds have passed after
+    they were queued, so that the server sees a long running keyword start
+    even though no more events are coming for a while.
+    """
+
+    def __init__(self, stream, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL):
+        self._stream = stream
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._events = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_periodically)
+        self._flusher.setDaemon(True)
+        self._flusher.start()
+
+    def send(self, name, args, flush=False):
+        with self._lock:
+            self._events.append((name, args))
+            if flush or len(self._events) >= self._batch_size:
+                self._flush()
+
+    def _flush_periodically(self):
+        while not self._closed:
+            time.sleep(self._flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._events or self._closed:
+            return
+        try:
+            write_frame(self._stream, self._events)
+            self._stream.flush()
+        except (socket.error, IOError):
+            self._closed = True
+        self._events = []
+
+    def close(self):
+        self.flush()
+        self._closed = True
+
 
 class RobotKillerServer(SocketServer.TCPServer):
     allow_reuse_address = True
@@ -0,0 +1,139 @@
+#  Copyright 2010-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+from __future__ import with_statement
+
+import threading
+import time
+
+
+class ListenerEventQueue(object):
+    """Queue between the listener server thread and the user interface.
+
+    Listener events are put to the queue in the thread reading them from
+    the socket and taken from it in batches on every timer tick of the user
+    interface. When the user interface falls behind and `max_pending`
+    events are waiting, putting more events blocks, which in turn slows
+    down the listener in the test execution. If the queue is not flushed
+    in `max_wait` seconds, for example because the test runner tab has been
+    closed, events are queued without blocking until the next flush.
+    After `release`, events are queued without blocking until the queue
+    is cleared.
+    """
+
+    def __init__(self, max_pending=10000, max_wait=5.0):
+        self._max_pending = max_pending
+        self._max_wait = max_wait
+        self._pending = []
+        self._condition = threading.Condition()
+        self._stalled = False
+        self._released = False
+
+    def put(self, event, *args):
+        with self._condition:
+            if len(self._pending) >= self._max_pending and \
+                    not (self._stalled or self._released):
+                start = time.time()
+                self._condition.wait(self._max_wait)
+                if time.time() - start >= self._max_wait:
+                    self._stalled = True
+            self._pending.append((event, args))
+
+    def clear(self):
+        """Discards all queued events and enables blocking again."""
+        with self._condition:
+            self._pending = []
+            self._stalled = False
+            self._released = False
+            self._condition.notifyAll()
+
+    def release(self):
+        """Stops blocking `put`, also when it is already blocked."""
+        with self._condition:
+            self._released = True
+            self._condition.notifyAll()
+
+    def flush(self):
+        """Returns all queued events as a `ListenerEventBatch`."""
+        with self._condition:
+            pending, self._pending = self._pending, []
+            self._stalled = False
+            self._condition.notifyAll()
+        batch = ListenerEventBatch()
+        for event, args in pending:
+            batch.add(event, args)
+        return batch
+
+    def __len__(self):
+        return len(self._pending)
+
+
+class ListenerEventBatch(object):
+    """Listener events received during one timer tick, aggregated.
+
+    Keyword events only change the stack of currently executing keywords,
+    so they are reduced to the number of keywords that ended from the
+    stack before this batch and the keywords still running at the end of
+    it. `test_statuses` contains only the latest status of each test. All
+    other events are kept in `events` in the order they were received.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.keywords_ended = 0
+        self.keywords_started = []
+        self.passed = 0
+        self.failed = 0
+        self.count = 0
+        self._statuses = {}
+        self._tests = []
+
+    def add(self, event, args):
+        self.count += 1
+        if event == 'start_keyword':
+            self.keywords_started.append(args[0])
+        elif event == 'end_keyword':
+            if self.keywords_started:
+                self.keywords_started.pop()
+            else:
+                self.keywords_ended += 1
+        else:
+            self.events.append((event, args))
+            if event == 'start_test':
+                self._set_status(args[1]['longname'], 'RUNNING')
+            if event == 'end_test':
+                self._end_test(args[1]['longname'], args[1]['status'])
+
+    def _end_test(self, longname, status):
+        if status == 'PASS':
+            self.passed += 1
+        else:
+            self.failed += 1
+        self._set_status(longname, status)
+
+    def _set_status(self, longname, status):
+        if longname not in self._statuses:
+            self._tests.append(longname)
+        self._statuses[longname] = status
+
+    @property
+    def test_statuses(self):
+        """List of `(longname, status)` tuples in the order tests started.
+
+        Status is either ``RUNNING``, ``PASS`` or ``FAIL``.
+        """
+        return [(longname, self._statuses[longname])
+                for longname in self._tests]
+
+    def __nonzero__(self):
+        return self.count > 0
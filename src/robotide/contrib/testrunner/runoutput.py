@@ -0,0 +1,68 @@
+#  Copyright 2010-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import codecs
+import os
+import re
+import tempfile
+
+
+class RunOutput(object):
+    """Console output of one test run.
+
+    The output control shows only the latest lines of the output, so the
+    whole output is written to `path`. Paths to the report and log files
+    printed by Robot Framework are looked for one line at a time as the
+    output arrives, so the output never needs to be searched as a whole.
+    """
+    report_regex = re.compile('^Report: {2}(.*\.html)$')
+    log_regex = re.compile('^Log: {5}(.*\.html)$')
+    # Report and log lines are short, the rest of longer lines is not needed.
+    _max_line_start = 4096
+
+    def __init__(self, directory=None):
+        fd, self.path = tempfile.mkstemp('.txt', 'output', directory)
+        os.close(fd)
+        self._file = codecs.open(self.path, 'w', 'UTF-8')
+        self._line = ''
+        self.report_file = None
+        self.log_file = None
+        self.last_char = ''
+        self.line_count = 0
+
+    def write(self, text):
+        if not text or self._file.closed:
+            return
+        if isinstance(text, str):
+            text = text.decode('UTF-8', 'replace')
+        self._file.write(text)
+        self.last_char = text[-1]
+        self.line_count += text.count('\n')
+        lines = text.split('\n')
+        lines[0] = self._line + lines[0]
+        for line in lines[:-1]:
+            self._find_report_and_log(line.rstrip('\r'))
+        self._line = lines[-1][:self._max_line_start]
+
+    def _find_report_and_log(self, line):
+        for regex, attr in [(self.report_regex, 'report_file'),
+                            (self.log_regex, 'log_file')]:
+            match = regex.match(line)
+            if match:
+                setattr(self, attr, match.group(1))
+
+    def close(self):
+        if self._line:
+            self._find_report_and_log(self._line)
+            self._line = ''
+        self._file.close()
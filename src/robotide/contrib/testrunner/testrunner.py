@@ -26,17 +26,19 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+from __future__ import with_statement
+
 from Queue import Empty, Queue
 import SocketServer
 import atexit
 import codecs
 import os
-import pickle
 import shutil
 import socket
 import subprocess
 import tempfile
 import threading
+import time
 import signal
 import sys
 from robot.output.loggerhelper import LEVELS
@@ -44,7 +46,18 @@ from robot.utils.encoding import SYSTEM_ENCODING
 from robot.utils.encodingsniffer import DEFAULT_OUTPUT_ENCODING
 from robotide.context.platform import IS_WINDOWS
 from robotide.contrib.testrunner import SocketListener
+from robotide.contrib.testrunner.SocketListener import read_frame, write_frame
+from robotide.contrib.testrunner.listenerevents import ListenerEventQueue
 from robotide.controller.testexecutionresults import TestExecutionResults
+from robotide.publish import PUBLISHER
+
+# Listener events used by RIDE and the attributes needed from them.
+_TEST_EVENTS = {'start_test': ['longname'],
+                'end_test': ['longname', 'status'],
+                'report_file': None,
+                'log_file': None}
+_KEYWORD_EVENTS = {'start_keyword': [], 'end_keyword': []}
+_LOG_MESSAGE_EVENTS = {'log_message': ['timestamp', 'level', 'message']}
 
 
 class TestRunner(object):
@@ -55,12 +68,15 @@ class TestRunner(object):
         self._server = None
         self._server_thread = None
         self._results = TestExecutionResults()
+        self._listener_events = ListenerEventQueue()
+        self._listener_subscription = None
+        self.set_listener_subscription()
         self.port = None
         self._chief = chief
         self.profiles = {}
 
-    def enable(self, result_handler):
-        self._start_listener_server(result_handler)
+    def enable(self):
+        self._start_listener_server()
         self._create_temporary_directory()
 
     def _create_temporary_directory(self):
@@ -77,6 +93,10 @@ class TestRunner(object):
         if os.path.exists(self._output_dir):
             shutil.rmtree(self._output_dir)
 
+    @property
+    def output_dir(self):
+        return self._output_dir
+
     def add_profile(self, name, item):
         self.profiles[name] = item
 
@@ -86,34 +106,74 @@ class TestRunner(object):
     def get_profile_names(self):
         return sorted(self.profiles.keys())
 
-    def _start_listener_server(self, result_handler):
+    def _start_listener_server(self):
         def handle(*args):
             self._result_handler(*args)
-            result_handler(*args)
-        self._server = RideListenerServer(RideListenerHandler, handle)
+            self._listener_events.put(*args)
+        self._server = RideListenerServer(RideListenerHandler, handle,
+                                          self._listener_subscription)
         self._server_thread = threading.Thread(target=self._server.serve_forever)
         self._server_thread.setDaemon(True)
         self._server_thread.start()
         self.port = self._server.server_address[1]
 
     def _result_handler(self, event, *args):
+        # Needed for stopping the execution, so handled immediately.
         if event == 'pid':
             self._pid_to_kill = int(args[0])
         if event == 'port':
             self._killer_port = args[0]
-        if event == 'start_test':
-            longname = args[1]['longname']
-            self._results.set_running(self._get_test_controller(longname))
-        if event == 'end_test':
-            longname = args[1]['longname']
-            if args[1]['status'] == 'PASS':
-                self._results.set_passed(self._get_test_controller(longname))
-            else:
-                self._results.set_failed(self._get_test_controller(longname))
+
+    def set_listener_subscription(self, keywords=True, log_messages=True):
+        """Selects the listener events sent by subsequent test executions.
+
+        Test events are always sent. Keyword and log message events, which
+        are the vast majority of all events, can be switched off.
+        """
+        subscription = dict(_TEST_EVENTS)
+        if keywords:
+            subscription.update(_KEYWORD_EVENTS)
+        if log_messages:
+            subscription.update(_LOG_MESSAGE_EVENTS)
+        self._listener_subscription = subscription
+        if self._server:
+            self._server.subscription = subscription
+
+    def get_listener_events(self):
+        """Returns listener events received since the previous call.
+
+        Must be called in the GUI thread. Test execution results are updated
+        based on the events before they are returned as a
+        `ListenerEventBatch`.
+        """
+        batch = self._listener_events.flush()
+        with PUBLISHER.transaction():
+            for longname, status in batch.test_statuses:
+                self._set_result(self._get_test_controller(longname), status)
+        return batch
+
+    def _set_result(self, test, status):
+        if status == 'RUNNING':
+            self._results.set_running(test)
+        elif status == 'PASS':
+            self._results.set_passed(test)
+        else:
+            self._results.set_failed(test)
 
     def _get_test_controller(self, longname):
         return self._chief.find_controller_by_longname(longname)
 
+    def wait_for_listener(self, timeout=5.0):
+        """Waits until the listener of the ended execution has disconnected.
+
+        After this all events sent by the listener are in the queue returned
+        by `get_listener_events`. The queue does not block the listener
+        while waiting, because the user interface is not flushing it.
+        """
+        self._listener_events.release()
+        if self._server:
+            self._server.wait_for_connections(timeout)
+
     def clear_server(self):
         self._server = None
 
@@ -135,6 +195,7 @@ class TestRunner(object):
     def run_command(self, command, cwd):
         self._pid_to_kill = None
         self._killer_port = None
+        self._listener_events.clear()
         self._process = Process(cwd)
         self._process.run_command(command)
 
@@ -317,24 +378,52 @@ class StreamReaderThread(object):
         return result.decode(DEFAULT_OUTPUT_ENCODING)
 
 
-# The following two classes implement a small line-buffered socket
+# The following two classes implement a small frame-based socket
 # server. It is designed to run in a separate thread, read data
 # from the given port and update the UI -- hopefully all in a
 # thread-safe manner.
 class RideListenerServer(SocketServer.TCPServer):
-    """Implements a simple line-buffered socket server"""
+    """Implements a simple frame-based socket server
+
+    `subscription` is sent to connecting listeners and it maps the names
+    of the wanted events to the names of the attributes needed from them,
+    or to `None` if all attributes are needed.
+    """
     allow_reuse_address = True
-    def __init__(self, RequestHandlerClass, callback):
+    def __init__(self, RequestHandlerClass, callback, subscription=None):
         SocketServer.TCPServer.__init__(self, ("",0), RequestHandlerClass)
         self.callback = callback
+        self.subscription = subscription or {}
+        self._connections = 0
+        self._condition = threading.Condition()
+
+    def connection_opened(self):
+        with self._condition:
+            self._connections += 1
+
+    def connection_closed(self):
+        with self._condition:
+            self._connections -= 1
+            self._condition.notifyAll()
+
+    def wait_for_connections(self, timeout):
+        """Waits at most `timeout` seconds for open connections to close."""
+        end = time.time() + timeout
+        with self._condition:
+            while self._connections and time.time() < end:
+                self._condition.wait(end - time.time())
 
 class RideListenerHandler(SocketServer.StreamRequestHandler):
     def handle(self):
-        unpickler = pickle.Unpickler(self.request.makefile('r'))
-        while True:
-            try:
-                (name, args) = unpickler.load()
-                self.server.callback(name, *args)
-            except (EOFError, IOError):
-                # I should log this...
-                break
+        self.server.connection_opened()
+        try:
+            write_frame(self.wfile, self.server.subscription)
+            self.wfile.flush()
+            while True:
+                for name, args in read_frame(self.rfile):
+                    self.server.callback(name, *args)
+        except (EOFError, IOError):
+            # I should log this...
+            pass
+        finally:
+            self.server.connection_closed()
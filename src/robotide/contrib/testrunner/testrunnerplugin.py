@@ -47,10 +47,10 @@ import time
 import os
 import sys
 import posixpath
-import re
 from posixpath import curdir, sep, pardir, join
 from robot.output import LEVELS
 from robotide.action.shortcut import localize_shortcuts
+from robotide.contrib.testrunner.runoutput import RunOutput
 from robotide.contrib.testrunner.runprofiles import CustomScriptProfile
 from robotide.contrib.testrunner.testrunner import TestRunner
 from robotide.publish.messages import RideTestSelectedForRunningChanged
@@ -108,11 +108,11 @@ class TestRunnerPlugin(Plugin):
     """A plugin for running tests from within RIDE"""
     defaults = {"auto_save": False,
                 "show_message_log": True,
+                "show_current_keyword": True,
+                "max_output_lines": 10000,
                 "profile": "pybot",
                 "sash_position": 200,
                 "runprofiles": [('jybot', 'jybot' + ('.bat' if os.name == 'nt' else ''))]}
-    report_regex = re.compile("^Report: {2}(.*\.html)$", re.MULTILINE)
-    log_regex = re.compile("^Log: {5}(.*\.html)$", re.MULTILINE)
     title = "Run"
 
     def __init__(self, application=None):
@@ -124,6 +124,7 @@ class TestRunnerPlugin(Plugin):
         self._frame = application.frame
         self._report_file = None
         self._log_file = None
+        self._run_output = None
         self._controls = {}
         self._running = False
         self._currently_executing_keyword = None
@@ -160,7 +161,7 @@ class TestRunnerPlugin(Plugin):
         self._build_ui()
         self.SetProfile(self.profile)
         self._subscribe_to_events()
-        self._test_runner.enable(lambda *args: wx.CallAfter(self._post_result, *args))
+        self._test_runner.enable()
         self._set_stopped()
 
     def _register_actions(self):
@@ -246,7 +247,7 @@ class TestRunnerPlugin(Plugin):
         This sends a SIGINT to the running process, with the
         same effect as typing control-c when running from the
         command line."""
-        self._AppendText(self.out, '[ SENDING STOP SIGNAL ]\n', source='stderr')
+        self._output('[ SENDING STOP SIGNAL ]\n', source='stderr')
         self._test_runner.send_stop_signal()
 
     def OnRun(self, event):
@@ -256,6 +257,9 @@ class TestRunnerPlugin(Plugin):
         self._initialize_ui_for_running()
         command = self._create_command()
         self._output("command: %s\n" % command)
+        self._test_runner.set_listener_subscription(
+            keywords=self.show_current_keyword,
+            log_messages=self.show_message_log)
         try:
             self._test_runner.run_command(command, self._get_current_working_dir())
             self._process_timer.Start(41) # roughly 24fps
@@ -309,6 +313,13 @@ class TestRunnerPlugin(Plugin):
         self.local_toolbar.EnableTool(ID_SHOW_LOG, False)
         self._report_file = self._log_file = None
         self._messages_log_texts = []
+        self._start_run_output()
+
+    def _start_run_output(self):
+        if self._run_output:
+            self._run_output.close()
+            os.remove(self._run_output.path)
+        self._run_output = RunOutput(self._test_runner.output_dir)
 
     def _clear_output_window(self):
         self._clear_text(self.out)
@@ -335,6 +346,10 @@ class TestRunnerPlugin(Plugin):
         self.SetProfile(self.profile)
 
     def OnProcessEnded(self, evt):
+        # Events sent just before the process ended may still be unread.
+        self._test_runner.wait_for_listener()
+        self._post_results(self._test_runner.get_listener_events())
+        self._flush_message_log()
         output, errors = self._test_runner.get_output_and_errors()
         self._output(output)
         self._read_report_and_log_from_stdout_if_needed()
@@ -347,26 +362,32 @@ class TestRunnerPlugin(Plugin):
         self._progress_bar.Stop()
         now = datetime.datetime.now()
         self._output("\ntest finished %s" % now.strftime("%c"))
+        self._output_full_output_path_if_needed()
+        self._run_output.close()
         self._set_stopped()
         self._test_runner.command_ended()
 
     def _read_report_and_log_from_stdout_if_needed(self):
-        output = self.out.GetText()
         if not self._report_file:
-            self._report_file = self._get_report_or_log(output, self.report_regex)
+            self._report_file = self._get_report_or_log(self._run_output.report_file)
             if self._report_file:
                 self.local_toolbar.EnableTool(ID_SHOW_REPORT, True)
         if not self._log_file:
-            self._log_file = self._get_report_or_log(output, self.log_regex)
+            self._log_file = self._get_report_or_log(self._run_output.log_file)
             if self._log_file:
                 self.local_toolbar.EnableTool(ID_SHOW_LOG, True)
 
-    def _get_report_or_log(self, output, regex):
-        res = regex.search(output)
-        return res.group(1) if res and os.path.isfile(res.group(1)) else None
+    def _get_report_or_log(self, path):
+        return path if path and os.path.isfile(path) else None
+
+    def _output_full_output_path_if_needed(self):
+        if self._run_output.line_count > self.max_output_lines:
+            self._output("\nonly the last %d lines are shown, full output: %s"
+                         % (self.max_output_lines, self._run_output.path))
 
     def OnTimer(self, evt):
-        """Get process output"""
+        """Get listener events and process output"""
+        self._post_results(self._test_runner.get_listener_events())
         if not self._test_runner.is_running():
             self.OnProcessEnded(None)
             return
@@ -382,15 +403,16 @@ class TestRunnerPlugin(Plugin):
                 # the previous character isn't a newline.
                 self._output("\n", source="stdout")
             self._output(err_buffer, source="stderr")
+        self._flush_message_log()
+
+    def _flush_message_log(self):
         if self._messages_log_texts and self.message_log:
             self._AppendText(self.message_log, '\n'+'\n'.join(self._messages_log_texts))
             self._messages_log_texts = []
 
     def GetLastOutputChar(self):
-        '''Return the last character in the output window'''
-        pos = self.out.PositionBefore(self.out.GetLength())
-        char = self.out.GetCharAt(pos)
-        return chr(char)
+        '''Return the last character in the output'''
+        return self._run_output.last_char
 
     def _format_command(self, argv):
         '''Quote a list as if it were a command line command
@@ -423,7 +445,9 @@ class TestRunnerPlugin(Plugin):
         if not self.panel or not textctrl:
             return
         try:
-            width, _ = textctrl.GetTextExtent(string)
+            # Measuring only the longest line is enough and much faster.
+            longest = max(string.split('\n'), key=len)
+            width, _ = textctrl.GetTextExtent(longest)
             if textctrl.GetScrollWidth() < width+50:
                 textctrl.SetScrollWidth(width+50)
         except UnicodeDecodeError:
@@ -450,11 +474,22 @@ class TestRunnerPlugin(Plugin):
         if source == "stderr":
             textctrl.SetStyling(new_text_end-new_text_start, STYLE_STDERR)
 
+        self._remove_oldest_lines_if_needed(textctrl)
         textctrl.SetReadOnly(True)
         if lastVisibleLine >= linecount-4:
             linecount = textctrl.GetLineCount()
             textctrl.ScrollToLine(linecount)
 
+    def _remove_oldest_lines_if_needed(self, textctrl):
+        # Lines are removed only after a tenth more than the maximum has been
+        # added, so that text is not removed on every append.
+        max_lines = self.max_output_lines
+        excess = textctrl.GetLineCount() - max_lines
+        if excess > max_lines / 10:
+            textctrl.SetTargetStart(0)
+            textctrl.SetTargetEnd(textctrl.PositionFromLine(excess))
+            textctrl.ReplaceTarget('')
+
     def _get_monitor_width(self):
         # robot wants to know a fixed size for output, so calculate the
         # width of the window based on average width of a character. A
@@ -483,6 +518,8 @@ class TestRunnerPlugin(Plugin):
 
     def _output(self, string, source="stdout"):
         '''Put output to the text control'''
+        if self._run_output:
+            self._run_output.write(string)
         self._AppendText(self.out, string, source)
 
     def _build_local_toolbar(self):
@@ -624,17 +661,28 @@ class TestRunnerPlugin(Plugin):
             font = wx.Font(font.GetPointSize()-1, wx.FONTFAMILY_MODERN, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL)
         return font
 
-    def _post_result(self, event, *args):
+    def _post_results(self, batch):
         '''Endpoint of the listener interface
 
-        This is called via the listener interface. It has an event such as "start_suite",
-        "start_test", etc, along with metadata about the event. We use this data to update
-        the tree and statusbar.'''
+        This is called on every timer tick with the listener events received
+        since the previous tick. Events have a name such as "start_suite",
+        "start_test", etc, along with metadata about the event. We use this
+        data to update the statusbar and the message log.'''
         if not self.panel:
             # this should only happen if the notebook tab got deleted
             # out from under us. In the immortal words of Jar Jar
             # Binks, "How rude!"
             return
+        if not batch:
+            return
+        for event, args in batch.events:
+            self._post_result(event, *args)
+        self._progress_bar.update_current_keywords(batch.keywords_ended,
+                                                   batch.keywords_started)
+        self._progress_bar.Pass(batch.passed)
+        self._progress_bar.Fail(batch.failed)
+
+    def _post_result(self, event, *args):
         if event == 'start_test':
             self._handle_start_test(args)
         if event == 'end_test':
@@ -643,10 +691,6 @@ class TestRunnerPlugin(Plugin):
             self._handle_report_file(args)
         if event == 'log_file':
             self._handle_log_file(args)
-        if event == 'start_keyword':
-            self._handle_start_keyword(args)
-        if event == 'end_keyword':
-            self._handle_end_keyword()
         if event == 'log_message':
             self._handle_log_message(args)
 
@@ -661,10 +705,6 @@ class TestRunnerPlugin(Plugin):
     def _handle_end_test(self, args):
         longname = args[1]['longname']
         self._append_to_message_log('Ending test:   %s\n' % longname)
-        if args[1]['status'] == 'PASS':
-            self._progress_bar.Pass()
-        else:
-            self._progress_bar.Fail()
 
     def _handle_report_file(self, args):
         self._report_file = args[0]
@@ -674,12 +714,6 @@ class TestRunnerPlugin(Plugin):
         self._log_file = args[0]
         self.local_toolbar.EnableTool(ID_SHOW_LOG, True)
 
-    def _handle_start_keyword(self, args):
-        self._progress_bar.set_current_keyword(args[0])
-
-    def _handle_end_keyword(self):
-        self._progress_bar.empty_current_keyword()
-
     def _handle_log_message(self, args):
         a = args[0]
         if self.show_message_log and LEVELS[a['level']] >= self._min_log_level_number:
@@ -734,11 +768,11 @@ class ProgressBar(wx.Panel):
         self._fail = 0
         self._current_keywords = []
 
-    def set_current_keyword(self, name):
-        self._current_keywords.append(name)
-
-    def empty_current_keyword(self):
-        self._current_keywords.pop()
+    def update_current_keywords(self, ended, started):
+        '''Removes `ended` keywords from the stack and adds `started` to it'''
+        if ended:
+            del self._current_keywords[-ended:]
+        self._current_keywords.extend(started)
 
     def OnTimer(self, event):
         '''A handler for timer events; it updates the statusbar'''
@@ -760,13 +794,13 @@ class ProgressBar(wx.Panel):
         self._gauge.Hide()
         self._timer.Stop()
 
-    def Pass(self):
-        '''Add one to the passed count'''
-        self._pass += 1
+    def Pass(self, count=1):
+        '''Add to the passed count'''
+        self._pass += count
 
-    def Fail(self):
-        '''Add one to the failed count'''
-        self._fail += 1
+    def Fail(self, count=1):
+        '''Add to the failed count'''
+        self._fail += count
 
     def _update_message(self):
         '''Update the displayed elapsed time, passed and failed counts'''
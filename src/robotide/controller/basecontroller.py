@@ -59,6 +59,13 @@ class ControllerWithParent(_BaseController):
     def datafiles(self):
         return self._parent.datafiles
 
+    @property
+    def usage_index(self):
+        return self._parent.usage_index
+
+    def load_all_datafiles(self, load_observer=None):
+        self._parent.load_all_datafiles(load_observer)
+
     def is_modifiable(self):
         return self.datafile_controller.is_modifiable()
 
@@ -72,10 +79,16 @@ class WithNamespace(object):
     def _set_namespace(self, namespace):
         self._namespace = namespace
 
-    def update_namespace(self):
+    def update_namespace(self, datafile=None):
         if not self._namespace:
             return
-        self._namespace.update()
+        self._namespace.update(datafile)
+
+    @property
+    def namespace_generation(self):
+        if not self._namespace:
+            return None
+        return self._namespace.generation
 
     def register_for_namespace_updates(self, listener):
         if not self._namespace:
@@ -105,6 +118,9 @@ class WithNamespace(object):
     def keyword_info(self, datafile, keyword_name):
         return self._namespace.find_keyword(datafile, keyword_name)
 
+    def variable_source(self, datafile, variable_name):
+        return self._namespace.get_variable_source(datafile, variable_name)
+
     def is_library_import_ok(self, imp):
         return self._namespace.is_library_import_ok(self.datafile, imp)
 
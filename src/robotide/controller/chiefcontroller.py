@@ -25,7 +25,10 @@ from robotide.publish.messages import RideOpenResource, RideSaveAll, \
 from .basecontroller import WithNamespace, _BaseController
 from .dataloader import DataLoader
 from .filecontrollers import DataController, ResourceFileControllerFactory
-from .robotdata import NewTestCaseFile, NewTestDataDirectory
+from .importgraph import ResourceImportGraph
+from .longnameindex import LongnameIndex
+from .robotdata import NewTestCaseFile, NewTestDataDirectory, LazyTestCaseFile
+from .usageindex import UsageIndex
 
 
 class ChiefController(_BaseController, WithNamespace):
@@ -33,7 +36,12 @@ class ChiefController(_BaseController, WithNamespace):
     def __init__(self, namespace=None, settings=None):
         self._set_namespace(namespace)
         self._settings = settings
-        self._loader = DataLoader(namespace)
+        self._loader = DataLoader(namespace, settings)
+        self._loaded_lazy_datafiles = set()
+        self._usage_index = UsageIndex()
+        self._import_graph = ResourceImportGraph(lambda: self.datafiles,
+                                                 lambda: self.resources)
+        self._longname_index = LongnameIndex()
         self._controller = None
         self.name = None
         self.external_resources = []
@@ -65,6 +73,14 @@ class ChiefController(_BaseController, WithNamespace):
     def datafiles(self):
         return self._suites() + self.resources
 
+    @property
+    def usage_index(self):
+        return self._usage_index
+
+    @property
+    def import_graph(self):
+        return self._import_graph
+
     @property
     def resources(self):
         return self._resource_file_controller_factory.resources
@@ -74,7 +90,7 @@ class ChiefController(_BaseController, WithNamespace):
         return self._resource_file_controller_factory
 
     def find_controller_by_longname(self, longname):
-        return self._controller.find_controller_by_longname(longname)
+        return self._longname_index.find(self._controller, longname)
 
     def new_directory_project(self, path):
         self._new_project(NewTestDataDirectory(path))
@@ -86,6 +102,7 @@ class ChiefController(_BaseController, WithNamespace):
         self.update_default_dir(datafile.directory)
         self._controller = DataController(datafile, self)
         self._resource_file_controller_factory = ResourceFileControllerFactory(self._namespace)
+        self._import_graph.invalidate()
         RideNewProject(path=datafile.source, datafile=datafile).publish()
 
     def new_resource(self, path, parent=None):
@@ -127,6 +144,8 @@ class ChiefController(_BaseController, WithNamespace):
         return datafile
 
     def _populate_from_datafile(self, path, datafile, load_observer):
+        self._usage_index.close()
+        self._longname_index.close()
         self.__init__(self._namespace, self._settings)
         resources = self._loader.resources_for(datafile, load_observer)
         self._create_controllers(datafile, resources)
@@ -153,11 +172,30 @@ class ChiefController(_BaseController, WithNamespace):
         load_observer.finish()
         return ctrl
 
+    def load_all_datafiles(self, load_observer=None):
+        """Parses lazily loaded test case files and loads their resources.
+
+        Project wide operations need to call this before going through
+        the test data. Nothing is done if all files are already loaded.
+        """
+        datafiles = [ctrl.data for ctrl in self._suites()
+                     if isinstance(ctrl.data, LazyTestCaseFile) and
+                     ctrl.data not in self._loaded_lazy_datafiles]
+        if not datafiles:
+            return
+        load_observer = load_observer or NullObserver()
+        resources = self._loader.load_lazy_datafiles(datafiles, load_observer)
+        self._loaded_lazy_datafiles.update(datafiles)
+        for resource in sorted(resources or [], key=lambda res: res.name):
+            self._create_resource_controller(resource)
+        load_observer.finish()
+
     def _create_resource_controller(self, parsed_resource, parent=None):
         old = self._resource_file_controller_factory.find(parsed_resource)
         if old:
             return old
         controller = self._resource_file_controller_factory.create(parsed_resource, self, parent=parent)
+        self._import_graph.resource_added(controller)
         self._insert_into_suite_structure(controller)
         RideOpenResource(path=parsed_resource.source, datafile=controller).publish()
         self._load_resources_resource_imports(controller)
@@ -235,9 +273,11 @@ class ChiefController(_BaseController, WithNamespace):
             self._controller = None
         else:
             self._controller.remove_child(controller)
+        self._import_graph.invalidate()
 
     def remove_resource(self, controller):
         self._resource_file_controller_factory.remove(controller)
+        self._import_graph.invalidate()
 
     def save(self, controller):
         assert controller is not None
@@ -12,16 +12,17 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from __future__ import with_statement
+
 from itertools import chain
 import time
 import os
 
 from robotide import utils
 from robotide.namespace.embeddedargs import EmbeddedArgsHandler
+from robotide.publish import PUBLISHER
 from robotide.publish.messages import RideSelectResource, RideFileNameChanged, RideSaving, RideSaved, RideSaveAll
-from robotide.namespace.namespace import _VariableStash
 
-from .filecontrollers import ResourceFileController
 from .macrocontrollers import KeywordNameController, ForLoopStepController, TestCaseController
 from robotide.utils import overrides
 from .settingcontrollers import _SettingController, VariableController
@@ -231,6 +232,7 @@ class SetDataFile(_Command):
     def execute(self, context):
         context.mark_dirty()
         context.set_datafile(self._datafile)
+        context.resource_imports_modified()
 
 
 class _StepsChangingCommand(_ReversibleCommand):
@@ -258,7 +260,8 @@ class NonExistingStep(object):
 
 
 class NullObserver(object):
-    notify = finish = lambda x:None
+    notify = lambda self, message=None: None
+    finish = lambda x:None
 
 
 class RenameKeywordOccurrences(_ReversibleCommand):
@@ -274,12 +277,15 @@ class RenameKeywordOccurrences(_ReversibleCommand):
         return (self._original_name, self._new_name, self._observer, self._keyword_info)
 
     def _execute(self, context):
+        if self._occurrences is None:
+            context.load_all_datafiles(self._observer)
         self._observer.notify()
         self._occurrences = self._find_occurrences(context) if self._occurrences is None \
                             else self._occurrences
         self._replace_keywords_in(self._occurrences)
         context.update_namespace()
-        self._notify_values_changed(self._occurrences)
+        with PUBLISHER.transaction():
+            self._notify_values_changed(self._occurrences)
         self._observer.finish()
 
     def _find_occurrences(self, context):
@@ -536,25 +542,33 @@ class FindOccurrences(_Command):
         return self._find_occurrences_in(self._items_from(context))
 
     def _items_from(self, context):
-        for df in context.datafiles:
+        for df, locations in self._keyword_usages(context):
             self._yield_for_other_threads()
             if self._items_from_datafile_should_be_checked(df):
-                for item in self._items_from_datafile(df):
+                for item in self._items_from_datafile(df, locations):
                     yield item
 
+    def _keyword_usages(self, context):
+        return context.usage_index.keyword_usages(
+            context.datafiles, self._keyword_regexp or self._keyword_name)
+
     def _items_from_datafile_should_be_checked(self, datafile):
         if datafile.filename and \
            os.path.basename(datafile.filename) == self._keyword_source:
             return True
         return self._find_keyword_source(datafile) == self._keyword_source
 
-    def _items_from_datafile(self, df):
-        for setting in df.settings:
-            yield setting
-        for items_from_test in (self._items_from_test(test) for test in df.tests):
+    def _items_from_datafile(self, df, locations=None):
+        used = lambda ctrl: locations is None or ctrl.data in locations
+        if used(df):
+            for setting in df.settings:
+                yield setting
+        for items_from_test in (self._items_from_test(test)
+                                for test in df.tests if used(test)):
             for item in items_from_test:
                 yield item
-        for items_from_keyword in (self._items_from_keyword(kw) for kw in df.keywords):
+        for items_from_keyword in (self._items_from_keyword(kw)
+                                   for kw in df.keywords if used(kw)):
             for item in items_from_keyword:
                 yield item
 
@@ -574,7 +588,6 @@ class FindOccurrences(_Command):
             if self._contains_item(item))
 
     def _contains_item(self, item):
-        self._yield_for_other_threads()
         return item.contains_keyword(self._keyword_regexp or self._keyword_name)
 
     def _yield_for_other_threads(self):
@@ -587,7 +600,6 @@ class FindVariableOccurrences(FindOccurrences):
 
     @overrides(FindOccurrences)
     def _contains_item(self, item):
-        self._yield_for_other_threads()
         return item.contains_variable(self._keyword_name)
 
     def _items_from_datafile(self, df):
@@ -605,35 +617,31 @@ class FindVariableOccurrences(FindOccurrences):
         return chain([kw.keyword_name], kw.steps, kw.settings)
 
     def _items_from(self, context):
-        self._context = context
-        
         if self._is_local_variable(self._keyword_name, context):
             for item in self._items_from_controller(context):
                 yield item
         else:
-            for df in context.datafiles:
+            self._variable_source = context.datafile_controller.\
+                variable_source(self._keyword_name)
+            for df in self._datafiles_using_variable(context):
                 self._yield_for_other_threads()
                 if self._items_from_datafile_should_be_checked(df):
                     for item in self._items_from_datafile(df):
                         yield item
 
-    def _items_from_datafile_should_be_checked(self, datafile):
+    def _datafiles_using_variable(self, context):
+        return context.usage_index.datafiles_using_variable(
+            context.datafiles, self._keyword_name)
 
-        if self._is_file_variable(self._keyword_name, self._context):
-            return datafile in [self._context.datafile_controller] + \
-                                self._get_all_where_used(self._context)
-        elif self._is_imported_variable(self._keyword_name, self._context):
-            return datafile in [self._get_source_of_imported_var(
-                                    self._keyword_name, self._context)] + \
-                                self._get_all_where_used(
-                                    self._get_source_of_imported_var(
-                                        self._keyword_name, self._context))
-        elif self._is_builtin_variable(self._keyword_name):
-            return True
-        else:
-            # no chance to track source of variable from external files,
+    def _items_from_datafile_should_be_checked(self, datafile):
+        if self._variable_source is None:
+            # Source of unknown variables cannot be tracked,
             # so search everywhere
             return True
+        # Variables unknown in a datafile may still get their value from
+        # the suite using it, for example keywords in resource files.
+        return datafile.variable_source(self._keyword_name) in \
+                [self._variable_source, None]
 
     def _is_local_variable(self, name, context):
         if isinstance(context, VariableController):
@@ -642,36 +650,6 @@ class FindVariableOccurrences(FindOccurrences):
                 any(step.contains_variable_assignment(name)
                     for step in context.steps)
 
-    def _is_file_variable(self, name, context):
-        return context.datafile_controller.variables.contains_variable(name)
-    
-    def _is_imported_variable(self, name, context):
-        return self._get_source_of_imported_var(name, context) not in \
-                                        [None, context.datafile_controller]
-    
-    def _is_builtin_variable(self, name):
-        return name in _VariableStash.global_variables.keys()
-    
-    def _get_source_of_imported_var(self, name, context):
-        for df in self._get_all_imported(context):
-            if df.variables.contains_variable(name):
-                return df
-        return None
-
-    def _get_all_imported(self, context):
-        files = [context.datafile_controller]
-        for f in files:
-            files += [imp.get_imported_controller() 
-                        for imp in f.imports if imp.is_resource and 
-                            imp.get_imported_controller() not in files]
-        return files
-
-    def _get_all_where_used(self, context):
-        files = [context.datafile_controller]
-        for f in files:
-            if isinstance(f, ResourceFileController):
-                files += [imp.datafile_controller for imp in f.get_where_used()]
-        return files
 
 def AddKeywordFromCells(cells):
     if not cells:
@@ -883,8 +861,10 @@ class SaveFile(_Command):
     def execute(self, context):
         RideSaving(path=context.filename, datafile=context).publish()
         datafile_controller = context.datafile_controller
-        for macro_controller in chain(datafile_controller.tests, datafile_controller.keywords):
-            macro_controller.execute(Purify())
+        with PUBLISHER.transaction():
+            for macro_controller in chain(datafile_controller.tests,
+                                          datafile_controller.keywords):
+                macro_controller.execute(Purify())
         datafile_controller.save()
         datafile_controller.unmark_dirty()
         RideSaved(path=context.filename).publish()
@@ -902,12 +882,13 @@ class SaveAll(_Command):
 class Purify(_Command):
 
     def execute(self, context):
-        for step in context.steps:
-            step.remove_empty_columns_from_end()
-            if step.has_only_comment():
-                step.remove_empty_columns_from_beginning()
-        context.execute(DeleteRows(context.get_empty_rows()))
-        context.notify_steps_changed()
+        with PUBLISHER.transaction():
+            for step in context.steps:
+                step.remove_empty_columns_from_end()
+                if step.has_only_comment():
+                    step.remove_empty_columns_from_beginning()
+            context.execute(DeleteRows(context.get_empty_rows()))
+            context.notify_steps_changed()
 
 
 class InsertCell(_StepsChangingCommand):
@@ -12,21 +12,41 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from __future__ import with_statement
 import os
-from threading import Thread
+import sys
+import pickle
+import subprocess
+from Queue import Queue, Empty
+from threading import Thread, Lock
 
-from robot.parsing.model import TestData, TestDataDirectory
-from robot.parsing.populators import FromFilePopulator
+from robot import utils
+from robot.errors import DataError
+from robot.output import LOGGER
+from robot.parsing.model import TestData, TestDataDirectory, TestCaseFile
+from robot.parsing.populators import FromFilePopulator, FromDirectoryPopulator
+
+import parserworker
+from robotdata import LazyTestCaseFile, TestCaseFileHeader
 
 
 class DataLoader(object):
 
-    def __init__(self, namespace):
+    def __init__(self, namespace, settings=None):
         self._namespace = namespace
         self._namespace.reset_resource_and_library_cache()
+        self._workers = self._get_worker_count(settings)
+        self._lazy = settings.get('lazy data loading', False) \
+                if settings else False
+
+    def _get_worker_count(self, settings):
+        workers = settings.get('data loading workers', 4) if settings else 0
+        processors = cpu_count()
+        return min(workers, processors) if processors else workers
 
     def load_datafile(self, path, load_observer):
-        return self._load(_DataLoader(path), load_observer)
+        return self._load(_DataLoader(path, self._workers, self._lazy),
+                          load_observer)
 
     def load_initfile(self, path, load_observer):
         res = self._load(_InitFileLoader(path), load_observer)
@@ -36,6 +56,12 @@ class DataLoader(object):
         return self._load(_ResourceLoader(datafile, self._namespace.get_resources),
                           load_observer)
 
+    def load_lazy_datafiles(self, datafiles, load_observer):
+        """Parses `LazyTestCaseFile` objects and returns their resources."""
+        return self._load(_LazyDataLoader(datafiles,
+                                          self._namespace.get_resources),
+                          load_observer)
+
     def _load(self, loader, load_observer):
         self._wait_until_loaded(loader, load_observer)
         return loader.result
@@ -45,7 +71,7 @@ class DataLoader(object):
         load_observer.notify()
         while loader.isAlive():
             loader.join(0.1)
-            load_observer.notify()
+            load_observer.notify(loader.progress)
 
 
 class _DataLoaderThread(Thread):
@@ -53,6 +79,7 @@ class _DataLoaderThread(Thread):
     def __init__(self):
         Thread.__init__(self)
         self.result = None
+        self.progress = None
 
     def run(self):
         try:
@@ -60,15 +87,230 @@ class _DataLoaderThread(Thread):
         except Exception:
             pass # TODO: Log this error somehow
 
+    def _report_progress(self, parsed, total):
+        self.progress = 'Parsed %d of %d test case files' % (parsed, total)
+
 
 class _DataLoader(_DataLoaderThread):
+    """Loads a test case file or a test suite directory.
 
-    def __init__(self, path):
+    Directories are loaded so that the directory structure and init files are
+    read first and the test case files are then parsed in `workers` worker
+    processes. The resulting `TestDataDirectory` is identical to the one
+    created by `TestData`. Small directories are parsed in this process,
+    because starting workers would take longer than parsing.
+
+    If `lazy` is true, test case files are not parsed at all but created as
+    `LazyTestCaseFile` objects, which parse themselves when needed.
+    """
+    files_per_worker = 10
+
+    def __init__(self, path, workers=0, lazy=False):
         _DataLoaderThread.__init__(self)
         self._path = path
+        self._workers = workers
+        self._lazy = lazy
 
     def _run(self):
-        return TestData(source=self._path)
+        if not os.path.isdir(self._path):
+            return TestData(source=self._path)
+        directories = _DirectoryDiscoverer().discover(self._path)
+        files = [path for _, children in directories for path in children
+                 if not os.path.isdir(path)]
+        parsed = self._parse(files)
+        return self._build_tree(directories, parsed)
+
+    def _parse(self, files):
+        if self._lazy:
+            return dict((path, self._lazy_test_case_file(path))
+                        for path in files)
+        workers = min(self._workers, len(files) // self.files_per_worker)
+        if workers > 1:
+            return _ParserPool(workers).parse(files, self._report_progress)
+        parsed = {}
+        for index, path in enumerate(files):
+            parsed[path] = _parse_test_case_file(path)
+            self._report_progress(index + 1, len(files))
+        return parsed
+
+    def _lazy_test_case_file(self, path):
+        header = TestCaseFileHeader(path)
+        if header.has_test_case_table:
+            return LazyTestCaseFile(source=path,
+                                    resource_imports=header.resource_imports)
+        return 'File has no test case table.'
+
+    def _build_tree(self, directories, parsed):
+        datadirs = dict((datadir.source, datadir) for datadir, _ in directories)
+        # Parents are discovered before their children, so building from the
+        # end has child directories ready when their parent is built.
+        for datadir, children in reversed(directories):
+            for path in children:
+                child = self._get_child(path, datadirs, parsed)
+                if child is not None:
+                    child.parent = datadir
+                    datadir.children.append(child)
+            datadir.children = [ch for ch in datadir.children
+                                if ch.has_tests()]
+        return directories[0][0]
+
+    def _get_child(self, path, datadirs, parsed):
+        if os.path.isdir(path):
+            return datadirs[utils.abspath(path)]
+        result = parsed[path]
+        if isinstance(result, basestring):
+            LOGGER.info("Parsing data source '%s' failed: %s" % (path, result))
+            return None
+        return result
+
+
+def _parse_test_case_file(path):
+    try:
+        return TestCaseFile(source=path).populate()
+    except DataError, err:
+        return unicode(err)
+
+
+class _DirectoryDiscoverer(FromDirectoryPopulator):
+    """Reads directory structure and init files without parsing children.
+
+    `discover` returns `(datadir, children)` pairs for the directory and all
+    its subdirectories, parents before their children.
+    """
+
+    def discover(self, path):
+        self._directories = []
+        self._discover(None, path)
+        return self._directories
+
+    def _discover(self, parent, path):
+        self.populate(path, TestDataDirectory(parent, path), [], False)
+
+    def _populate_chidren(self, datadir, children, include_suites,
+                          warn_on_skipped):
+        self._directories.append((datadir, children))
+        for path in children:
+            if os.path.isdir(path):
+                self._discover(datadir, path)
+
+
+def cpu_count():
+    """Returns the number of processors, or 0 if it cannot be determined."""
+    try:
+        # multiprocessing is available only in Python 2.6 and newer.
+        from multiprocessing import cpu_count
+        return cpu_count()
+    except (ImportError, NotImplementedError):
+        pass
+    try:
+        return int(os.sysconf('SC_NPROCESSORS_ONLN'))
+    except (AttributeError, ValueError, OSError):
+        return 0
+
+
+class _ParserPool(object):
+    """Parses test case files in `parserworker` processes.
+
+    If a worker process cannot be started or dies, the remaining files are
+    parsed in this process.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._lock = Lock()
+
+    def parse(self, files, progress_callback):
+        self._queue = Queue()
+        for path in sorted(files, key=self._file_size, reverse=True):
+            self._queue.put(path)
+        self._results = {}
+        self._total = len(files)
+        self._progress_callback = progress_callback
+        threads = [Thread(target=self._serve) for _ in range(self._size)]
+        for thread in threads:
+            thread.setDaemon(True)
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self._results
+
+    def _file_size(self, path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _serve(self):
+        worker = _ParserWorker()
+        try:
+            while True:
+                try:
+                    path = self._queue.get_nowait()
+                except Empty:
+                    return
+                self._add_result(path, worker.parse(path))
+        finally:
+            worker.close()
+
+    def _add_result(self, path, result):
+        with self._lock:
+            self._results[path] = result
+            self._progress_callback(len(self._results), self._total)
+
+
+class _ParserWorker(object):
+
+    def __init__(self):
+        try:
+            self._process = subprocess.Popen(
+                [sys.executable, self._worker_script()], stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE, env=self._environment(),
+                cwd=os.getcwd())
+        except OSError:
+            self._process = None
+
+    def _worker_script(self):
+        return os.path.splitext(parserworker.__file__)[0] + '.py'
+
+    def _environment(self):
+        env = os.environ.copy()
+        env['PYTHONPATH'] = os.pathsep.join(p for p in sys.path if p)
+        return env
+
+    def parse(self, path):
+        if self._process:
+            try:
+                return self._parse_in_worker(path)
+            except Exception:
+                self._kill()
+        return _parse_test_case_file(path)
+
+    def _parse_in_worker(self, path):
+        pickle.dump(path, self._process.stdin, pickle.HIGHEST_PROTOCOL)
+        self._process.stdin.flush()
+        status, result, messages = pickle.load(self._process.stdout)
+        for message, level in messages:
+            LOGGER.write(message, level)
+        if status != 'ok':
+            return result
+        return parserworker.restore(result, None)
+
+    def _kill(self):
+        try:
+            self._process.kill()
+        except OSError:
+            pass
+        self.close()
+
+    def close(self):
+        if not self._process:
+            return
+        try:
+            self._process.stdin.close()
+        except IOError:
+            pass
+        self._process.wait()
+        self._process = None
 
 
 class _InitFileLoader(_DataLoaderThread):
@@ -84,6 +326,22 @@ class _InitFileLoader(_DataLoaderThread):
         return result
 
 
+class _LazyDataLoader(_DataLoaderThread):
+
+    def __init__(self, datafiles, resource_loader):
+        _DataLoaderThread.__init__(self)
+        self._datafiles = datafiles
+        self._loader = resource_loader
+
+    def _run(self):
+        resources = set()
+        for index, datafile in enumerate(self._datafiles):
+            datafile.load()
+            resources.update(self._loader(datafile))
+            self._report_progress(index + 1, len(self._datafiles))
+        return resources
+
+
 class _ResourceLoader(_DataLoaderThread):
 
     def __init__(self, datafile, resource_loader):
@@ -94,16 +94,21 @@ class _DataController(_BaseController, WithUndoRedoStacks, WithNamespace):
         else:
             self._resource_file_controller_factory = None
         self.parent = parent
-        self.set_datafile(data)
+        self._set_datafile(data)
         self.dirty = False
         self.children = self._children(data)
 
     def set_datafile(self, datafile):
+        self._set_datafile(datafile, update_namespace=True)
+
+    def _set_datafile(self, datafile, update_namespace=False):
         self.data = datafile
         self._variables_table_controller = None
         self._testcase_table_controller = None
         self._keywords_table_controller = None
         self._imports = None
+        if update_namespace:
+            self.update_namespace()
         RideDataFileSet(item=self).publish()
 
     def _children(self, data):
@@ -157,10 +162,25 @@ class _DataController(_BaseController, WithUndoRedoStacks, WithNamespace):
         return chain([self], (df for df in self._chief_controller.datafiles
                               if df != self))
 
+    @property
+    def usage_index(self):
+        return self._chief_controller.usage_index
+
+    @property
+    def import_graph(self):
+        return self._chief_controller.import_graph
+
+    def resource_imports_modified(self):
+        if self._chief_controller:
+            self.import_graph.invalidate(self)
+
     @property
     def datafile_controller(self):
         return self
 
+    def load_all_datafiles(self, load_observer=None):
+        self._chief_controller.load_all_datafiles(load_observer)
+
     @property
     def keywords(self):
         if self._keywords_table_controller is None:
@@ -179,6 +199,9 @@ class _DataController(_BaseController, WithUndoRedoStacks, WithNamespace):
     def metadata(self):
         return MetadataListController(self, self.data.setting_table)
 
+    def update_namespace(self):
+        WithNamespace.update_namespace(self, self.data)
+
     def is_user_keyword(self, value):
         return WithNamespace.is_user_keyword(self, self.datafile, value)
 
@@ -188,6 +211,9 @@ class _DataController(_BaseController, WithUndoRedoStacks, WithNamespace):
     def keyword_info(self, keyword_name):
         return WithNamespace.keyword_info(self, self.data, keyword_name)
 
+    def variable_source(self, variable_name):
+        return WithNamespace.variable_source(self, self.data, variable_name)
+
     def mark_dirty(self):
         if not self.dirty:
             self.dirty = True
@@ -352,6 +378,9 @@ class DirectoryController(_FileSystemElement, _BaseController):
     def keyword_info(self, name):
         return None
 
+    def variable_source(self, name):
+        return None
+
     def insert_to_test_data_directory(self, res):
         res_dir = os.path.dirname(res.filename)
         if res_dir in self._dir_controllers:
@@ -508,6 +537,8 @@ class TestDataDirectoryController(_DataController, DirectoryController):
     def reload(self):
         self.__init__(TestDataDirectory(source=self.directory).populate(),
                       self._chief_controller)
+        self.update_namespace()
+        self.resource_imports_modified()
 
     def remove(self):
         path = self.filename
@@ -553,17 +584,11 @@ class TestDataDirectoryController(_DataController, DirectoryController):
         for imp in self._get_recursive_imports():
             yield imp
 
-    def _all_imports(self):
-        for df in self.datafiles:
-            for imp in df.imports:
-                yield imp
-
     def _get_recursive_imports(self):
-        all_imports = self._all_imports()
         ctrls = self._find_controllers_recursively(self)
         for res in self._find_resources_recursively(self):
-            for imp in all_imports:
-                if imp.get_imported_controller() == res and imp.parent.parent not in ctrls:
+            for imp in self.import_graph.imports_to(res):
+                if imp.parent.parent not in ctrls:
                     yield res, imp
 
     def _find_resources_recursively(self, controller):
@@ -645,6 +670,8 @@ class TestCaseFileController(_FileSystemElement, _DataController):
     def reload(self):
         self.__init__(TestCaseFile(source=self.filename).populate(),
                       self._chief_controller)
+        self.update_namespace()
+        self.resource_imports_modified()
 
     def get_template(self):
         return self.data.setting_table.test_template
@@ -739,6 +766,7 @@ class ResourceFileController(_FileSystemElement, _DataController):
         for resource_import in self.get_where_used():
             notification(resource_import)
         self._namespace.resource_filename_changed(old, self.filename)
+        self.import_graph.invalidate()
 
     def _settings(self):
         return [DocumentationController(self, self.data.setting_table.doc)]
@@ -752,23 +780,18 @@ class ResourceFileController(_FileSystemElement, _DataController):
     def reload(self):
         self.__init__(ResourceFile(source=self.filename).populate(),
                       self._chief_controller)
+        self.update_namespace()
+        self.resource_imports_modified()
 
     def remove(self):
         self._chief_controller.remove_resource(self)
         RideDataFileRemoved(path=self.filename, datafile=self).publish()
 
     def is_used(self):
-        return bool(list(self.get_where_used()))
+        return self.import_graph.is_imported(self)
 
     def get_where_used(self):
-        for imp in self._all_imports():
-            if imp.get_imported_controller() is self:
-                yield imp
-
-    def _all_imports(self):
-        for df in self.datafiles:
-            for imp in df.imports:
-                yield imp
+        return iter(self.import_graph.imports_to(self))
 
     def remove_child(self, controller):
         pass
@@ -0,0 +1,170 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import os
+from itertools import count
+
+from .robotdata import LazyTestCaseFile
+
+
+class ResourceImportGraph(object):
+    """Reverse graph from resource file controllers to their imports.
+
+    Resource imports of all `datafiles` are resolved when the graph is first
+    needed and after the whole graph has been invalidated. After that only
+    datafiles invalidated one by one are resolved again, and finding imports
+    to a resource is a lookup from the reverse graph. Controllers invalidate
+    the graph directly instead of through messages, because listeners
+    colouring unused resources must see the updated graph regardless of
+    the order in which message listeners are called.
+
+    Lazily loaded test case files are not parsed for the graph. Until
+    something else has loaded them, their resource imports read without
+    parsing are matched against the paths of `resources`. That is enough
+    for `is_imported`, but `imports_to` loads such files importing the
+    resource, because import controllers exist only for parsed files.
+    """
+
+    def __init__(self, datafiles=None, resources=None):
+        self._datafiles = datafiles or (lambda: [])
+        self._resources = resources or (lambda: [])
+        self._imports = {}
+        self._users = {}
+        self._stubs = {}
+        self._stub_users = {}
+        self._paths = None
+        self._unresolved = set()
+        self._stale = set()
+        self._unloaded = set()
+        self._resolved = False
+        self._order = {}
+        self._counter = count()
+
+    def imports_to(self, resource):
+        """Returns resource imports resolving to `resource`."""
+        self._resolve()
+        if resource in self._stub_users:
+            for datafile in self._stub_users[resource]:
+                datafile.data.load()
+            self._resolve()
+        users = self._users.get(resource)
+        if not users:
+            return []
+        return [imp for df in sorted(users, key=self._order.get)
+                for imp in users[df]]
+
+    def is_imported(self, resource):
+        self._resolve()
+        return resource in self._users or resource in self._stub_users
+
+    def _resolve(self):
+        self._paths = None
+        if not self._resolved:
+            for datafile in self._datafiles():
+                if datafile not in self._imports:
+                    self._add(datafile)
+            self._resolved = True
+            self._stale.clear()
+        for datafile in [df for df in self._unloaded if _is_loaded(df)]:
+            self._remove(datafile)
+            self._stale.add(datafile)
+        while self._stale:
+            self._add(self._stale.pop())
+
+    def _add(self, datafile):
+        if datafile not in self._order:
+            self._order[datafile] = self._counter.next()
+        if not _is_loaded(datafile):
+            self._add_stub(datafile)
+            return
+        imports = [(imp, imp.get_imported_controller())
+                   for imp in datafile.imports if imp.is_resource]
+        self._imports[datafile] = imports
+        for imp, resource in imports:
+            if resource is None:
+                self._unresolved.add(datafile)
+            else:
+                self._users.setdefault(resource, {}).setdefault(
+                    datafile, []).append(imp)
+
+    def _add_stub(self, datafile):
+        self._unloaded.add(datafile)
+        resources = []
+        for name in datafile.data.resource_imports:
+            resource = self._find_resource(datafile.data.directory, name)
+            if resource is None:
+                self._unresolved.add(datafile)
+            else:
+                resources.append(resource)
+                self._stub_users.setdefault(resource, set()).add(datafile)
+        self._stubs[datafile] = resources
+
+    def _find_resource(self, directory, name):
+        if self._paths is None:
+            self._paths = dict((_normalize(res.filename), res)
+                               for res in self._resources() if res.filename)
+        return self._paths.get(_normalize(os.path.join(directory, name)))
+
+    def invalidate(self, datafile=None):
+        """Resolves imports of `datafile` or, by default, all datafiles again.
+
+        Invalidating all datafiles forgets also removed datafiles.
+        """
+        if datafile is None:
+            self._imports.clear()
+            self._users.clear()
+            self._stubs.clear()
+            self._stub_users.clear()
+            self._unresolved.clear()
+            self._stale.clear()
+            self._unloaded.clear()
+            self._order.clear()
+            self._resolved = False
+            return
+        self._remove(datafile)
+        if self._resolved:
+            # Keeps its position in the order of datafiles.
+            self._stale.add(datafile)
+        else:
+            self._order.pop(datafile, None)
+
+    def _remove(self, datafile):
+        for imp, resource in self._imports.pop(datafile, []):
+            users = self._users.get(resource)
+            if users and users.pop(datafile, None) is not None and not users:
+                del self._users[resource]
+        for resource in self._stubs.pop(datafile, []):
+            users = self._stub_users.get(resource)
+            if users:
+                users.discard(datafile)
+                if not users:
+                    del self._stub_users[resource]
+        self._unresolved.discard(datafile)
+        self._unloaded.discard(datafile)
+
+    def resource_added(self, resource):
+        """Resolves imports of `resource` and imports that could not be
+        resolved earlier."""
+        self.invalidate(resource)
+        for datafile in list(self._unresolved):
+            self.invalidate(datafile)
+
+
+def _normalize(path):
+    return os.path.normcase(os.path.normpath(os.path.abspath(path)))
+
+
+def _is_loaded(datafile):
+    data = datafile.data
+    return not isinstance(data, LazyTestCaseFile) or data.loaded
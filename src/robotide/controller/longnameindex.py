@@ -0,0 +1,139 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import with_statement
+
+from threading import RLock
+
+from robot.utils import normalize
+
+from robotide.publish import PUBLISHER
+from robotide.publish.messages import RideItemNameChanged, \
+    RideTestCaseAdded, RideTestCaseRemoved, RideSuiteAdded, \
+    RideDataFileRemoved, RideInitFileRemoved, RideDataFileSet, \
+    RideFileNameChanged, RideOpenSuite, RideNewProject
+
+
+class LongnameIndex(object):
+    """Index of suite and test controllers by their normalized long names.
+
+    Test runner listeners report tests by their long names, for example
+    ``Root.Sub Suite.My Test``. Suites are indexed when a name is first
+    searched and tests of a suite when a test in it is first searched.
+    The index is invalidated when messages about added, removed or renamed
+    suites and tests are published.
+
+    Lookups are made in the thread receiving the listener events, so the
+    index is guarded with a lock.
+    """
+    _test_messages = [RideItemNameChanged, RideTestCaseAdded,
+                      RideTestCaseRemoved]
+    _suite_messages = [RideSuiteAdded, RideDataFileRemoved,
+                       RideInitFileRemoved, RideDataFileSet,
+                       RideFileNameChanged, RideOpenSuite, RideNewProject]
+
+    def __init__(self):
+        self._lock = RLock()
+        self._root = None
+        self._suites = None
+        self._tests = {}
+        self._subscribed = False
+
+    def find(self, root, longname):
+        """Returns the suite or test in `root` with `longname` or `None`."""
+        with self._lock:
+            self._subscribe()
+            if root is not self._root:
+                self._clear()
+                self._root = root
+            if root is None:
+                return None
+            if self._suites is None:
+                self._suites = self._index_suites(root)
+            return self._find(normalize(longname))
+
+    def _find(self, name):
+        if name in self._suites:
+            return self._suites[name]
+        # Test names may contain dots, so try all possible suite names
+        # starting from the longest one.
+        end = len(name)
+        while True:
+            end = name.rfind('.', 0, end)
+            if end == -1:
+                return None
+            suite = self._suites.get(name[:end])
+            if suite is not None:
+                test = self._find_test(suite, name[end+1:])
+                if test is not None:
+                    return test
+
+    def _find_test(self, suite, name):
+        test = self._tests_of(suite).get(name)
+        if test is not None and normalize(test.name) != name:
+            # Renamed without a message.
+            del self._tests[suite]
+            test = self._tests_of(suite).get(name)
+        return test
+
+    def _index_suites(self, suite, prefix=''):
+        name = prefix + normalize(suite.name)
+        suites = {name: suite}
+        for child in suite.suites:
+            for child_name, child_suite in \
+                    self._index_suites(child, name + '.').items():
+                suites.setdefault(child_name, child_suite)
+        return suites
+
+    def _tests_of(self, suite):
+        if suite not in self._tests:
+            tests = {}
+            for test in getattr(suite, 'tests', ()):
+                tests.setdefault(normalize(test.name), test)
+            self._tests[suite] = tests
+        return self._tests[suite]
+
+    def _subscribe(self):
+        if self._subscribed:
+            return
+        for message in self._test_messages:
+            PUBLISHER.subscribe(self._invalidate_tests_from, message, key=self)
+        for message in self._suite_messages:
+            PUBLISHER.subscribe(self._invalidate_from, message, key=self)
+        self._subscribed = True
+
+    def _invalidate_tests_from(self, message):
+        datafile = getattr(message.item, 'datafile_controller', None)
+        with self._lock:
+            if datafile is None:
+                self._tests.clear()
+            else:
+                self._tests.pop(datafile, None)
+
+    def _invalidate_from(self, message):
+        self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._suites = None
+        self._tests.clear()
+
+    def close(self):
+        if self._subscribed:
+            PUBLISHER.unsubscribe_all(key=self)
+            self._subscribed = False
+        self.invalidate()
@@ -83,7 +83,9 @@ class _WithStepsController(ControllerWithParent, WithUndoRedoStacks):
         self._init(data)
         self._has_steps_changed = True
         self._steps_cached = None
-        self.datafile_controller.register_for_namespace_updates(self._clear_cached_steps)
+        self._steps_generation = None
+        self._cell_info_caches = {}
+        self.change_count = 0
 
     @property
     def source(self):
@@ -95,15 +97,19 @@ class _WithStepsController(ControllerWithParent, WithUndoRedoStacks):
 
     @property
     def steps(self):
-        if self._has_steps_changed:
-            self._recreate_steps()
+        # Step controllers cache information resolved from the namespace.
+        # Comparing generations makes them expire lazily, only for items
+        # accessed after the namespace has changed.
+        generation = self.datafile_controller.namespace_generation
+        if self._has_steps_changed or generation != self._steps_generation:
+            self._recreate_steps(generation)
         return self._steps_cached
 
     def set_parent(self, new_parent):
         self._clear_cached_steps()
         ControllerWithParent.set_parent(self, new_parent)
 
-    def _recreate_steps(self):
+    def _recreate_steps(self, generation):
         flattened_steps = []
         for step in self.data.steps:
             if step.is_for_loop():
@@ -113,7 +119,27 @@ class _WithStepsController(ControllerWithParent, WithUndoRedoStacks):
             else:
                 flattened_steps.append(StepController(self, step))
         self._steps_cached = flattened_steps
+        self._steps_generation = generation
         self._has_steps_changed = False
+        self._share_cell_info_caches(flattened_steps, generation)
+
+    def _share_cell_info_caches(self, steps, generation):
+        # Step controllers are recreated whenever any step changes, but cell
+        # infos of a step stay valid as long as the namespace, the content
+        # of the step and the variables assigned before it stay the same.
+        if generation is None:
+            return
+        caches = {}
+        assigned = ()
+        for step in steps:
+            raw_step = step._step
+            key = (generation, tuple(step.as_list()), assigned)
+            cached = self._cell_info_caches.get(id(raw_step))
+            if cached and cached[0] is raw_step and cached[1] == key:
+                step._cell_info_cache = cached[2]
+            caches[id(raw_step)] = (raw_step, key, step._cell_info_cache)
+            assigned += tuple(step.assignments)
+        self._cell_info_caches = caches
 
     def _clear_cached_steps(self):
         self._has_steps_changed = True
@@ -167,6 +193,12 @@ class _WithStepsController(ControllerWithParent, WithUndoRedoStacks):
             return None
         return steps[row].get_cell_info(col)
 
+    def get_cell_infos(self, row, columns):
+        steps = self.steps
+        if row < 0 or len(steps) <= row:
+            return None
+        return steps[row].get_cell_infos(columns)
+
     def get_keyword_info(self, kw_name):
         return self.datafile_controller.keyword_info(kw_name)
 
@@ -177,9 +209,12 @@ class _WithStepsController(ControllerWithParent, WithUndoRedoStacks):
         return self.datafile_controller.is_library_keyword(value)
 
     def delete(self):
-        self.datafile_controller.unregister_namespace_updates(self._clear_cached_steps)
         return self._parent.delete(self)
 
+    def mark_dirty(self):
+        self.change_count += 1
+        ControllerWithParent.mark_dirty(self)
+
     def rename(self, new_name):
         self.data.name = new_name.strip()
         self.mark_dirty()
@@ -272,6 +307,25 @@ class _WithStepsController(ControllerWithParent, WithUndoRedoStacks):
     def validate_name(self, name):
         return self._parent.validate_name(name, self)
 
+    def replace_data(self, data):
+        """Replaces name, settings and steps with those of parsed `data`.
+
+        The underlying data object is kept so that this controller, and
+        everything referring to it, stays valid.
+        """
+        renamed = self.data.name != data.name
+        for name, value in vars(data).items():
+            if name != 'parent':
+                setattr(self.data, name, value)
+        for setting in self.data.settings:
+            setting.parent = self.data
+        self._clear_cached_steps()
+        self.update_namespace()
+        if renamed:
+            self._notify(RideItemNameChanged)
+        self._notify(RideItemSettingsChanged)
+        self.notify_steps_changed()
+
     def notify_name_changed(self):
         self.update_namespace()
         self._notify(RideItemNameChanged)
@@ -0,0 +1,88 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Worker process parsing test case files for `DataLoader`.
+
+Reads pickled test case file paths from stdin and writes pickled
+`('ok', datafile, messages)` or `('error', message, messages)` responses to
+stdout, where `messages` are `(message, level)` pairs logged while parsing.
+Must not import `robotide`, because that would require wxPython in the
+worker.
+"""
+
+import os
+import sys
+import pickle
+
+from robot import utils
+from robot.errors import DataError
+from robot.output import LOGGER
+from robot.parsing.model import TestCaseFile
+
+
+class MessageCollector(object):
+
+    def __init__(self):
+        self.messages = []
+
+    def message(self, msg):
+        self.messages.append((msg.message, msg.level))
+
+
+def parse(path):
+    datafile = TestCaseFile(source=path).populate()
+    # Table lookup uses a NormalizedDict containing a lambda, which cannot
+    # be pickled. It is recreated by `restore`.
+    del datafile._tables
+    return datafile
+
+
+def restore(datafile, parent):
+    datafile._tables = utils.NormalizedDict(datafile._get_tables())
+    datafile.parent = parent
+    return datafile
+
+
+def serve(requests, responses, collector):
+    while True:
+        try:
+            path = pickle.load(requests)
+        except EOFError:
+            return
+        collector.messages = []
+        try:
+            response = ('ok', parse(path), collector.messages)
+        except DataError, err:
+            response = ('error', unicode(err), collector.messages)
+        except Exception:
+            response = ('error', utils.get_error_message(), collector.messages)
+        pickle.dump(response, responses, pickle.HIGHEST_PROTOCOL)
+        responses.flush()
+
+
+def main():
+    if sys.platform == 'win32':
+        import msvcrt
+        msvcrt.setmode(sys.stdin.fileno(), os.O_BINARY)
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    collector = MessageCollector()
+    LOGGER.disable_automatic_console_logger()
+    LOGGER.register_logger(collector)
+    serve(sys.stdin, responses, collector)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,9 +12,15 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from __future__ import with_statement
 import os
+from threading import RLock
 
+from robot import utils
+from robot.errors import DataError
+from robot.output import LOGGER
 from robot.parsing.model import TestCaseFile, TestDataDirectory
+from robot.parsing.populators import READERS
 
 
 def NewTestCaseFile(path):
@@ -34,3 +40,100 @@ def NewTestDataDirectory(path):
 def _create_missing_directories(dirname):
     if not os.path.isdir(dirname):
         os.makedirs(dirname)
+
+
+class LazyTestCaseFile(TestCaseFile):
+    """Test case file that is parsed when its content is first needed.
+
+    Only `parent`, `source`, `directory`, `children`, `name` and
+    `resource_imports`, read with `TestCaseFileHeader`, are available
+    without parsing the file. Accessing any other attribute, for example
+    the tables, parses the file first. Parsing can also be done explicitly
+    with `load`, and `loaded` tells whether the file has been parsed.
+    """
+
+    def __init__(self, parent=None, source=None, resource_imports=None):
+        self.parent = parent
+        self.source = utils.abspath(source)
+        self.directory = os.path.dirname(self.source)
+        self.children = []
+        self.resource_imports = resource_imports or []
+        self.loaded = False
+        self._loading = False
+        self._load_lock = RLock()
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        self.load()
+        return object.__getattribute__(self, name)
+
+    def load(self):
+        with self._load_lock:
+            if self.loaded or self._loading:
+                return
+            self._loading = True
+            try:
+                TestCaseFile.__init__(self, self.parent, self.source)
+                self.populate()
+            except DataError, err:
+                LOGGER.error("Parsing data source '%s' failed: %s"
+                             % (self.source, unicode(err)))
+            finally:
+                self._loading = False
+                self.loaded = True
+
+
+class TestCaseFileHeader(object):
+    """Reads what lazily loaded test case files need without parsing them.
+
+    Reading stops at the test case table header, so only the tables before
+    it, typically just the setting table, are processed.
+    `has_test_case_table` tells whether the file has a test case table and
+    `resource_imports` contains the names of imported resource files with
+    `${CURDIR}` replaced.
+    """
+    _setting_table_names = [utils.normalize(name) for name
+                            in TestCaseFile._setting_table_names]
+    _test_case_table_names = [utils.normalize(name) for name
+                              in TestCaseFile._testcase_table_names]
+
+    def __init__(self, path):
+        self.has_test_case_table = False
+        self.resource_imports = []
+        self._directory = os.path.dirname(utils.abspath(path))
+        try:
+            self._read(path)
+        except _TestCaseTableFound:
+            self.has_test_case_table = True
+        except Exception:
+            # Files that cannot be read have no tests, like in parsing.
+            pass
+
+    def _read(self, path):
+        extension = os.path.splitext(path.lower())[1][1:]
+        if extension not in READERS:
+            return
+        source = open(path, 'rb')
+        try:
+            READERS[extension]().read(source, self)
+        finally:
+            source.close()
+
+    def start_table(self, header):
+        name = utils.normalize(header[0]) if header else ''
+        if name in self._test_case_table_names:
+            raise _TestCaseTableFound()
+        return name in self._setting_table_names
+
+    def add(self, row):
+        if len(row) > 1 and row[1] and utils.normalize(row[0]) == 'resource':
+            self.resource_imports.append(
+                row[1].replace('${CURDIR}', self._directory))
+
+    def eof(self):
+        pass
+
+
+class _TestCaseTableFound(Exception):
+    pass
@@ -413,6 +413,7 @@ class VariableController(_SettingController):
         self._parent.remove_var(self)
 
     def notify_value_changed(self):
+        self.datafile_controller.update_namespace()
         RideVariableUpdated(item=self).publish()
 
     def notify_variable_added(self):
@@ -495,18 +496,25 @@ class _ImportController(_SettingController):
         self.parent.remove_import_data(self._import)
 
     def publish_added(self):
+        self._resource_imports_modified()
         RideImportSettingAdded(datafile=self.datafile_controller,
             import_controller=self, type=self.type.lower()).publish()
 
     def publish_edited(self):
+        self._resource_imports_modified()
         RideImportSettingChanged(datafile=self.datafile_controller,
             import_controller=self, type=self.type.lower()).publish()
 
     def publish_removed(self):
+        self._resource_imports_modified()
         RideImportSettingRemoved(datafile=self.datafile_controller,
                                  import_controller=self,
                                  type=self.type.lower()).publish()
 
+    def _resource_imports_modified(self):
+        if self.is_resource:
+            self.datafile_controller.resource_imports_modified()
+
 
 class ResourceImportController(_ImportController):
     is_resource = True
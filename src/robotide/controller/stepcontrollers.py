@@ -19,6 +19,7 @@ class StepController(_BaseController):
         self.parent = parent
         self._step = step
         self._cell_info_cache = {}
+        self._lookups = None
 
     @property
     def display_name(self):
@@ -36,7 +37,7 @@ class StepController(_BaseController):
     def get_keyword_info(self, kw):
         if not kw:
             return None
-        return self.parent.get_keyword_info(kw)
+        return self._lookup(('info', kw), self.parent.get_keyword_info, kw)
 
     def __eq__(self, other):
         if self is other : return True
@@ -62,6 +63,25 @@ class StepController(_BaseController):
             self._cell_info_cache[col] = self._build_cell_info(content, position)
         return self._cell_info_cache[col]
 
+    def get_cell_infos(self, columns):
+        """Returns cell infos of the first `columns` cells of this step.
+
+        Keyword infos and the local namespace needed by several cells are
+        resolved only once for the whole step.
+        """
+        self._lookups = {}
+        try:
+            return [self.get_cell_info(col) for col in range(columns)]
+        finally:
+            self._lookups = None
+
+    def _lookup(self, key, resolver, *args):
+        if self._lookups is None:
+            return resolver(*args)
+        if key not in self._lookups:
+            self._lookups[key] = resolver(*args)
+        return self._lookups[key]
+
     @property
     def assignments(self):
         return self._step.assign
@@ -124,7 +144,7 @@ class StepController(_BaseController):
         value = self.get_value(col)
         if self._is_commented(col):
             return CellContent(ContentType.COMMENTED, value)
-        if self._get_last_none_empty_col_idx() < col:
+        if self._lookup('last', self._get_last_none_empty_col_idx) < col:
             return CellContent(ContentType.EMPTY, value)
         if utils.is_variable(value):
             if self._is_unknow_variable(value, position):
@@ -139,12 +159,12 @@ class StepController(_BaseController):
     def _is_unknow_variable(self, value, position):
         if position.type == CellType.ASSIGN:
             return False
-        is_known = self._get_local_namespace().has_name(value)
-        if is_known:
+        namespace = self._lookup('namespace', self._get_local_namespace)
+        if namespace.has_name(value):
             return False
         inner_value = value[2:-1]
         modified = re.split(r'\W', inner_value, 1)[0]
-        return not self._get_local_namespace().has_name('%s{%s}' % (value[0],modified))
+        return not namespace.has_name('%s{%s}' % (value[0],modified))
 
     def _get_local_namespace(self):
         index = self.parent.index_of_step(self._step)
@@ -161,10 +181,11 @@ class StepController(_BaseController):
         return self.datafile_controller.is_modifiable()
 
     def is_user_keyword(self, value):
-        return self.parent.is_user_keyword(value)
+        return self._lookup(('user', value), self.parent.is_user_keyword, value)
 
     def is_library_keyword(self, value):
-        return self.parent.is_library_keyword(value)
+        return self._lookup(('library', value), self.parent.is_library_keyword,
+                            value)
 
     def as_list(self):
         return self._step.as_list()
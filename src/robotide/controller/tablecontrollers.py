@@ -393,6 +393,7 @@ class ImportSettingsController(_TableController, _WithListOperations):
         import_ = self._table.add_variables(path, utils.split_value(argstr), comment)
         self._parent.mark_dirty()
         self._import_controller(import_).publish_added()
+        self.notify_imports_modified()
         return self[-1]
 
     def notify_imports_modified(self):
@@ -0,0 +1,322 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import os
+from StringIO import StringIO
+
+from robot.parsing.model import ResourceFile, TestCaseFile
+from robot.parsing.populators import FromFilePopulator
+from robot.parsing.txtreader import TxtReader
+from robot.utils import normalize
+from robot.writer.datafilewriter import WritingContext
+from robot.writer.dataextractor import DataExtractor
+from robot.writer.formatters import TxtFormatter
+
+
+class FromStringIOPopulator(FromFilePopulator):
+
+    def populate(self, content):
+        TxtReader().read(content, self)
+
+
+class TxtSerializer(object):
+    """Serializes datafiles to space separated txt format.
+
+    Produces the same text as saving the datafile in txt format, but the
+    text of tables, tests and keywords that have not changed since the
+    previous call is reused instead of being formatted again.
+
+    If `item_controllers`, mapping ids of tests and keywords to their
+    controllers, is given, an item is known to be unchanged when the
+    `change_count` of its controller is unchanged and its data is not
+    even extracted.
+    """
+
+    def __init__(self, separating_spaces=4, line_separator=os.linesep):
+        self._formatter = TxtFormatter(WritingContext.txt_column_count)
+        self._separator = ' ' * separating_spaces
+        self._line_separator = line_separator
+        self._cache = {}
+
+    def serialize(self, datafile, item_controllers=None):
+        cache = {}
+        tables = [table for table in datafile if table]
+        chunks = []
+        for table in tables:
+            chunks.append(self._format_row(self._formatter.format_header(table)))
+            chunks.extend(self._format_table(table, cache,
+                                             item_controllers or {}))
+            if table is not tables[-1]:
+                chunks.append(self._format_row(
+                    self._formatter.empty_row_after(table)))
+        self._cache = cache
+        return ''.join(chunks)
+
+    def format_item(self, table_type, item):
+        """Formats a single test or keyword without its table header."""
+        table = _SingleItemTable(table_type, _ITEM_TABLE_HEADERS[table_type],
+                                 item)
+        return ''.join(self._format_row(row)
+                       for row in self._formatter.format_table(table))
+
+    def _format_table(self, table, cache, item_controllers):
+        if self._formatter._should_align_columns(table) or \
+                table.type in ['setting', 'variable']:
+            return [self._cached(table, self._content_key(table, table),
+                                 cache)]
+        items = list(table)
+        separator = self._format_row(self._formatter.empty_row_after(table))
+        chunks = []
+        for item in items:
+            item_table = _SingleItemTable(table.type, table.header, item)
+            controller = item_controllers.get(id(item))
+            if controller is not None:
+                key = (table.type, item, controller, controller.change_count)
+            else:
+                key = self._content_key(item_table, item)
+            chunks.append(self._cached(item_table, key, cache))
+            if item is not items[-1]:
+                chunks.append(separator)
+        return chunks
+
+    def _content_key(self, table, item):
+        rows = DataExtractor().rows_from_table(table)
+        return (table.type, getattr(item, 'name', None),
+                tuple(tuple(row) for row in rows))
+
+    def _cached(self, table, key, cache):
+        if key not in cache:
+            cache[key] = self._cache.get(key) or \
+                ''.join(self._format_row(row)
+                        for row in self._formatter.format_table(table))
+        return cache[key]
+
+    def _format_row(self, row):
+        return self._separator.join(row).rstrip() + self._line_separator
+
+
+_ITEM_TABLE_HEADERS = {'test case': ['Test Cases'], 'keyword': ['Keywords']}
+
+
+class _SingleItemTable(object):
+
+    def __init__(self, type, header, item):
+        self.type = type
+        self.header = header
+        self._item = item
+
+    def __iter__(self):
+        return iter([self._item])
+
+
+class TxtChanges(object):
+    """Tests and keywords changed between two versions of txt data.
+
+    `items` contains `(table_type, index, text)` tuples describing the
+    changed tests and keywords. If anything else than the content of
+    existing tests and keywords has changed, `items` is `None`.
+    """
+
+    def __init__(self, old_text, new_text):
+        old, new = _Section.split(old_text), _Section.split(new_text)
+        self.items = self._changed_items(old, new)
+        self.item_counts = self._item_counts(old)
+
+    def _item_counts(self, sections):
+        counts = {'test case': 0, 'keyword': 0}
+        for section in sections:
+            if section.is_item:
+                counts[section.table_type] += 1
+        return counts
+
+    def _changed_items(self, old, new):
+        if len(old) != len(new):
+            return None
+        changed = []
+        for old_section, new_section in zip(old, new):
+            if old_section.lines == new_section.lines:
+                continue
+            if not (old_section.is_item and new_section.is_item and
+                    old_section.key == new_section.key):
+                return None
+            changed.append(new_section.key + (new_section.text,))
+        return changed
+
+
+class _Section(object):
+    _table_types = {'setting': 'setting', 'settings': 'setting',
+                    'metadata': 'setting', 'variable': 'variable',
+                    'variables': 'variable', 'testcase': 'test case',
+                    'testcases': 'test case', 'keyword': 'keyword',
+                    'keywords': 'keyword', 'userkeyword': 'keyword',
+                    'userkeywords': 'keyword'}
+
+    def __init__(self, table_type, index=None):
+        self.table_type = table_type
+        self.index = index
+        self.lines = []
+
+    @property
+    def is_item(self):
+        return self.index is not None
+
+    @property
+    def key(self):
+        return self.table_type, self.index
+
+    @property
+    def text(self):
+        return ''.join(line + '\n' for line in self.lines)
+
+    def text_with(self, content=None):
+        """Returns the text of this section with its `content` replaced.
+
+        Empty lines separating this section from the next one are preserved.
+        """
+        if content is None:
+            return self.text
+        return content + '\n' * self._trailing_empty_lines
+
+    @property
+    def _trailing_empty_lines(self):
+        count = 0
+        for line in reversed(self.lines):
+            if line:
+                break
+            count += 1
+        return count
+
+    @classmethod
+    def split(cls, text):
+        """Splits txt data into tables and the tests and keywords in them."""
+        sections = [cls(None)]
+        items = {'test case': 0, 'keyword': 0}
+        for line in text.splitlines():
+            cells = TxtReader.split_row(line)
+            table_type = sections[-1].table_type
+            if cells[0].startswith('*'):
+                sections.append(cls(cls._table_type(cells[0])))
+            elif table_type in items and cls._starts_item(cells[0]):
+                sections.append(cls(table_type, items[table_type]))
+                items[table_type] += 1
+            sections[-1].lines.append(line.rstrip())
+        return sections
+
+    @classmethod
+    def _table_type(cls, header):
+        return cls._table_types.get(normalize(header.replace('*', '')))
+
+    @classmethod
+    def _starts_item(cls, first_cell):
+        return first_cell and not first_cell.startswith(('#', '...'))
+
+
+class TxtDataSync(object):
+    """Keeps datafiles and their txt data edited in the text editor in sync.
+
+    When only tests and keywords have been edited, only they are parsed and
+    updated. Other changes require parsing and replacing the whole datafile.
+    """
+
+    def __init__(self):
+        self._serializers = {}
+        self._parsed = None
+
+    def serialize(self, datafile_controller, separating_spaces):
+        """Serializes the datafile of `datafile_controller` to txt format.
+
+        Tests and keywords whose controllers have not changed since the
+        previous call are not formatted again.
+        """
+        items = list(getattr(datafile_controller, 'tests', [])) + \
+            list(datafile_controller.keywords)
+        return self._serializer(separating_spaces).serialize(
+            datafile_controller.data,
+            dict((id(item.data), item) for item in items))
+
+    def format_changes(self, old_text, new_text, separating_spaces):
+        """Returns `new_text` with the changed tests and keywords formatted.
+
+        Returns `None` if something else than tests and keywords has changed.
+        """
+        changes, _ = self._parse_changes(old_text, new_text)
+        if changes is None:
+            return None
+        serializer = self._serializer(separating_spaces)
+        formatted = dict(((table_type, index),
+                          serializer.format_item(table_type, item))
+                         for table_type, index, item in changes)
+        return ''.join(section.text_with(formatted.get(section.key))
+                       for section in _Section.split(new_text))
+
+    def update(self, datafile_controller, old_text, new_text):
+        """Updates changed tests and keywords of `datafile_controller`.
+
+        `old_text` must be the datafile in txt format and `new_text` its
+        edited version. Returns `False`, without changing anything, if
+        the whole datafile must be updated instead.
+        """
+        changes, item_counts = self._parse_changes(old_text, new_text)
+        if changes is None:
+            return False
+        tables = {'test case': list(getattr(datafile_controller, 'tests', [])),
+                  'keyword': list(datafile_controller.keywords)}
+        if item_counts != dict((table_type, len(items))
+                               for table_type, items in tables.items()):
+            return False
+        for table_type, index, item in changes:
+            tables[table_type][index].replace_data(item)
+        # Parsed items are now part of the model and must not be reused.
+        self._parsed = None
+        return True
+
+    def _serializer(self, separating_spaces):
+        if separating_spaces not in self._serializers:
+            self._serializers[separating_spaces] = \
+                TxtSerializer(separating_spaces)
+        return self._serializers[separating_spaces]
+
+    def _parse_changes(self, old_text, new_text):
+        # Same texts are typically first formatted and then updated.
+        if self._parsed and self._parsed[0] == (old_text, new_text):
+            return self._parsed[1]
+        result = self._parse(old_text, new_text)
+        self._parsed = ((old_text, new_text), result)
+        return result
+
+    def _parse(self, old_text, new_text):
+        changes = TxtChanges(old_text, new_text)
+        if changes.items is None:
+            return None, None
+        items = []
+        for table_type, index, text in changes.items:
+            item = _parse_item(table_type, text)
+            if item is None:
+                return None, None
+            items.append((table_type, index, item))
+        return items, changes.item_counts
+
+
+def _parse_item(table_type, text):
+    if table_type == 'test case':
+        datafile = TestCaseFile()
+        items = lambda: datafile.testcase_table.tests
+    else:
+        datafile = ResourceFile()
+        items = lambda: datafile.keyword_table.keywords
+    content = '*** %s ***\n%s' % (_ITEM_TABLE_HEADERS[table_type][0], text)
+    FromStringIOPopulator(datafile).populate(StringIO(content.encode('UTF-8')))
+    if len(items()) != 1:
+        return None
+    return items()[0]
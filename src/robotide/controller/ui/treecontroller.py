@@ -31,6 +31,8 @@ class TreeController(object):
         self._action_registerer = action_registerer
         self.settings = settings
         self._history = history or _History()
+        self._nodes_by_controller = {}
+        self._nodes_by_data = {}
 
     def register_tree_actions(self):
         actions = ActionInfoCollection(tree_actions, self, self._tree)
@@ -61,11 +63,49 @@ class TreeController(object):
         if not text.startswith('*'):
              self._tree.SetItemText(node, '*' + text)
 
+    def register_node(self, node, handler):
+        """Makes `node` findable by the controller and the data of `handler`."""
+        self._nodes_by_controller[id(handler.controller)] = node
+        if handler.item is not None:
+            self._nodes_by_data[id(handler.item)] = node
+
+    def unregister_node(self, node):
+        """Forgets `node` and all nodes below it."""
+        for item in self._walk(node):
+            handler = self.get_handler(item)
+            if handler:
+                self._forget(self._nodes_by_controller, handler.controller, item)
+                self._forget(self._nodes_by_data, handler.item, item)
+
+    def _walk(self, node):
+        yield node
+        item, cookie = self._tree.GetFirstChild(node)
+        while item:
+            for descendant in self._walk(item):
+                yield descendant
+            item, cookie = self._tree.GetNextChild(node, cookie)
+
+    def _forget(self, nodes, obj, node):
+        if nodes.get(id(obj)) is node:
+            del nodes[id(obj)]
+
+    def clear_nodes(self):
+        self._nodes_by_controller.clear()
+        self._nodes_by_data.clear()
+
     def find_node_by_controller(self, controller):
-        def match_handler(n):
-            handler = self.get_handler(n)
-            return handler and controller is handler.controller
-        return self._find_node_with_predicate(self._tree._root, match_handler)
+        node = self._nodes_by_controller.get(id(controller))
+        handler = self.get_handler(node) if node else None
+        if handler and handler.controller is controller:
+            return node
+        return None
+
+    def find_node_by_data(self, data):
+        node = self._nodes_by_data.get(id(data))
+        handler = self.get_handler(node) if node else None
+        if handler and handler.item is data:
+            return node
+        return None
 
     def find_node_with_label(self, node, label):
         matcher = lambda n: utils.eq(self._tree.GetItemText(n), label)
@@ -0,0 +1,195 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import re
+
+from robot.parsing.model import TestCase
+from robot.utils import normalize
+
+from robotide.publish import PUBLISHER
+from robotide.publish.messages import RideItem, RideDataChangedToDirty, \
+    RideDataFileSet, RideDataFileRemoved, RideTestCaseAdded, \
+    RideTestCaseRemoved, RideUserKeyword, RideImportSetting, \
+    RideVariableAdded, RideVariableRemoved, RideVariableUpdated, \
+    RideOpenSuite, RideNewProject
+
+
+class UsageIndex(object):
+    """Index of the keyword and variable names used in datafiles.
+
+    Keyword names are mapped to the datafiles using them and to the
+    locations of the usages in those datafiles. A location is a test case
+    or a user keyword using the name, or the datafile itself if the name is
+    used in its settings or variables. Finding and renaming keyword usages
+    thus only needs to go through the steps of those tests and keywords.
+    Keywords with embedded arguments and variables are matched against the
+    names used in each datafile, because they cannot be looked up by name.
+
+    A datafile is indexed when it is first searched and its entries are
+    removed when modification messages about the datafile are published.
+    """
+    _invalidating_messages = [RideItem, RideDataChangedToDirty,
+                              RideDataFileSet, RideTestCaseAdded,
+                              RideTestCaseRemoved, RideUserKeyword,
+                              RideImportSetting, RideVariableAdded,
+                              RideVariableRemoved, RideVariableUpdated,
+                              RideDataFileRemoved]
+    _clearing_messages = [RideOpenSuite, RideNewProject]
+
+    def __init__(self):
+        self._usages = {}
+        self._keywords = {}
+        self._subscribed = False
+
+    def keyword_usages(self, datafiles, name):
+        """Returns `(datafile, locations)` pairs for datafiles using `name`.
+
+        `name` is either a keyword name or a compiled regexp matching usages
+        of a keyword with embedded arguments. `locations` contains the data
+        of the tests and keywords using the keyword, and the data of the
+        datafile itself if the keyword is used in its tables otherwise.
+        """
+        datafiles = list(datafiles)
+        for df in datafiles:
+            self._get(df)
+        if isinstance(name, basestring):
+            users = self._keywords.get(normalize(name), {})
+            return [(df, users[df]) for df in datafiles if df in users]
+        usages = [(df, self._usages[df].keyword_locations(name))
+                  for df in datafiles]
+        return [(df, locations) for df, locations in usages if locations]
+
+    def datafiles_using_keyword(self, datafiles, name):
+        """Returns datafiles possibly using keyword `name`.
+
+        `name` is either a keyword name or a compiled regexp matching usages
+        of a keyword with embedded arguments.
+        """
+        return [df for df, _ in self.keyword_usages(datafiles, name)]
+
+    def datafiles_using_variable(self, datafiles, name):
+        return [df for df in datafiles if self._get(df).uses_variable(name)]
+
+    def _get(self, datafile):
+        self._subscribe()
+        if datafile not in self._usages:
+            usages = self._usages[datafile] = _DatafileUsages(datafile.data)
+            for name, locations in usages.keywords.items():
+                self._keywords.setdefault(name, {})[datafile] = locations
+        return self._usages[datafile]
+
+    def _subscribe(self):
+        if self._subscribed:
+            return
+        for message in self._invalidating_messages:
+            PUBLISHER.subscribe(self._invalidate_from, message, key=self)
+        for message in self._clearing_messages:
+            PUBLISHER.subscribe(self._clear_from, message, key=self)
+        self._subscribed = True
+
+    def _invalidate_from(self, message):
+        datafile = self._datafile_controller_of(message)
+        if datafile is None:
+            self.invalidate()
+        else:
+            self.invalidate(datafile)
+
+    def _datafile_controller_of(self, message):
+        for attr in ['item', 'datafile']:
+            controller = getattr(message, attr, None)
+            datafile = getattr(controller, 'datafile_controller', None)
+            if datafile is not None:
+                return datafile
+        return None
+
+    def _clear_from(self, message):
+        self.invalidate()
+
+    def invalidate(self, datafile=None):
+        """Drops `datafile` or, by default, all datafiles from the index."""
+        if datafile is None:
+            self._usages.clear()
+            self._keywords.clear()
+        elif datafile in self._usages:
+            for name in self._usages.pop(datafile).keywords:
+                users = self._keywords[name]
+                del users[datafile]
+                if not users:
+                    del self._keywords[name]
+
+    def close(self):
+        if self._subscribed:
+            PUBLISHER.unsubscribe_all(key=self)
+            self._subscribed = False
+        self.invalidate()
+
+
+class _DatafileUsages(object):
+    _bdd_prefix = re.compile(r'^(given|when|then|and)\s*', re.I)
+
+    def __init__(self, datafile):
+        self._cells = {}
+        # Directories without an initialization file have no data.
+        if datafile is not None:
+            for location, cell in self._get_cells(datafile):
+                self._cells.setdefault(cell, set()).add(location)
+        self.keywords = {}
+        for cell, locations in self._cells.items():
+            self._add_keyword(cell, locations)
+            if self._bdd_prefix.match(cell):
+                self._add_keyword(self._bdd_prefix.sub('', cell), locations)
+        # Normalized cells cannot contain whitespace, so a normalized name
+        # found from the joined text is always within a single cell.
+        self._text = '\n'.join(normalize(cell) for cell in self._cells)
+
+    def _add_keyword(self, cell, locations):
+        self.keywords.setdefault(normalize(cell), set()).update(locations)
+
+    def _get_cells(self, datafile):
+        # User keywords are test cases in the parsing model.
+        for table in datafile:
+            for item in table:
+                if isinstance(item, TestCase):
+                    for cell in self._get_macro_cells(item):
+                        yield item, cell
+                else:
+                    for cell in item.as_list():
+                        yield datafile, cell
+
+    def _get_macro_cells(self, macro):
+        yield macro.name
+        for setting in macro.settings:
+            for cell in setting.as_list():
+                yield cell
+        for cell in self._get_step_cells(macro.steps):
+            yield cell
+
+    def _get_step_cells(self, steps):
+        for step in steps:
+            for cell in step.as_list():
+                yield cell
+            for cell in self._get_step_cells(getattr(step, 'steps', [])):
+                yield cell
+
+    def keyword_locations(self, regexp):
+        locations = set()
+        for cell, cell_locations in self._cells.items():
+            if regexp.match(cell):
+                locations.update(cell_locations)
+        return locations
+
+    def uses_variable(self, name):
+        if '*' in name or '?' in name:
+            return True
+        return normalize(name) in self._text
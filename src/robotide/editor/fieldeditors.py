@@ -12,6 +12,8 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from __future__ import with_statement
+
 import wx
 import wx.grid
 
@@ -175,10 +177,14 @@ class _EditorGrid(GridEditor):
 
 
     def _write_content(self, value):
-        self.ClearGrid()
+        cells = self.NumberRows * self.NumberCols
         for index, item in enumerate(value):
             row, col = divmod(index, self.NumberCols)
             self.write_cell(row, col, item, False)
+        for index in range(len(value), cells):
+            row, col = divmod(index, self.NumberCols)
+            if self.GetCellValue(row, col):
+                self._set_cell_value(row, col, '')
         self.AutoSizeRows()
 
     def get_value(self):
@@ -211,12 +217,12 @@ class _EditorGrid(GridEditor):
         self._insert_or_delete_cells_on_single_row(delete_cells, event)
 
     def _insert_or_delete_cells_on_single_row(self, action, event):
-        self._update_history()
         value = self.get_value()
         row, col = self.selection.cell
         start = row * self.NumberCols + col
         data = action(value, start, start + len(self.selection.cols()))
-        self._write_content(data)
+        with self._recording_history():
+            self._write_content(data)
         event.Skip()
 
     def _insert_cells_to_multiple_rows(self, event):
@@ -255,6 +261,8 @@ class _EditorGrid(GridEditor):
         self._set_cols(new_cols)
         self.resize_columns(width)
         self._write_content(data)
+        # Recorded changes refer to cells in the old layout.
+        self._history.clear()
 
     def _set_cols(self, new_cols):
         if new_cols > 0:
@@ -12,6 +12,9 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from __future__ import with_statement
+from contextlib import contextmanager
+
 import wx
 from wx import grid
 
@@ -35,7 +38,7 @@ class GridEditor(grid.Grid):
         self.selection = _GridSelection(self)
         self.SetDefaultRenderer(grid.GridCellAutoWrapStringRenderer())
         self._clipboard_handler = ClipboardHandler(self)
-        self._history = _GridState()
+        self._history = _GridHistory()
         self.CreateGrid(num_rows, num_cols)
         self._popup_creator = popup_creator or PopupCreator()
 
@@ -52,8 +55,14 @@ class GridEditor(grid.Grid):
 
     def write_cell(self, row, col, value, update_history=True):
         if update_history:
-            self._update_history()
+            with self._recording_history(coalesce=True):
+                self.write_cell(row, col, value, update_history=False)
+            return
         self._expand_if_necessary(row, col)
+        self._set_cell_value(row, col, value)
+
+    def _set_cell_value(self, row, col, value):
+        self._history.record(row, col, self.GetCellValue(row, col), value)
         self.SetCellValue(row, col, value)
 
     def _expand_if_necessary(self, row, col):
@@ -65,12 +74,14 @@ class GridEditor(grid.Grid):
     def has_focus(self):
         return self.FindFocus() == self.GridWindow
 
-    def _update_history(self):
-        self._history.change(self._get_all_content())
-
-    def _get_all_content(self):
-        return self._get_block_content(range(self.NumberRows),
-                                       range(self.NumberCols))
+    @contextmanager
+    def _recording_history(self, coalesce=False):
+        """Records cells changed within the block as one undoable change."""
+        self._history.begin(coalesce)
+        try:
+            yield
+        finally:
+            self._history.end()
 
     @property
     def cell_under_cursor(self):
@@ -87,25 +98,25 @@ class GridEditor(grid.Grid):
         self._clipboard_handler.copy()
 
     def cut(self):
-        self._update_history()
-        self._clipboard_handler.cut()
-        self._clear_selected_cells()
+        with self._recording_history():
+            self._clipboard_handler.cut()
+            self._clear_selected_cells()
 
     def _clear_selected_cells(self):
         for row, col in self.selection.cells():
             self.write_cell(row, col, '', update_history=False)
 
     def paste(self):
-        self._update_history()
-        self._clipboard_handler.paste()
+        with self._recording_history():
+            self._clipboard_handler.paste()
 
     def delete(self):
-        self._update_history()
         if self.IsCellEditControlShown():
             if IS_WINDOWS:
                 self._delete_from_cell_editor()
         else:
-            self._clear_selected_cells()
+            with self._recording_history():
+                self._clear_selected_cells()
 
     def _delete_from_cell_editor(self):
         editor = self.get_cell_edit_control()
@@ -143,10 +154,25 @@ class GridEditor(grid.Grid):
         return rowdata
 
     def undo(self):
-        prev_data = self._history.back()
-        if prev_data:
-            self.ClearGrid()
-            self._write_data(prev_data, update_history=False)
+        change = self._history.back()
+        if change:
+            self._apply_values([(row, col, old) for row, col, old, _
+                                in reversed(change)])
+
+    def redo(self):
+        change = self._history.forward()
+        if change:
+            self._apply_values([(row, col, new) for row, col, _, new
+                                in change])
+
+    def _apply_values(self, values):
+        for row, col, value in values:
+            self._expand_if_necessary(row, col)
+            self.SetCellValue(row, col, value)
+        for col in set(col for _, col, _ in values):
+            self.AutoSizeColumn(col)
+        for row in set(row for row, _, _ in values):
+            self.AutoSizeRow(row)
 
     def _write_data(self, data, update_history=True):
         for row_index, row_data in enumerate(data):
@@ -191,10 +217,10 @@ class GridEditor(grid.Grid):
         self._insert_or_delete_cells(self._delete_cells, event)
 
     def _insert_or_delete_cells(self, action, event):
-        self._update_history()
-        for index in self.selection.rows():
-            data = action(self._row_data(index))
-            self._write_row(index, data)
+        with self._recording_history():
+            for index in self.selection.rows():
+                data = action(self._row_data(index))
+                self._write_row(index, data)
         self._refresh_layout()
         event.Skip()
 
@@ -284,16 +310,67 @@ class _Cell(object):
             yield item
 
 
-class _GridState(object):
+class _GridHistory(object):
+    """Undo history storing only the cells changed by each change.
 
-    def __init__(self):
+    A change is a list of `(row, col, old, new)` tuples. Consecutive
+    single cell changes to the same cell are coalesced into one change, and
+    the oldest changes are forgotten when more than `max_cells` cell values
+    are stored.
+    """
+
+    def __init__(self, max_cells=10000):
         self._back = []
         self._forward = []
+        self._max_cells = max_cells
+        self._cells = 0
+        self._recording = None
+        self._coalesce = False
+        self._depth = 0
+
+    def begin(self, coalesce=False):
+        self._depth += 1
+        if self._depth == 1:
+            self._recording = {}
+            self._coalesce = coalesce
+
+    def record(self, row, col, old, new):
+        if self._recording is None:
+            return
+        if (row, col) in self._recording:
+            old = self._recording[(row, col)][2]
+        self._recording[(row, col)] = (row, col, old, new)
 
-    def change(self, state):
-        if not self._back or state != self._back[-1]:
-            self._back.append(state)
-            self._forward = []
+    def end(self):
+        self._depth -= 1
+        if self._depth:
+            return
+        change = sorted(cell for cell in self._recording.values()
+                        if cell[2] != cell[3])
+        self._recording = None
+        if change:
+            self._add(change)
+
+    def _add(self, change):
+        self._cells -= sum(len(c) for c in self._forward)
+        self._forward = []
+        if self._coalesce and self._can_coalesce(change):
+            row, col, _, new = change[0]
+            old = self._back.pop()[0][2]
+            self._cells -= 1
+            if old == new:
+                return
+            change = [(row, col, old, new)]
+        self._back.append(change)
+        self._cells += len(change)
+        while self._cells > self._max_cells and len(self._back) > 1:
+            self._cells -= len(self._back.pop(0))
+
+    def _can_coalesce(self, change):
+        if len(change) != 1 or not self._back:
+            return False
+        previous = self._back[-1]
+        return len(previous) == 1 and previous[0][:2] == change[0][:2]
 
     def back(self):
         if not self._back:
@@ -304,6 +381,9 @@ class _GridState(object):
     def forward(self):
         if not self._forward:
             return None
-        state = self._forward.pop()
-        self._back.append(state)
-        return state
+        change = self._forward.pop()
+        self._back.append(change)
+        return change
+
+    def clear(self):
+        self.__init__(self._max_cells)
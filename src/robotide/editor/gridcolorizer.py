@@ -12,6 +12,8 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import time
+
 from robotide.controller.cellinfo import CellType
 import wx
 # this import fails in HUDSON
@@ -20,6 +22,14 @@ wxFONTWEIGHT_BOLD = 92
 wxFONTWEIGHT_NORMAL = 90
 
 class Colorizer(object):
+    """Colours cells of a keyword editor grid based on their cell infos.
+
+    Cell infos are fetched one row at a time, which lets step controllers
+    resolve keywords and variables once per step. Visible rows are coloured
+    first and the rest in short time slices. The colours applied to each row
+    are remembered and rows whose colours would not change are skipped.
+    """
+    _time_slice = 0.02
 
     def __init__(self, grid, controller, colors):
         self._grid = grid
@@ -27,41 +37,83 @@ class Colorizer(object):
         self._colors=colors
         self._current_task_id = 0
         self._timer = None
+        self._row_colors = {}
 
     def close(self):
         self._grid = None
 
+    def invalidate(self):
+        """Makes the next colorization colour all rows again."""
+        self._row_colors.clear()
+
     def colorize(self, selection_content):
         self._current_task_id += 1
         if self._timer is None:
-            self._timer = wx.CallLater(1, self._coloring_task, self._current_task_id, selection_content)
+            self._timer = wx.CallLater(1, self._start_coloring, self._current_task_id, selection_content)
         else:
             self._timer.Restart(50, self._current_task_id, selection_content)
 
-    def _coloring_task(self, task_index, selection_content, row=0, col=0):
+    def _start_coloring(self, task_index, selection_content):
         if task_index != self._current_task_id or self._grid is None:
             return
-        if row >= self._grid.NumberRows:
+        first, last = self._visible_rows()
+        changed = [self._colorize_row(row, selection_content)
+                   for row in range(first, last+1)]
+        if any(changed):
+            self._grid.ForceRefresh()
+        others = range(last+1, self._grid.NumberRows) + range(first)
+        self._coloring_task(task_index, selection_content, others, any(changed))
+
+    def _visible_rows(self):
+        rows = self._grid.NumberRows
+        top = self._grid.CalcUnscrolledPosition(0, 0)[1]
+        first = self._grid.YToRow(top)
+        last = self._grid.YToRow(top + self._grid.GetClientSize().height)
+        if first < 0:
+            first = 0
+        if last < 0 or last >= rows:
+            last = rows - 1
+        return first, last
+
+    def _coloring_task(self, task_index, selection_content, rows, changed, index=0):
+        if task_index != self._current_task_id or self._grid is None:
+            return
+        end_time = time.time() + self._time_slice
+        while index < len(rows) and time.time() < end_time:
+            changed = self._colorize_row(rows[index], selection_content) or changed
+            index += 1
+        if index < len(rows):
+            wx.CallAfter(self._coloring_task, task_index, selection_content,
+                         rows, changed, index)
+        elif changed:
             self._grid.ForceRefresh()
             self._grid.AutoSizeRows()
-        elif col < self._grid.NumberCols:
-            self._colorize_cell(row, col, selection_content)
-            wx.CallAfter(self._coloring_task, task_index, selection_content, row, col+1)
-        else:
-            self._coloring_task(task_index, selection_content, row+1, 0)
 
-    def _colorize_cell(self, row, col, selection_content):
-        cell_info = self._controller.get_cell_info(row, col)
+    def _colorize_row(self, row, selection_content):
+        cols = self._grid.NumberCols
+        cell_infos = self._controller.get_cell_infos(row, cols) or [None] * cols
+        colors = tuple(self._get_cell_colors(cell_info, selection_content)
+                       for cell_info in cell_infos)
+        if self._row_colors.get(row) == colors:
+            return False
+        self._row_colors[row] = colors
+        for col, cell_colors in enumerate(colors):
+            self._colorize_cell(row, col, *cell_colors)
+        return True
+
+    def _get_cell_colors(self, cell_info, selection_content):
         if cell_info is None:
-            self._set_default_colors(row, col)
-            return
-        self._grid.SetCellTextColour(row, col, self._get_text_color(cell_info))
-        self._grid.SetCellBackgroundColour(row, col, self._get_background_color(cell_info, selection_content))
-        self._grid.SetCellFont(row, col, self._get_cell_font(row, col, cell_info))
-
-    def _set_default_colors(self, row, col):
-        self._grid.SetCellTextColour(row, col, self._colors.DEFAULT_TEXT)
-        self._grid.SetCellBackgroundColour(row, col, self._colors.DEFAULT_BACKGROUND)
+            return (self._colors.DEFAULT_TEXT, self._colors.DEFAULT_BACKGROUND,
+                    None)
+        return (self._get_text_color(cell_info),
+                self._get_background_color(cell_info, selection_content),
+                self._get_weight(cell_info))
+
+    def _colorize_cell(self, row, col, text_color, background_color, weight):
+        self._grid.SetCellTextColour(row, col, text_color)
+        self._grid.SetCellBackgroundColour(row, col, background_color)
+        if weight is not None:
+            self._grid.SetCellFont(row, col, self._get_cell_font(row, col, weight))
 
     def _get_text_color(self, cell_info):
         return self._colors.get_text_color(cell_info.content_type)
@@ -73,9 +125,9 @@ class Colorizer(object):
             return self._colors.get_error_color()
         return self._colors.get_background_color(cell_info.cell_type)
 
-    def _get_cell_font(self, row, col, cell_info):
+    def _get_cell_font(self, row, col, weight):
         font = self._grid.GetCellFont(row, col)
-        font.SetWeight(self._get_weight(cell_info))
+        font.SetWeight(weight)
         return font
 
     def _get_weight(self, cell_info):
@@ -110,6 +110,7 @@ class KeywordEditor(GridEditor, RideEventHandler):
     def OnSettingsChanged(self, data):
         '''Redraw the colors if the color settings are modified'''
         if data.keys[0] == "Colors":
+            self._colorizer.invalidate()
             self._colorize_grid()
 
     def OnSelectCell(self, event):
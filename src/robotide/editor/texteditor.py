@@ -19,10 +19,9 @@ from wx import stc
 from StringIO import StringIO
 
 from robot.parsing.model import TestDataDirectory
-from robot.parsing.populators import FromFilePopulator
-from robot.parsing.txtreader import TxtReader
 
 from robotide.controller.commands import SetDataFile
+from robotide.controller.textsync import FromStringIOPopulator, TxtDataSync
 from robotide.publish.messages import RideMessage
 from robotide.widgets import VerticalSizer, HorizontalSizer, ButtonWithHandler
 from robotide.pluginapi import (Plugin, RideSaving, TreeAwarePluginMixin,
@@ -39,6 +38,7 @@ class TextEditorPlugin(Plugin, TreeAwarePluginMixin):
     def __init__(self, application):
         Plugin.__init__(self, application)
         self._editor_component = None
+        self._sync = TxtDataSync()
 
     @property
     def _editor(self):
@@ -127,11 +127,13 @@ class TextEditorPlugin(Plugin, TreeAwarePluginMixin):
         datafile_controller = self.tree.get_selected_datafile_controller()
         if datafile_controller:
             self._editor.open(DataFileWrapper(datafile_controller,
-                                              self.global_settings))
+                                              self.global_settings,
+                                              self._sync))
 
     def _open_data_for_controller(self, datafile_controller):
         self._editor.selected(DataFileWrapper(datafile_controller,
-                                              self.global_settings))
+                                              self.global_settings,
+                                              self._sync))
 
     def OnTabChange(self, message):
         if message.newtab == self.title:
@@ -201,9 +203,11 @@ class DataValidationHandler(object):
 
 class DataFileWrapper(object): # TODO: bad class name
 
-    def __init__(self, data, settings):
+    def __init__(self, data, settings, sync=None):
         self._data = data
         self._settings = settings
+        self._sync = sync or TxtDataSync()
+        self._synced_text = None
 
     def __eq__(self, other):
         if other is None:
@@ -211,7 +215,14 @@ class DataFileWrapper(object): # TODO: bad class name
         return self._data == other._data
 
     def update_from(self, content):
-        self._data.execute(SetDataFile(self._create_target_from(content)))
+        text = content.decode('UTF-8')
+        if not self._update_changed_items(text):
+            self._data.execute(SetDataFile(self._create_target_from(content)))
+        self._synced_text = text
+
+    def _update_changed_items(self, text):
+        return self._synced_text is not None and \
+            self._sync.update(self._data, self._synced_text, text)
 
     def _create_target_from(self, content):
         src = StringIO(content)
@@ -220,6 +231,12 @@ class DataFileWrapper(object): # TODO: bad class name
         return target
 
     def format_text(self, text):
+        if self._synced_text is not None:
+            formatted = self._sync.format_changes(self._synced_text,
+                                                  text.decode('UTF-8'),
+                                                  self._separating_spaces)
+            if formatted is not None:
+                return formatted
         return self._txt_data(self._create_target_from(text))
 
     def mark_data_dirty(self):
@@ -235,12 +252,18 @@ class DataFileWrapper(object): # TODO: bad class name
 
     @property
     def content(self):
-        return self._txt_data(self._data.data)
+        self._synced_text = self._sync.serialize(self._data,
+                                                 self._separating_spaces)
+        return self._synced_text
+
+    @property
+    def _separating_spaces(self):
+        return self._settings['txt number of spaces']
 
     def _txt_data(self, data):
         output = StringIO()
         data.save(output=output, format='txt',
-                  txt_separating_spaces=self._settings['txt number of spaces'])
+                  txt_separating_spaces=self._separating_spaces)
         return output.getvalue().decode('UTF-8')
 
 
@@ -425,9 +448,3 @@ class RobotDataEditor(stc.StyledTextCtrl):
     @property
     def utf8_text(self):
         return self.GetText().encode('UTF-8')
-
-
-class FromStringIOPopulator(FromFilePopulator):
-
-    def populate(self, content):
-        TxtReader().read(content, self)
@@ -15,7 +15,11 @@
 import os
 import time
 
+from robot.errors import DataError
+from robot.variables import Variables as RobotVariables
+
 from robotide.spec import LibrarySpec
+from robotide.spec.specstore import NullSpecStore
 from robotide.robotapi import normpath
 from robotide.publish.messages import RideLogException
 
@@ -24,9 +28,12 @@ class LibraryCache(object):
     _IMPORT_FAILED = 'Importing library %s failed:'
     _RESOLVE_FAILED = 'Resolving keywords for library %s with args %s failed:'
 
-    def __init__(self, settings):
+    def __init__(self, settings, spec_store=None, import_pool=None):
         self._settings = settings
-        self._library_keywords = _LibraryCache()
+        self._spec_store = spec_store or NullSpecStore()
+        self._import_pool = import_pool
+        self._library_keywords = _LibraryCache(
+            settings.get('library cache size', 0))
         self.__default_libraries = None
         self.__default_kws = None
 
@@ -46,12 +53,44 @@ class LibraryCache(object):
     def get_all_cached_library_names(self):
         return self._library_keywords.get_library_names()
 
+    @property
+    def statistics(self):
+        """Hit, miss and eviction counts of the library keyword cache."""
+        return self._library_keywords.statistics
+
     def add_library(self, name, args=None):
         if not self._library_keywords.has_key(self._key(name, args)):
-            action = lambda: LibrarySpec(name, args).keywords
+            action = lambda: self._get_library_spec_keywords(name, args)
             kws = self._with_error_logging(action, [],
                                            self._IMPORT_FAILED % (name))
             self._library_keywords[self._key(name, args)] = kws
+            return kws
+        return self._library_keywords[self._key(name, args)]
+
+    def prefetch_libraries(self, libraries):
+        """Starts resolving keywords of several libraries in parallel.
+
+        `libraries` is a list of `(name, args, alias)` tuples. Keywords of
+        libraries not already cached are imported in the background if an
+        import pool is in use.
+        """
+        for name, args, alias in libraries:
+            args = self._alias_to_args(alias, args)
+            key = self._key(name, args)
+            if self._library_keywords.has_key(key):
+                continue
+            kws = self._spec_store.get(name, args)
+            if kws is not None:
+                self._library_keywords[key] = kws
+            elif self._import_pool:
+                LibrarySpec.start_import(name, args, self._import_pool)
+
+    def _get_library_spec_keywords(self, name, args):
+        kws = self._spec_store.get(name, args)
+        if kws is None:
+            kws = LibrarySpec(name, args, self._import_pool).keywords
+            self._spec_store.put(name, args, kws)
+        return kws
 
     def _key(self, name, args):
         return (name, tuple(args or ''))
@@ -59,9 +98,10 @@ class LibraryCache(object):
     def get_library_keywords(self, name, args=None, alias=None):
         args = self._alias_to_args(alias, args)
         def _get_library_keywords():
-            if not self._library_keywords.has_key(self._key(name, args)):
-                self.add_library(name, args)
-            return self._library_keywords[self._key(name, args)]
+            kws = self._library_keywords.get(self._key(name, args))
+            if kws is None:
+                kws = self.add_library(name, args)
+            return kws
         return self._with_error_logging(_get_library_keywords, [],
                                         self._RESOLVE_FAILED % (name, args))
 
@@ -86,15 +126,15 @@ class LibraryCache(object):
 
     def _build_default_kws(self):
         kws = []
-        for spec in self._default_libraries.values():
-            kws.extend(spec.keywords)
+        for keywords in self._default_libraries.values():
+            kws.extend(keywords)
         return kws
 
     def _get_default_libraries(self):
         default_libs = {}
         for libsetting in self._settings['auto imports'] + ['BuiltIn']:
             name, args = self._get_name_and_args(libsetting)
-            default_libs[name] = LibrarySpec(name, args)
+            default_libs[name] = self._get_library_spec_keywords(name, args)
         return default_libs
 
     def _get_name_and_args(self, libsetting):
@@ -132,25 +172,186 @@ class ExpiringCache(object):
             return self._resource_files[path]
 
 
-class _LibraryCache:
-    """Cache for libs/resources that doesn't require mutable keys like dicts"""
+class DependencyCache(object):
+    """Cache whose values stay valid until one of their dependencies changes.
+
+    Every value is stored with the set of dependencies it was computed from,
+    for example the sources of the datafile and all resources it imports.
+    `invalidate` removes only the values depending on the changed item.
+    Values stored as `volatile` are removed on every invalidation, which is
+    needed when a value depends on something that could not be resolved.
+    """
 
     def __init__(self):
-        self._keys = []
-        self._libs = []
+        self._values = {}
+        self._dependencies = {}
+        self._dependents = {}
+        self._volatile = set()
+
+    def get(self, key):
+        return self._values.get(key)
+
+    def put(self, key, value, dependencies=(), volatile=False):
+        self._remove(key)
+        self._values[key] = value
+        self._dependencies[key] = set(dependencies) | set([key])
+        for dependency in self._dependencies[key]:
+            self._dependents.setdefault(dependency, set()).add(key)
+        if volatile:
+            self._volatile.add(key)
+
+    def invalidate(self, dependency):
+        for key in self._dependents.pop(dependency, set()) | self._volatile:
+            self._remove(key)
+
+    def clear(self):
+        self.__init__()
+
+    def _remove(self, key):
+        self._values.pop(key, None)
+        self._volatile.discard(key)
+        for dependency in self._dependencies.pop(key, ()):
+            dependents = self._dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[dependency]
+
+    def __len__(self):
+        return len(self._values)
+
+
+class VariableFileCache(object):
+    """Cache for variables read from variable files.
+
+    Values are keyed by the absolute path of the variable file, its
+    arguments and its modification time, so a variable file is evaluated
+    again only after it has been changed. Failures are cached the same way.
+    Variable files are evaluated in a worker subprocess if an import pool is
+    given, which keeps slow or hanging variable files from blocking RIDE and
+    their imports out of RIDE's `sys.modules`.
+    """
+
+    def __init__(self, import_pool=None):
+        self._import_pool = import_pool
+        self._values = {}
+
+    def get_variables(self, path, args=()):
+        """Returns `(name, value)` pairs from the variable file in `path`.
+
+        Raises `DataError` if evaluating the variable file fails.
+        """
+        path = os.path.abspath(path)
+        key = _hashable((path, args))
+        mtime = self._mtime(path)
+        cached = self._values.get(key)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, self._evaluate(path, list(args)))
+            self._values[key] = cached
+        variables, error = cached[1]
+        if error:
+            raise DataError(error)
+        return variables
+
+    def _mtime(self, path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return None
+
+    def _evaluate(self, path, args):
+        try:
+            if self._import_pool:
+                variables = self._import_pool.import_variables(path, args)
+            else:
+                temp = RobotVariables()
+                temp.set_from_file(path, args)
+                variables = temp.items()
+            return tuple(variables), None
+        except DataError, err:
+            return (), unicode(err)
+
+    def clear(self):
+        self._values.clear()
+
+    def __len__(self):
+        return len(self._values)
+
+
+class _LibraryCache(object):
+    """Cache for library keywords keyed by library name and arguments.
+
+    Arguments may contain mutable objects like lists and dicts, so keys are
+    normalized to hashable values. If `max_size` is given, the least
+    recently used libraries are evicted when the cache grows bigger.
+    """
+
+    def __init__(self, max_size=0):
+        self._libs = {}
+        # Libraries are ordered by the counter value of their latest use.
+        self._used = {}
+        self._order = {}
+        self._counter = self._oldest = 0
+        self._max_size = max_size
+        self.hits = self.misses = self.evictions = 0
 
     def __setitem__(self, key, library):
-        self._keys.append(key)
-        self._libs.append(library)
+        key = _hashable(key)
+        self._libs[key] = library
+        self._touch(key)
+        while self._max_size and len(self._libs) > self._max_size:
+            self._evict_oldest()
+            self.evictions += 1
 
     def __getitem__(self, key):
+        key = _hashable(key)
+        library = self._libs[key]
+        self._touch(key)
+        return library
+
+    def _touch(self, key):
+        if key in self._used:
+            del self._order[self._used[key]]
+        self._used[key] = self._counter
+        self._order[self._counter] = key
+        self._counter += 1
+
+    def _evict_oldest(self):
+        while self._oldest not in self._order:
+            self._oldest += 1
+        key = self._order.pop(self._oldest)
+        del self._used[key]
+        del self._libs[key]
+
+    def get(self, key):
         try:
-            return self._libs[self._keys.index(key)]
-        except ValueError:
-            raise KeyError
+            library = self[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return library
 
     def has_key(self, key):
-        return key in self._keys
+        return _hashable(key) in self._libs
 
     def get_library_names(self):
-        return [name for name,_ in self._keys]
+        return [self._order[used][0] for used in sorted(self._order)]
+
+    @property
+    def statistics(self):
+        return {'size': len(self._libs), 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions}
+
+
+def _hashable(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((_hashable(k), _hashable(v))
+                                     for k, v in value.items())))
+    try:
+        hash(value)
+    except TypeError:
+        return ('unhashable', repr(value))
+    return value
@@ -12,6 +12,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 from robotide.spec.iteminfo import LocalVariableInfo
+from robotide.utils import is_variable
 
 def LocalNamespace(controller, namespace, row=None):
    if row is not None: # can be 0!
@@ -28,6 +29,8 @@ class LocalMacroNamespace(object):
         return self._namespace.get_suggestions_for(self._controller, start)
 
     def has_name(self, value):
+        if is_variable(value):
+            return self._namespace.is_known_variable(self._controller, value)
         for sug in self._namespace.get_suggestions_for(self._controller, value):
             if sug.name == value:
                 return True
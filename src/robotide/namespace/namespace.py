@@ -16,6 +16,7 @@ import os
 import re
 import operator
 import tempfile
+import time
 from itertools import chain
 
 from robot.errors import DataError
@@ -24,41 +25,75 @@ from robot.parsing.settings import Library, Resource, Variables
 from robot.utils.normalizing import normalize
 from robot.variables import Variables as RobotVariables
 
-from robotide.namespace.cache import LibraryCache, ExpiringCache
+from robotide.namespace.cache import (LibraryCache, DependencyCache,
+                                      VariableFileCache)
 from robotide.namespace.resourcefactory import ResourceFactory
 from robotide.spec.iteminfo import (TestCaseUserKeywordInfo,
                                     ResourceUserKeywordInfo,
                                     VariableInfo, _UserKeywordInfo,
     ArgumentInfo)
-from robotide.robotapi import NormalizedDict, is_var
+from robotide.robotapi import NormalizedDict, VariableSplitter, is_var
 from robotide.namespace.embeddedargs import EmbeddedArgsHandler
 
 
 class Namespace(object):
 
-    def __init__(self, settings):
+    def __init__(self, settings, spec_store=None, import_pool=None):
         self._settings = settings
+        self._spec_store = spec_store
+        self._import_pool = import_pool
+        self._generation = 0
         self._init_caches()
         self._content_assist_hooks = []
         self._update_listeners = []
 
     def _init_caches(self):
-        self._lib_cache = LibraryCache(self._settings)
+        self._lib_cache = LibraryCache(self._settings, self._spec_store,
+                                       self._import_pool)
         self._resource_factory = ResourceFactory(self._settings)
-        self._retriever = DatafileRetriever(self._lib_cache, self._resource_factory)
+        self._varfile_cache = VariableFileCache(self._import_pool)
+        self._retriever = DatafileRetriever(self._lib_cache,
+                                            self._resource_factory,
+                                            self._varfile_cache)
         self._context_factory = _RetrieverContextFactory()
 
-    def update(self):
-        self._retriever.expire_cache()
+    def update(self, datafile=None):
+        """Updates the namespace after `datafile` has changed.
+
+        Cached keywords are expired only for `datafile` and datafiles
+        importing it directly or via other resources. If `datafile` is not
+        given, all cached keywords are expired.
+        """
+        self._retriever.expire_cache(datafile)
         self._context_factory = _RetrieverContextFactory()
+        self._generation += 1
         for listener in self._update_listeners:
             listener()
 
     def resource_filename_changed(self, old_name, new_name):
         self._resource_factory.resource_filename_changed(old_name, new_name)
+        self._retriever.expire_cache()
+        self._generation += 1
 
     def reset_resource_and_library_cache(self):
         self._init_caches()
+        self._generation += 1
+
+    @property
+    def generation(self):
+        """Number incremented whenever cached keywords or variables expire.
+
+        Values computed from the namespace can be cached together with the
+        generation and used as long as the generation stays the same.
+        Variable files are edited outside RIDE, so they are checked for
+        changes here too.
+        """
+        self._expire_changed_variable_files()
+        return self._generation
+
+    def _expire_changed_variable_files(self):
+        if self._retriever.expire_changed_variable_files():
+            self._generation += 1
 
     def register_update_listener(self, listener):
         self._update_listeners.append(listener)
@@ -103,6 +138,9 @@ class Namespace(object):
     def get_all_cached_library_names(self):
         return self._retriever.get_all_cached_library_names()
 
+    def get_library_cache_statistics(self):
+        return self._lib_cache.statistics
+
     def _blank(self, start):
         return start == ''
 
@@ -162,6 +200,7 @@ class Namespace(object):
     def find_keyword(self, datafile, kw_name):
         if not kw_name:
             return None
+        self._expire_changed_variable_files()
         kwds = self._retriever.get_keywords_cached(datafile,
                                                    self._context_factory)
         return kwds.get(kw_name)
@@ -173,6 +212,26 @@ class Namespace(object):
         kw = self.find_keyword(datafile, name)
         return kw.details if kw else None
 
+    def get_variable_source(self, datafile, name):
+        """Returns the source defining variable `name` visible in `datafile`.
+
+        The source is the path of the datafile or variable file containing
+        the definition, or `'built-in'`. Returns None for unknown variables.
+        Variables visible in a datafile are cached like its keywords.
+        """
+        self._expire_changed_variable_files()
+        return self._retriever.get_variables_cached(datafile).get_source(name)
+
+    def is_known_variable(self, controller, name):
+        """Returns True if variable `name` is visible in `controller`."""
+        if name in controller.get_local_variables():
+            return True
+        hook_suggestions = self._get_suggestions_from_hooks(controller.datafile,
+                                                            name)
+        if any(sug.name == name for sug in hook_suggestions):
+            return True
+        return self.get_variable_source(controller.datafile, name) is not None
+
 
 class _RetrieverContextFactory(object):
 
@@ -198,6 +257,8 @@ class RetrieverContext(object):
     def __init__(self):
         self.vars = _VariableStash()
         self.parsed = set()
+        self.variable_files = set()
+        self.unresolved_imports = False
 
     def set_variables_from_datafile_variable_table(self, datafile):
         self.vars.set_from_variable_table(datafile.variable_table)
@@ -250,7 +311,7 @@ class _VariableStash(object):
 
     def __init__(self):
         self._vars = RobotVariables()
-        self._sources = {}
+        self._sources = NormalizedDict(ignore=['_'])
         for k, v in self.global_variables.iteritems():
             self.set(k, v, 'built-in')
 
@@ -261,6 +322,9 @@ class _VariableStash(object):
     def set_argument(self, name, value):
         self.set(name, value, self.ARGUMENT_SOURCE)
 
+    def get_source(self, name):
+        return self._sources.get(name)
+
     def replace_variables(self, value):
         try:
             return self._vars.replace_scalar(value)
@@ -279,10 +343,8 @@ class _VariableStash(object):
                 if is_var(variable.name):
                     self.set(variable.name, '', variable_table.source)
 
-    def set_from_file(self, varfile_path, args):
-        temp = RobotVariables()
-        temp.set_from_file(varfile_path, args)
-        for (name, value) in temp.items():
+    def set_from_variable_file(self, varfile_path, variables):
+        for name, value in variables:
             self.set(name, value, varfile_path)
 
     def __iter__(self):
@@ -295,11 +357,16 @@ class _VariableStash(object):
 
 
 class DatafileRetriever(object):
+    _variable_file_check_interval = 1.0
 
-    def __init__(self, lib_cache, resource_factory):
+    def __init__(self, lib_cache, resource_factory, varfile_cache=None):
         self._lib_cache = lib_cache
         self._resource_factory = resource_factory
-        self.keyword_cache = ExpiringCache()
+        self._varfile_cache = varfile_cache or VariableFileCache()
+        self.keyword_cache = DependencyCache()
+        self.variable_cache = DependencyCache()
+        self._variable_file_mtimes = {}
+        self._variable_files_checked = 0
         self._default_kws = None
 
     def get_all_cached_library_names(self):
@@ -311,8 +378,44 @@ class DatafileRetriever(object):
             self._default_kws = self._lib_cache.get_default_keywords()
         return self._default_kws
 
-    def expire_cache(self):
-        self.keyword_cache = ExpiringCache()
+    def expire_cache(self, datafile=None):
+        if datafile is None:
+            self.keyword_cache.clear()
+            self.variable_cache.clear()
+            self._variable_file_mtimes.clear()
+        else:
+            self.keyword_cache.invalidate(datafile.source)
+            self.variable_cache.invalidate(datafile.source)
+
+    def expire_changed_variable_files(self):
+        """Expires cached values depending on changed variable files.
+
+        Variable files are checked at most once in a second. Returns True if
+        any of them has changed.
+        """
+        now = time.time()
+        if now - self._variable_files_checked < \
+                self._variable_file_check_interval:
+            return False
+        self._variable_files_checked = now
+        changed = False
+        for path, mtime in self._variable_file_mtimes.items():
+            current = _mtime(path)
+            if current != mtime:
+                self._variable_file_mtimes[path] = current
+                self.keyword_cache.invalidate(path)
+                self.variable_cache.invalidate(path)
+                changed = True
+        return changed
+
+    def _put_to_cache(self, cache, datafile, value, ctx):
+        for path in ctx.variable_files:
+            if path not in self._variable_file_mtimes:
+                self._variable_file_mtimes[path] = _mtime(path)
+        dependencies = [res.source for res in ctx.parsed]
+        dependencies.extend(ctx.variable_files)
+        cache.put(datafile.source, value, dependencies,
+                  volatile=ctx.unresolved_imports)
 
     def get_keywords_from_several(self, datafiles):
         kws = set()
@@ -338,10 +441,13 @@ class DatafileRetriever(object):
 
     def _get_datafile_keywords(self, datafile):
         if isinstance(datafile, ResourceFile):
-            return [ResourceUserKeywordInfo(kw) for kw in datafile.keywords]
-        return [TestCaseUserKeywordInfo(kw) for kw in datafile.keywords]
+            return [ResourceUserKeywordInfo.for_keyword(kw) for kw in datafile.keywords]
+        return [TestCaseUserKeywordInfo.for_keyword(kw) for kw in datafile.keywords]
 
     def _get_imported_library_keywords(self, datafile, ctx):
+        self._lib_cache.prefetch_libraries(
+            [self._lib_import_info(imp, ctx)
+             for imp in self._collect_import_of_type(datafile, Library)])
         return self._collect_kws_from_imports(datafile, Library,
                                               self._lib_kw_getter, ctx)
 
@@ -352,11 +458,15 @@ class DatafileRetriever(object):
         return kws
 
     def _lib_kw_getter(self, imp, ctx):
+        return self._lib_cache.get_library_keywords(
+            *self._lib_import_info(imp, ctx))
+
+    def _lib_import_info(self, imp, ctx):
         name = ctx.replace_variables(imp.name)
         name = self._convert_to_absolute_path(name, imp)
         args = [ctx.replace_variables(a) for a in imp.args]
         alias = ctx.replace_variables(imp.alias) if imp.alias else None
-        return self._lib_cache.get_library_keywords(name, args, alias)
+        return name, args, alias
 
     def _convert_to_absolute_path(self, name, import_):
         full_name = os.path.join(os.path.dirname(import_.source), name)
@@ -375,6 +485,8 @@ class DatafileRetriever(object):
     def _res_kw_recursive_getter(self, imp, ctx):
         kws = []
         res = self._resource_factory.get_resource_from_import(imp, ctx)
+        if not res:
+            ctx.unresolved_imports = True
         if not res or res in ctx.parsed:
             return kws
         ctx.parsed.add(res)
@@ -382,11 +494,19 @@ class DatafileRetriever(object):
         for child in self._collect_import_of_type(res, Resource):
             kws.extend(self._res_kw_recursive_getter(child, ctx))
         kws.extend(self._get_imported_library_keywords(res, ctx))
-        return [ResourceUserKeywordInfo(kw) for kw in res.keywords] + kws
+        return [ResourceUserKeywordInfo.for_keyword(kw) for kw in res.keywords] + kws
 
     def get_variables_from(self, datafile, ctx=None):
         return self._get_vars_recursive(datafile, ctx or RetrieverContext()).vars
 
+    def get_variables_cached(self, datafile):
+        variables = self.variable_cache.get(datafile.source)
+        if variables is None:
+            ctx = RetrieverContext()
+            variables = self.get_variables_from(datafile, ctx)
+            self._put_to_cache(self.variable_cache, datafile, variables, ctx)
+        return variables
+
     def _get_vars_recursive(self, datafile, ctx):
         ctx.set_variables_from_datafile_variable_table(datafile)
         self._collect_vars_from_variable_files(datafile, ctx)
@@ -400,12 +520,14 @@ class DatafileRetriever(object):
     def _import_vars(self, ctx, datafile, imp):
         varfile_path = os.path.join(datafile.directory,
             ctx.replace_variables(imp.name))
+        ctx.variable_files.add(os.path.abspath(varfile_path))
         args = [ctx.replace_variables(a) for a in imp.args]
         try:
-            ctx.vars.set_from_file(varfile_path, args)
-            return True
+            variables = self._varfile_cache.get_variables(varfile_path, args)
         except DataError:
             return False # TODO: log somewhere
+        ctx.vars.set_from_variable_file(varfile_path, variables)
+        return True
 
     def _var_collector(self, res, ctx, items):
         self._get_vars_recursive(res, ctx)
@@ -413,10 +535,11 @@ class DatafileRetriever(object):
     def get_keywords_cached(self, datafile, context_factory):
         values = self.keyword_cache.get(datafile.source)
         if not values:
-            words = self.get_keywords_from(datafile, context_factory.ctx_for_datafile(datafile))
+            ctx = context_factory.ctx_for_datafile(datafile)
+            words = self.get_keywords_from(datafile, ctx)
             words.extend(self.default_kws)
             values = _Keywords(words)
-            self.keyword_cache.put(datafile.source, values)
+            self._put_to_cache(self.keyword_cache, datafile, values, ctx)
         return values
 
     def _get_user_keywords_from(self, datafile):
@@ -435,7 +558,9 @@ class DatafileRetriever(object):
         ctx.set_variables_from_datafile_variable_table(datafile)
         for imp in self._collect_import_of_type(datafile, Resource):
             res = self._resource_factory.get_resource_from_import(imp, ctx)
-            if res and res not in ctx.parsed:
+            if not res:
+                ctx.unresolved_imports = True
+            elif res not in ctx.parsed:
                 ctx.parsed.add(res)
                 collector(res, ctx, items)
         return items
@@ -450,7 +575,9 @@ class DatafileRetriever(object):
         res = self._collect_each_res_import(datafile, ctx, self._add_resource)
         resources.update(res)
         for child in datafile.children:
-            resources.update(self.get_resources_from(child))
+            # Lazily loaded test case files are skipped until they are parsed
+            if getattr(child, 'loaded', True):
+                resources.update(self.get_resources_from(child))
         return resources
 
     def _add_resource(self, res, ctx, items):
@@ -458,13 +585,20 @@ class DatafileRetriever(object):
         items.update(self._get_resources_recursive(res, ctx))
 
 
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
 class _Keywords(object):
 
     regexp = re.compile("\s*(given|when|then|and)\s*(.*)", re.IGNORECASE)
 
     def __init__(self, keywords):
         self.keywords = NormalizedDict(ignore=['_'])
-        self.embedded_keywords = {}
+        self.embedded_keywords = _EmbeddedKeywords()
         self._add_keywords(keywords)
 
     def _add_keywords(self, keywords):
@@ -484,7 +618,7 @@ class _Keywords(object):
             return
         try:
             handler = EmbeddedArgsHandler(kw)
-            self.embedded_keywords[handler.name_regexp] = kw
+            self.embedded_keywords.add(handler.name_regexp, kw)
         except Exception:
             pass
 
@@ -494,12 +628,72 @@ class _Keywords(object):
         bdd_name = self._get_bdd_name(kw_name)
         if bdd_name and bdd_name in self.keywords:
             return self.keywords[bdd_name]
-        for regexp in self.embedded_keywords:
-            if regexp.match(kw_name) or (bdd_name and regexp.match(bdd_name)):
-                return self.embedded_keywords[regexp]
-        return None
+        return self.embedded_keywords.get(kw_name, bdd_name)
 
     def _get_bdd_name(self, kw_name):
         match = self.regexp.match(kw_name)
         return match.group(2) if match else None
 
+
+class _EmbeddedKeywords(object):
+    """Keywords with embedded arguments indexed by the text before arguments.
+
+    A name can match only keywords whose literal text before the first
+    embedded argument is a prefix of the name, so only those regexps are
+    tried. Results, including names matching no keyword, are cached.
+    """
+    _max_cached_names = 10000
+
+    def __init__(self):
+        self._by_prefix = {}
+        self._prefix_lengths = set()
+        self._unindexed = []
+        self._count = 0
+        self._cache = {}
+
+    def __len__(self):
+        return self._count
+
+    def add(self, regexp, kw):
+        prefix = self._literal_prefix(kw.name)
+        entry = (self._count, regexp, kw)
+        self._count += 1
+        self._cache.clear()
+        if prefix:
+            self._by_prefix.setdefault(prefix, []).append(entry)
+            self._prefix_lengths.add(len(prefix))
+        else:
+            self._unindexed.append(entry)
+
+    def _literal_prefix(self, name):
+        prefix = name[:VariableSplitter(name, identifiers=['$']).start]
+        try:
+            # Only ASCII text is guaranteed to match case-insensitively
+            # exactly when its lower case versions are equal.
+            prefix.encode('ASCII')
+        except UnicodeError:
+            return ''
+        return prefix.lower()
+
+    def get(self, name, bdd_name=None):
+        key = (name, bdd_name)
+        if key not in self._cache:
+            if len(self._cache) >= self._max_cached_names:
+                self._cache.clear()
+            self._cache[key] = self._find(name) or \
+                (bdd_name and self._find(bdd_name)) or None
+        return self._cache[key]
+
+    def _find(self, name):
+        for _, regexp, kw in self._candidates(name):
+            if regexp.match(name):
+                return kw
+        return None
+
+    def _candidates(self, name):
+        lowered = name.lower()
+        candidates = list(self._unindexed)
+        for length in self._prefix_lengths:
+            if length <= len(lowered):
+                candidates.extend(self._by_prefix.get(lowered[:length], []))
+        return sorted(candidates)
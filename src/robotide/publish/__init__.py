@@ -83,6 +83,14 @@ to the unsubscribe method that were used for subscribing. Additionally both
 the `PUBLISHER` object and the `Plugin` class provide a method for unsubscribing
 all listeners registered by someone.
 
+Background listeners
+~~~~~~~~~~~~~~~~~~~~
+
+Listeners are normally called in the thread publishing the message, which
+is the GUI thread for almost all messages. Listeners that do not touch the
+user interface can be subscribed with ``background=True`` to get them
+called in a separate thread instead.
+
 
 Publishing messages
 -------------------
@@ -92,6 +100,22 @@ classes in the `publish.messages` module directly. Sending a message is as easy
 as creating an instance of the class and calling its ``publish`` method. What
 parameters are need when the instance is created depends on the message.
 
+Transactions
+~~~~~~~~~~~~
+
+Operations changing many items at once can publish their messages inside
+a ``PUBLISHER.transaction()`` block. The messages are delivered when the
+block ends and identical messages, for example `RideItemStepsChanged` for
+the same item, are delivered only once::
+
+    with PUBLISHER.transaction():
+        for step in steps:
+            step.change()
+            RideItemStepsChanged(item=macro).publish()
+
+The number of messages published, coalesced and delivered for each topic
+is available from ``PUBLISHER.statistics``.
+
 Custom messages
 ~~~~~~~~~~~~~~~
 
@@ -116,10 +140,8 @@ the class ``FancyImportantMessage`` or its automatically generated title
 the `robotide.pluginapi` module and plugins should import them there.
 """
 
+from __future__ import with_statement
 
-from robotide.context import WX_VERSION
-if WX_VERSION > '2.9':
-    from wx.lib.pubsub import setupv1
 from messages import *
 from publisher import Publisher
 
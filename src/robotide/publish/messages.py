@@ -12,7 +12,6 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from wx.lib.pubsub import Publisher as WxPublisher
 import inspect
 import messagetype
 import sys
@@ -68,7 +67,8 @@ class RideMessage(object):
                                            exception=err, level='ERROR'))
 
     def _publish(self, msg):
-        WxPublisher().sendMessage(msg.topic, msg)
+        from robotide.publish import PUBLISHER
+        PUBLISHER.publish(msg.topic, msg)
 
 
 class RideLog(RideMessage):
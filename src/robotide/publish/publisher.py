@@ -12,7 +12,11 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from wx.lib.pubsub import Publisher as WxPublisher
+import threading
+from contextlib import contextmanager
+from Queue import Queue
+
+import wx
 
 from messages import RideLogException
 
@@ -21,11 +25,101 @@ class Publisher(object):
 
     def __init__(self):
         self._listeners = {}
+        self._topics = {}
+        self._topic_levels = {}
+        self._statistics = {}
+        self._local = threading.local()
+        self._background = None
 
     def publish(self, topic, data):
-        WxPublisher().sendMessage(topic, data)
+        """Sends ``data`` to all listeners of ``topic`` and its parent topics.
+
+        Inside a `transaction` the message is delivered only when the
+        outermost transaction of the publishing thread ends.
+        """
+        topic = topic.lower()
+        self._statistics_for(topic).published += 1
+        transaction = self._transaction
+        if transaction.depth:
+            self._queue(transaction, topic, data)
+        else:
+            self._deliver(topic, data)
+
+    @property
+    def _transaction(self):
+        # Transactions are per thread so that messages published by other
+        # threads are neither delayed nor delivered in the wrong thread.
+        if not hasattr(self._local, 'transaction'):
+            self._local.transaction = _Transaction()
+        return self._local.transaction
+
+    def _queue(self, transaction, topic, data):
+        key = self._coalescing_key(topic, data)
+        if key in transaction.keys:
+            self._statistics_for(topic).coalesced += 1
+            return
+        transaction.keys.add(key)
+        transaction.pending.append((topic, data))
+
+    def _coalescing_key(self, topic, data):
+        if hasattr(data, 'data') and hasattr(data, 'topic'):
+            return (topic, type(data)) + \
+                tuple(id(getattr(data, name)) for name in data.data)
+        return topic, id(data)
 
-    def subscribe(self, listener, topic, key=None):
+    def _deliver(self, topic, data):
+        for wrapper in self._listeners_for(topic):
+            self._statistics_for(topic).delivered += 1
+            wrapper(data)
+
+    def _listeners_for(self, topic):
+        if topic not in self._topic_levels:
+            parts = topic.split('.')
+            self._topic_levels[topic] = ['.'.join(parts[:index]) for index
+                                         in range(len(parts), 0, -1)]
+        return [wrapper for level in self._topic_levels[topic]
+                for wrapper in self._topics.get(level, [])]
+
+    def _statistics_for(self, topic):
+        if topic not in self._statistics:
+            self._statistics[topic] = TopicStatistics(topic)
+        return self._statistics[topic]
+
+    @contextmanager
+    def transaction(self):
+        """Delays and coalesces messages published inside a `with` block.
+
+        Messages are delivered in the order they were first published when
+        the outermost transaction ends. Messages with the same topic and
+        identical attribute values are delivered only once, so for example
+        publishing `RideItemStepsChanged` for the same item many times inside
+        a transaction notifies listeners only once.
+
+        Transactions affect only messages published by the thread that
+        started them.
+        """
+        transaction = self._transaction
+        transaction.depth += 1
+        try:
+            yield
+        finally:
+            transaction.depth -= 1
+            if not transaction.depth:
+                self._flush(transaction)
+
+    def _flush(self, transaction):
+        for topic, data in transaction.reset():
+            self._deliver(topic, data)
+
+    @property
+    def statistics(self):
+        """Dictionary from topics to their `TopicStatistics`."""
+        return dict(self._statistics)
+
+    def reset_statistics(self):
+        self._statistics = {}
+
+    def subscribe(self, listener, topic, key=None, background=False):
         """Start to listen to messages with the specified ``topic``.
 
         The ``topic`` can be either a message class or a dot separated topic
@@ -36,9 +130,29 @@ class Publisher(object):
         The ``key`` is used for keeping a reference of the listener so that
         all listeners with the same key can be unsubscribed at once using
         ``unsubscribe_all``.
+
+        If ``background`` is true, the ``listener`` is called in a separate
+        thread instead of the thread publishing the message. Such listeners
+        must not access the user interface.
         """
-        wrapper = _ListenerWrapper(listener, topic)
+        if background:
+            wrapper = _BackgroundListenerWrapper(listener, topic,
+                                                 self._background_dispatcher)
+        else:
+            wrapper = _ListenerWrapper(listener, topic)
         self._listeners.setdefault(key, []).append(wrapper)
+        self._topics.setdefault(wrapper.topic, []).append(wrapper)
+
+    @property
+    def _background_dispatcher(self):
+        if not self._background:
+            self._background = _BackgroundDispatcher()
+        return self._background
+
+    def wait_for_background_listeners(self):
+        """Waits until background listeners have handled all messages."""
+        if self._background:
+            self._background.wait()
 
     def unsubscribe(self, listener, topic, key=None):
         """Stop listening for messages with the specified ``topic``.
@@ -48,25 +162,66 @@ class Publisher(object):
         """
         for wrapper in self._listeners[key]:
             if wrapper.wraps(listener, topic):
-                wrapper.unsubscribe()
+                self._remove(wrapper)
                 self._listeners[key].remove(wrapper)
                 break
 
     def unsubscribe_all(self, key=None):
         """Unsubscribe all listeners registered with the given ``key``"""
         for wrapper in self._listeners[key]:
-            wrapper.unsubscribe()
+            self._remove(wrapper)
         del self._listeners[key]
 
+    def _remove(self, wrapper):
+        wrappers = self._topics[wrapper.topic]
+        wrappers.remove(wrapper)
+        if not wrappers:
+            del self._topics[wrapper.topic]
+
 
-class _ListenerWrapper:
-    # Must be an old-style class because wxPython's pubsub doesn't handle
-    # new-style classes in 2.8.7.1. Newer versions have that bug fixed.
+class _Transaction(object):
+
+    def __init__(self):
+        self.depth = 0
+        self.pending = []
+        self.keys = set()
+
+    def reset(self):
+        pending = self.pending
+        self.pending = []
+        self.keys = set()
+        return pending
+
+
+class TopicStatistics(object):
+    """Counts of messages published and delivered with a topic.
+
+    :IVariables:
+      published
+        Number of messages published with the topic.
+      coalesced
+        Number of published messages dropped because an identical message
+        was already waiting for the end of a transaction.
+      delivered
+        Number of times a listener has been called with these messages.
+    """
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.published = 0
+        self.coalesced = 0
+        self.delivered = 0
+
+    def __repr__(self):
+        return '%s(published=%d, coalesced=%d, delivered=%d)' % \
+            (self.topic, self.published, self.coalesced, self.delivered)
+
+
+class _ListenerWrapper(object):
 
     def __init__(self, listener, topic):
         self.listener = listener
         self.topic = self._get_topic(topic)
-        WxPublisher().subscribe(self, self.topic)
 
     def _get_topic(self, topic):
         if not isinstance(topic, basestring):
@@ -76,16 +231,56 @@ class _ListenerWrapper:
     def wraps(self, listener, topic):
         return self.listener == listener and self.topic == self._get_topic(topic)
 
-    def unsubscribe(self):
-        WxPublisher().unsubscribe(self, self.topic)
+    def __call__(self, data):
+        try:
+            self.listener(data)
+        except Exception, err:
+            self._report(err, data)
+
+    def _report(self, err, data):
+        # Prevent infinite recursion if RideLogMessage listener is broken,
+        if not isinstance(data, RideLogException):
+            RideLogException(message='Error in listener: %s\n' \
+                                     'While handling %s' % (unicode(err),
+                                                            unicode(data)),
+                             exception=err, level='ERROR').publish()
 
-    def __call__(self, event):
+
+class _BackgroundListenerWrapper(_ListenerWrapper):
+
+    def __init__(self, listener, topic, dispatcher):
+        _ListenerWrapper.__init__(self, listener, topic)
+        self._dispatcher = dispatcher
+
+    def __call__(self, data):
+        self._dispatcher.dispatch(self._call_in_background, data)
+
+    def _call_in_background(self, data):
         try:
-            self.listener(event.data)
+            self.listener(data)
         except Exception, err:
-            # Prevent infinite recursion if RideLogMessage listener is broken,
-            if not isinstance(event.data, RideLogException):
-                RideLogException(message='Error in listener: %s\n' \
-                                         'While handling %s' % (unicode(err),
-                                                                unicode(event.data)),
-                                 exception=err, level='ERROR').publish()
+            # Errors are logged in the GUI thread like all other messages.
+            wx.CallAfter(self._report, err, data)
+
+
+class _BackgroundDispatcher(object):
+
+    def __init__(self):
+        self._queue = Queue()
+        thread = threading.Thread(target=self._run)
+        thread.setDaemon(True)
+        thread.start()
+
+    def dispatch(self, function, *args):
+        self._queue.put((function, args))
+
+    def wait(self):
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            function, args = self._queue.get()
+            try:
+                function(*args)
+            finally:
+                self._queue.task_done()
@@ -0,0 +1,211 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import with_statement
+import os
+import sys
+import pickle
+import subprocess
+from collections import deque
+from Queue import Queue, Empty
+from threading import Thread, Lock, Event
+
+from robot.errors import DataError
+
+import libraryworker
+
+
+class LibraryImportPool(object):
+    """Imports test libraries and variable files in worker subprocesses.
+
+    Importing libraries outside the RIDE process keeps hanging or crashing
+    libraries from blocking or killing RIDE, and keeps RIDE's `sys.path` and
+    `sys.modules` clean. Up to `size` files are imported in parallel and
+    a worker not responding within `timeout` seconds is killed.
+
+    Results of imports started with `start_import` are kept until they are
+    used, but at most `max_unused` of them, so results of imports that are
+    never used do not stay in memory for the whole session.
+    """
+
+    def __init__(self, size=4, timeout=30, max_unused=100):
+        self._size = max(int(size), 1)
+        self._timeout = timeout
+        self._max_unused = max_unused
+        self._idle = Queue()
+        self._worker_count = 0
+        self._pending = {}
+        self._unused = {}
+        self._unused_order = deque()
+        self._lock = Lock()
+
+    def import_library(self, path, args=None):
+        """Returns keyword spec XML of the library or raises `DataError`."""
+        return self._start('library', path, args, used=True).result()
+
+    def import_variables(self, path, args=None):
+        """Returns `(name, value)` pairs from a variable file or raises
+        `DataError`."""
+        return self._start('variables', path, args, used=True).result()
+
+    def start_import(self, path, args=None):
+        """Starts importing the library without waiting for the result.
+
+        The started import is used by the next `import_library` call with
+        the same `path` and `args`.
+        """
+        return self._start('library', path, args)
+
+    def _start(self, type, path, args, used=False):
+        key = (type, path, repr(args))
+        with self._lock:
+            if key in self._unused:
+                if used:
+                    return self._unused.pop(key)
+                return self._unused[key]
+            if key not in self._pending:
+                self._pending[key] = _PendingImport(self, key, type, path,
+                                                    args)
+                self._pending[key].start()
+            pending = self._pending[key]
+            pending.used = pending.used or used
+            return pending
+
+    def _finished(self, pending):
+        with self._lock:
+            if self._pending.get(pending.key) is pending:
+                del self._pending[pending.key]
+            if pending.used:
+                return
+            self._unused[pending.key] = pending
+            self._unused_order.append(pending.key)
+            while len(self._unused_order) > self._max_unused:
+                key = self._unused_order.popleft()
+                if key not in self._unused_order:
+                    self._unused.pop(key, None)
+
+    def _import(self, type, path, args):
+        worker = self._get_worker()
+        try:
+            return worker.request(type, path, args, self._timeout)
+        finally:
+            self._release_worker(worker)
+
+    def _get_worker(self):
+        with self._lock:
+            if self._idle.empty() and self._worker_count < self._size:
+                self._worker_count += 1
+                return _Worker()
+        return self._idle.get()
+
+    def _release_worker(self, worker):
+        self._idle.put(worker if worker.is_alive() else _Worker())
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
+
+
+class _PendingImport(object):
+
+    def __init__(self, pool, key, type, path, args):
+        self.key = key
+        self.used = False
+        self._pool = pool
+        self._done = Event()
+        self._result = self._error = None
+        self._thread = Thread(target=self._run, args=(type, path, args))
+        self._thread.setDaemon(True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self, type, path, args):
+        try:
+            self._result = self._pool._import(type, path, args)
+        except DataError, err:
+            self._error = err
+        except Exception, err:
+            self._error = DataError(unicode(err))
+        self._pool._finished(self)
+        self._done.set()
+
+    def result(self):
+        self._done.wait()
+        if self._error:
+            raise self._error
+        return self._result
+
+
+class _Worker(object):
+
+    def __init__(self):
+        self._process = subprocess.Popen(
+            [sys.executable, self._worker_script()], stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE, env=self._environment(), cwd=os.getcwd())
+        self._responses = Queue()
+        reader = Thread(target=self._read_responses)
+        reader.setDaemon(True)
+        reader.start()
+
+    def _worker_script(self):
+        return os.path.splitext(libraryworker.__file__)[0] + '.py'
+
+    def _environment(self):
+        env = os.environ.copy()
+        env['PYTHONPATH'] = os.pathsep.join(p for p in sys.path if p)
+        return env
+
+    def _read_responses(self):
+        while True:
+            try:
+                self._responses.put(pickle.load(self._process.stdout))
+            except Exception:
+                self._responses.put(('error', 'Library import worker died.'))
+                return
+
+    def is_alive(self):
+        return self._process.poll() is None
+
+    def request(self, type, path, args, timeout):
+        if not self.is_alive():
+            raise DataError('Library import worker is not running.')
+        try:
+            pickle.dump((type, path, list(args or []),
+                         [p for p in sys.path if p]),
+                        self._process.stdin, pickle.HIGHEST_PROTOCOL)
+            self._process.stdin.flush()
+            status, result = self._responses.get(timeout=timeout)
+        except Empty:
+            self.close()
+            raise DataError('Importing %s timed out after %s seconds.'
+                            % (type, timeout))
+        except (IOError, pickle.PicklingError), err:
+            self.close()
+            raise DataError('Sending %s import to worker failed: %s'
+                            % (type, err))
+        if status != 'ok':
+            raise DataError(result)
+        return result
+
+    def close(self):
+        if self.is_alive():
+            try:
+                self._process.kill()
+            except OSError:
+                pass
+        self._process.wait()
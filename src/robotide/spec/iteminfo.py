@@ -13,13 +13,31 @@
 #  limitations under the License.
 
 import os
+from weakref import WeakKeyDictionary
 
 from robot.utils.normalizing import normalize
 from robotide.utils import html_format, unescape
 
 
+def _intern(string):
+    """Returns a shared copy of `string` to avoid storing equal strings.
+
+    Built-in `intern` accepts only byte strings, so only ASCII strings are
+    shared. Interned strings are released when they are no longer used.
+    """
+    if isinstance(string, unicode):
+        try:
+            string = string.encode('ASCII')
+        except UnicodeError:
+            return string
+    if isinstance(string, str):
+        return intern(string)
+    return string
+
+
 class ItemInfo(object):
     """Represents an object that can be displayed by content assistant."""
+    __slots__ = ['name', 'source', 'details', '_priority']
 
     def __init__(self, name, source, details):
         """Creates an item info.
@@ -70,6 +88,7 @@ class ItemInfo(object):
 
 
 class VariableInfo(ItemInfo):
+    __slots__ = ['_original_source', '_value']
 
     def __init__(self, name, value, source):
         ItemInfo.__init__(self, name, self._source_name(source), None)
@@ -94,6 +113,7 @@ class VariableInfo(ItemInfo):
 
 
 class ArgumentInfo(VariableInfo):
+    __slots__ = []
 
     SOURCE = 'Argument'
 
@@ -101,6 +121,7 @@ class ArgumentInfo(VariableInfo):
         VariableInfo.__init__(self, name, value, self.SOURCE)
 
 class LocalVariableInfo(VariableInfo):
+    __slots__ = []
 
     SOURCE = 'Local variable'
 
@@ -108,13 +129,27 @@ class LocalVariableInfo(VariableInfo):
         VariableInfo.__init__(self, name, '', self.SOURCE)
 
 class _KeywordInfo(ItemInfo):
+    """Keyword info computing its documentation only when needed.
+
+    Keyword infos are created for every keyword of every imported library
+    and resource, but documentation is needed only for the few keywords
+    shown in content assist, keyword search and tooltips.
+    """
+    __slots__ = ['item']
 
     def __init__(self, item):
-        self.doc = self._doc(item).strip()
+        self.item = item
         ItemInfo.__init__(self, self._name(item), self._source(item),
                           None)
-        self.shortdoc = self.doc.splitlines()[0] if self.doc else ''
-        self.item = item
+
+    @property
+    def doc(self):
+        return self._doc(self.item).strip()
+
+    @property
+    def shortdoc(self):
+        doc = self.doc
+        return doc.splitlines()[0] if doc else ''
 
     @property
     def arguments(self):
@@ -146,13 +181,31 @@ class _KeywordInfo(ItemInfo):
         return item.name
 
 
-class _XMLKeywordContent(_KeywordInfo):
+class _CachedDoc(object):
+    __slots__ = []
+
+    @property
+    def doc(self):
+        if self._stripped_doc is None:
+            self._stripped_doc = self._doc(self.item).strip()
+        return self._stripped_doc
+
+
+class _XMLKeywordContent(_CachedDoc, _KeywordInfo):
+    __slots__ = ['_type', '_source_name', '_stripped_doc']
 
     def __init__(self, item, source, source_type):
         self._type = source_type
-        self._source = lambda x: source
+        self._source_name = source
+        self._stripped_doc = None
         _KeywordInfo.__init__(self, item)
-        self.args = self._format_args(self._parse_args(item))
+
+    @property
+    def args(self):
+        return self._format_args(self._parse_args(self.item))
+
+    def _source(self, item):
+        return self._source_name
 
     def _name(self, node):
         return node.get('name')
@@ -168,9 +221,14 @@ class _XMLKeywordContent(_KeywordInfo):
         return True
 
 
-class LibraryKeywordInfo(_KeywordInfo):
+class LibraryKeywordInfo(_CachedDoc, _KeywordInfo):
+    __slots__ = ['_library_alias', '_stripped_doc']
     _type = 'test library'
-    _library_alias = None
+
+    def __init__(self, item):
+        self._library_alias = None
+        self._stripped_doc = None
+        _KeywordInfo.__init__(self, item)
 
     def with_alias(self, alias):
         self._library_alias = alias
@@ -202,8 +260,68 @@ class LibraryKeywordInfo(_KeywordInfo):
         return True
 
 
+class _StoredKeyword(object):
+    __slots__ = ['name', 'doc', 'arguments', 'library_name']
+
+    def __init__(self, name, doc, arguments, library_name):
+        self.name = name
+        self.doc = doc
+        self.arguments = tuple(_intern(arg) for arg in arguments)
+        self.library_name = _intern(library_name)
+
+
+class StoredLibraryKeywordInfo(LibraryKeywordInfo):
+    """Library keyword created from serialized keyword data.
+
+    Used for keywords read from the spec store or from library import
+    workers, so that the library does not need to be imported into RIDE.
+    """
+    __slots__ = []
+
+    def __init__(self, name, doc, arguments, source):
+        LibraryKeywordInfo.__init__(self,
+                                    _StoredKeyword(name, doc, arguments, source))
+
+    def _source(self, item):
+        if self._library_alias:
+            return self._library_alias
+        return item.library_name
+
+    def _parse_args(self, item):
+        return list(item.arguments)
+
 
 class _UserKeywordInfo(_KeywordInfo):
+    __slots__ = ['_raw_doc', '_stripped_doc']
+    _instances = None
+
+    def __init__(self, item):
+        self._raw_doc = self._stripped_doc = None
+        _KeywordInfo.__init__(self, item)
+
+    @property
+    def doc(self):
+        # User keyword documentation can be edited, so the cached value is
+        # used only as long as the raw documentation stays the same.
+        raw = self.item.doc.value
+        if self._stripped_doc is None or raw != self._raw_doc:
+            self._raw_doc = raw
+            self._stripped_doc = self._doc(self.item).strip()
+        return self._stripped_doc
+
+    @classmethod
+    def for_keyword(cls, uk):
+        """Returns info for user keyword `uk` shared by all namespaces.
+
+        A new info is created if the name or source of `uk` has changed.
+        """
+        if cls._instances is None:
+            cls._instances = WeakKeyDictionary()
+        info = cls._instances.get(uk)
+        if info is None or info.name != uk.name or \
+                info.source != info._source(uk):
+            info = cls._instances[uk] = cls(uk)
+        return info
 
     def _source(self, item):
         return unicode(os.path.basename(item.source)) if item.source else ''
@@ -241,6 +359,7 @@ class _UserKeywordInfo(_KeywordInfo):
 
 
 class TestCaseUserKeywordInfo(_UserKeywordInfo):
+    __slots__ = []
     _type = 'test case file'
 
     @property
@@ -249,6 +368,7 @@ class TestCaseUserKeywordInfo(_UserKeywordInfo):
 
 
 class ResourceUserKeywordInfo(_UserKeywordInfo):
+    __slots__ = []
     _type = 'resource file'
 
     @property
@@ -258,6 +378,7 @@ class ResourceUserKeywordInfo(_UserKeywordInfo):
 
 PRIORITIES = {ItemInfo: 50,
               LibraryKeywordInfo: 40,
+              StoredLibraryKeywordInfo: 40,
               ResourceUserKeywordInfo: 30,
               TestCaseUserKeywordInfo: 20,
               VariableInfo: 10,
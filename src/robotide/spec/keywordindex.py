@@ -0,0 +1,237 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import re
+import heapq
+from bisect import bisect_right
+
+from robot.utils import normalize
+
+
+EXACT, PREFIX, WORD_PREFIX, NAME_CONTAINS, DOC_CONTAINS, FUZZY = range(6)
+
+
+class KeywordSearchIndex(object):
+    """Index for searching keywords by name and documentation.
+
+    Keyword names are indexed by their normalized trigrams and characters,
+    and the normalized documentations of each source are kept in a single
+    string that is searched at once. The index is updated per datafile and
+    per source, so changing one file does not reindex keywords from other
+    sources.
+    """
+    _min_fuzzy_length = 3
+
+    def __init__(self):
+        self._sources = {}
+        self._datafiles = {}
+        self._users = {}
+        self._grams = {}
+        self._chars = {}
+
+    @property
+    def sources(self):
+        return sorted(self._sources)
+
+    @property
+    def datafiles(self):
+        return list(self._datafiles)
+
+    def update(self, keywords, datafile=None):
+        """Sets `keywords` to be the keywords available in `datafile`."""
+        self.update_datafiles([(datafile, keywords)])
+
+    def update_datafiles(self, keywords_by_datafile):
+        """Sets the keywords available in datafiles.
+
+        `keywords_by_datafile` contains `(datafile, keywords)` pairs. Only
+        sources whose keywords have changed are reindexed, and sources not
+        available in any datafile anymore are removed.
+        """
+        updated = set()
+        for datafile, keywords in keywords_by_datafile:
+            by_source = {}
+            for kw in keywords:
+                by_source.setdefault(kw.source, []).append(kw)
+            self._release(datafile, set(self._datafiles.get(datafile, ())) -
+                                    set(by_source))
+            self._datafiles[datafile] = set(by_source)
+            for source, kws in by_source.items():
+                self._users.setdefault(source, set()).add(datafile)
+                if source not in updated:
+                    updated.add(source)
+                    self._update_source(source, kws)
+
+    def _update_source(self, name, keywords):
+        indexed = self._sources.get(name)
+        if indexed is None or not indexed.contains(keywords):
+            self._remove(name)
+            self._add(_IndexedSource(keywords))
+
+    def remove_datafile(self, datafile):
+        self._release(datafile, self._datafiles.pop(datafile, ()))
+
+    def _release(self, datafile, sources):
+        for source in sources:
+            users = self._users[source]
+            users.discard(datafile)
+            if not users:
+                del self._users[source]
+                self._remove(source)
+
+    def _add(self, source):
+        self._sources[source.name] = source
+        for entry in source.entries:
+            for gram in _grams(entry.name):
+                self._grams.setdefault(gram, set()).add(entry)
+            for char in set(entry.name):
+                self._chars.setdefault(char, set()).add(entry)
+
+    def _remove(self, name):
+        source = self._sources.pop(name, None)
+        if source is None:
+            return
+        for entry in source.entries:
+            for gram in _grams(entry.name):
+                self._discard(self._grams, gram, entry)
+            for char in set(entry.name):
+                self._discard(self._chars, char, entry)
+
+    def _discard(self, postings, key, entry):
+        entries = postings[key]
+        entries.discard(entry)
+        if not entries:
+            del postings[key]
+
+    def search(self, pattern, search_docs=True, accept=None, limit=None):
+        """Returns keywords matching `pattern` ordered by relevance.
+
+        Keywords whose name equals the pattern come first, followed by names
+        starting with it, names having a word starting with it, names
+        containing it and documentations containing it. Names containing the
+        characters of the pattern in order are returned last. Matches are
+        ordered by name within each group. `accept` can be used to filter
+        keywords and `limit` to return only the best matches.
+        """
+        pattern = normalize(pattern)
+        matches = {}
+        for entry in self._name_candidates(pattern):
+            rank = entry.rank(pattern)
+            if rank is not None:
+                matches[entry] = rank
+        if search_docs:
+            for source in self._sources.values():
+                for entry in source.doc_matches(pattern):
+                    matches.setdefault(entry, DOC_CONTAINS)
+        if accept:
+            matches = dict((e, r) for e, r in matches.items() if accept(e.keyword))
+        if len(pattern) >= self._min_fuzzy_length and \
+                (limit is None or len(matches) < limit):
+            self._add_fuzzy_matches(pattern, matches, accept)
+        ranked = ((rank, entry.sort_key, entry) for entry, rank in matches.items())
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, ranked)
+        else:
+            ranked = sorted(ranked)
+        return [entry.keyword for _, _, entry in ranked]
+
+    def _name_candidates(self, pattern):
+        if not pattern:
+            return self._all_entries()
+        grams = [self._grams.get(gram, set()) for gram in _grams(pattern)]
+        if not grams:
+            return self._chars.get(pattern[0], set())
+        grams.sort(key=len)
+        return grams[0].intersection(*grams[1:])
+
+    def _all_entries(self):
+        for source in self._sources.values():
+            for entry in source.entries:
+                yield entry
+
+    def _add_fuzzy_matches(self, pattern, matches, accept):
+        chars = sorted((self._chars.get(char, set()) for char in set(pattern)),
+                       key=len)
+        matcher = re.compile('.*?'.join(re.escape(char) for char in pattern))
+        for entry in chars[0].intersection(*chars[1:]):
+            if entry not in matches and matcher.search(entry.name) and \
+                    (not accept or accept(entry.keyword)):
+                matches[entry] = FUZZY
+
+
+def _grams(string):
+    return set(string[i:i+3] for i in range(len(string) - 2))
+
+
+def _signature(keyword):
+    # Keyword infos are recreated when keywords are listed, but the keywords
+    # they describe are not. Indexed keywords are referenced by the index, so
+    # their ids cannot be reused by other objects. Only user keywords can
+    # have their documentation edited in place, and reading the lazily
+    # stripped documentation of every library keyword would be slow.
+    doc = keyword.doc if keyword.is_user_keyword() else None
+    return id(getattr(keyword, 'item', keyword)), keyword.name, doc
+
+
+class _IndexedSource(object):
+
+    def __init__(self, keywords):
+        self.name = keywords[0].source
+        self.entries = [_IndexedKeyword(kw) for kw in keywords]
+        self._signatures = set(_signature(kw) for kw in keywords)
+        # Normalized strings contain no whitespace, so newlines can separate
+        # the documentations and matches never span multiple keywords.
+        self._docs = '\n'.join(entry.doc for entry in self.entries)
+        self._offsets = []
+        offset = 0
+        for entry in self.entries:
+            self._offsets.append(offset)
+            offset += len(entry.doc) + 1
+
+    def contains(self, keywords):
+        return len(keywords) == len(self.entries) and \
+            all(_signature(kw) in self._signatures for kw in keywords)
+
+    def doc_matches(self, pattern):
+        if not pattern:
+            return
+        index = self._docs.find(pattern)
+        while index != -1:
+            position = bisect_right(self._offsets, index) - 1
+            yield self.entries[position]
+            index = self._docs.find(pattern, self._offsets[position] +
+                                    len(self.entries[position].doc) + 1)
+
+
+class _IndexedKeyword(object):
+
+    def __init__(self, keyword):
+        self.keyword = keyword
+        self.name = normalize(keyword.name)
+        self.doc = normalize(keyword.doc)
+        words = keyword.name.split()
+        self._word_suffixes = [normalize(''.join(words[i:]))
+                               for i in range(1, len(words))]
+        self.sort_key = (keyword.name.upper(), keyword.source)
+
+    def rank(self, pattern):
+        if self.name == pattern:
+            return EXACT
+        if self.name.startswith(pattern):
+            return PREFIX
+        if any(suffix.startswith(pattern) for suffix in self._word_suffixes):
+            return WORD_PREFIX
+        if pattern in self.name:
+            return NAME_CONTAINS
+        return None
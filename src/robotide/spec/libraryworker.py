@@ -0,0 +1,123 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Worker process importing test libraries for `LibraryImportPool`.
+
+Reads pickled `(type, path, args, pythonpath)` requests from stdin, where
+`pythonpath` is RIDE's current `sys.path`, and writes pickled
+`('ok', result)` or `('error', message)` responses to stdout. With type
+`'library'` the result is a libdoc style keyword spec XML and with type
+`'variables'` it is a list of `(name, value)` pairs read from a variable
+file. Must not import `robotide`, because that would require wxPython in
+the worker.
+"""
+
+import os
+import sys
+import pickle
+from StringIO import StringIO
+
+from robot.running import TestLibrary
+from robot.utils import XmlWriter, get_error_message, unic
+from robot.variables import Variables
+
+
+def library_spec(path, args):
+    lib = TestLibrary(path, args)
+    output = StringIO()
+    writer = XmlWriter(output, encoding='UTF-8')
+    writer.start('keywordspec', {'name': lib.name, 'type': 'library'})
+    writer.element('doc', lib.doc)
+    writer.start('keywords')
+    for handler in lib.handlers.values():
+        writer.start('kw', {'name': handler.name})
+        writer.start('arguments')
+        for arg in _arguments(handler.arguments):
+            writer.element('arg', arg)
+        writer.end('arguments')
+        writer.element('doc', handler.doc)
+        writer.end('kw')
+    writer.end('keywords')
+    writer.end('keywordspec')
+    return output.getvalue()
+
+
+def _arguments(handler_args):
+    # Same format as in `robotide.spec.iteminfo.LibraryKeywordInfo`
+    args = list(handler_args.names)
+    for i, value in enumerate(handler_args.defaults):
+        index = len(handler_args.names) - len(handler_args.defaults) + i
+        args[index] = args[index] + '=' + unicode(value)
+    if handler_args.varargs:
+        args.append('*%s' % handler_args.varargs)
+    return args
+
+
+def variable_file(path, args):
+    # Imported modules are cached by name, but a variable file that has
+    # changed since it was last evaluated must be imported again.
+    name = os.path.splitext(os.path.basename(path))[0]
+    sys.modules.pop(name, None)
+    variables = Variables()
+    variables.set_from_file(path, args)
+    return [(name, _picklable(value)) for name, value in variables.items()]
+
+
+def _picklable(value):
+    # Values such as modules and functions cannot be sent to RIDE, which
+    # only shows variable values as text anyway.
+    try:
+        pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return value
+    except Exception:
+        return unic(value)
+
+
+_handlers = {'library': library_spec, 'variables': variable_file}
+
+
+def _update_pythonpath(pythonpath):
+    # RIDE's pythonpath setting can change while the worker is running.
+    sys.path[0:0] = [path for path in pythonpath if path not in sys.path]
+
+
+def serve(requests, responses):
+    while True:
+        try:
+            type, path, args, pythonpath = pickle.load(requests)
+        except EOFError:
+            return
+        _update_pythonpath(pythonpath)
+        try:
+            response = ('ok', _handlers[type](path, args))
+        except Exception:
+            response = ('error', get_error_message())
+        pickle.dump(response, responses, pickle.HIGHEST_PROTOCOL)
+        responses.flush()
+
+
+def main():
+    if sys.platform == 'win32':
+        import msvcrt
+        msvcrt.setmode(sys.stdin.fileno(), os.O_BINARY)
+    # Imported files may write to stdout, so responses are written
+    # to a copy of the original stdout and stdout is redirected to stderr.
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    serve(sys.stdin, responses)
+
+
+if __name__ == '__main__':
+    main()
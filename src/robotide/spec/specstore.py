@@ -0,0 +1,229 @@
+#  Copyright 2008-2012 Nokia Siemens Networks Oyj
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from __future__ import with_statement
+import os
+import sys
+import marshal
+import sqlite3
+import hashlib
+from threading import Lock
+
+from robot.version import get_version
+
+from iteminfo import LibraryKeywordInfo, StoredLibraryKeywordInfo
+
+
+class LibrarySpecStore(object):
+    """Persistent store of library keywords shared between RIDE sessions.
+
+    Keywords are stored per library name and arguments (alias included as
+    'WITH NAME' arguments) together with a fingerprint of the library source
+    file. For package libraries, all Python files in the package are part of
+    the fingerprint. Stored keywords are returned only if the sources are
+    unchanged, so the library itself needs to be imported only when it has
+    been modified.
+    """
+    SCHEMA_VERSION = 3
+    _PYTHON_EXTENSIONS = ('.py', '.pyc', '.pyo')
+    _CREATE_STATEMENTS = (
+        'CREATE TABLE meta (version TEXT)',
+        'CREATE TABLE libraries (name TEXT, args TEXT, source TEXT, '
+            'mtime REAL, digest TEXT, keywords BLOB, PRIMARY KEY (name, args))')
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = Lock()
+        self._connection = None
+
+    @property
+    def _version(self):
+        return '%d %s' % (self.SCHEMA_VERSION, get_version())
+
+    def get(self, name, args=None):
+        """Returns stored keywords or None if they are missing or outdated."""
+        source = find_library_source(name)
+        if not source:
+            return None
+        try:
+            row = self._execute('SELECT source, mtime, digest, keywords FROM '
+                                'libraries WHERE name=? AND args=?',
+                                (name, self._args_key(args))).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row or not self._is_up_to_date(source, *row[:3]):
+            return None
+        return [StoredLibraryKeywordInfo(*kw)
+                for kw in marshal.loads(str(row[3]))]
+
+    def _is_up_to_date(self, source, stored_source, mtime, digest):
+        if source != stored_source:
+            return False
+        files = _source_files(source)
+        if _mtime(files) == mtime:
+            return True
+        return _digest(files) == digest
+
+    def put(self, name, args, keywords):
+        """Stores keywords read from a library by importing it.
+
+        Nothing is stored if library source cannot be found or keywords were
+        not read from an imported library, e.g. when they come from a spec
+        file or import failed.
+        """
+        source = find_library_source(name)
+        if not (source and keywords) or \
+                not all(isinstance(kw, LibraryKeywordInfo) for kw in keywords):
+            return
+        # marshal, unlike json, is available also in Python 2.5.
+        serialized = sqlite3.Binary(marshal.dumps(
+            [(kw.name, kw.doc, kw.arguments, kw.source) for kw in keywords]))
+        files = _source_files(source)
+        try:
+            self._execute('INSERT OR REPLACE INTO libraries '
+                          'VALUES (?,?,?,?,?,?)',
+                          (name, self._args_key(args), source,
+                           _mtime(files), _digest(files), serialized))
+        except sqlite3.Error:
+            pass # Storing is only an optimization
+
+    def clear(self):
+        self._execute('DELETE FROM libraries')
+
+    def _args_key(self, args):
+        return repr(tuple(args or ()))
+
+    def _execute(self, statement, params=()):
+        with self._lock:
+            connection = self._get_connection()
+            return _in_transaction(connection, connection.execute,
+                                   statement, params)
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self._path,
+                                               check_same_thread=False)
+            self._verify_version(self._connection)
+        return self._connection
+
+    def _verify_version(self, connection):
+        try:
+            version = connection.execute('SELECT version FROM meta').fetchone()
+        except sqlite3.OperationalError:
+            version = None
+        if version and version[0] == self._version:
+            return
+        _in_transaction(connection, self._create_tables, connection)
+
+    def _create_tables(self, connection):
+        for table in 'meta', 'libraries':
+            connection.execute('DROP TABLE IF EXISTS %s' % table)
+        for statement in self._CREATE_STATEMENTS:
+            connection.execute(statement)
+        connection.execute('INSERT INTO meta VALUES (?)', (self._version,))
+
+
+def _in_transaction(connection, function, *args):
+    # Connections are context managers only in Python 2.6 and newer.
+    try:
+        result = function(*args)
+    except:
+        connection.rollback()
+        raise
+    connection.commit()
+    return result
+
+
+class NullSpecStore(object):
+    """Spec store used when library keywords are not persisted."""
+
+    def get(self, name, args=None):
+        return None
+
+    def put(self, name, args, keywords):
+        pass
+
+    def clear(self):
+        pass
+
+
+def find_library_source(name):
+    """Finds the source file of a Python library without importing it.
+
+    Returns None for libraries whose source cannot be located, for example
+    Java libraries.
+    """
+    if os.path.isabs(name):
+        return _python_source(name.rstrip('/' + os.sep))
+    parts = name.replace(' ', '').split('.')
+    for count in range(len(parts), 0, -1):
+        relative = os.path.join(*parts[:count])
+        for base in sys.path:
+            if base and os.path.isdir(base):
+                source = _python_source(os.path.join(base, relative))
+                if source:
+                    return source
+    return None
+
+
+def _python_source(path):
+    if os.path.isdir(path):
+        path = os.path.join(path, '__init__')
+    root, ext = os.path.splitext(path)
+    if ext.lower() in LibrarySpecStore._PYTHON_EXTENSIONS:
+        path = root
+    for ext in LibrarySpecStore._PYTHON_EXTENSIONS:
+        if os.path.isfile(path + ext):
+            return os.path.normcase(os.path.abspath(path + ext))
+    return None
+
+
+def _source_files(source):
+    """Returns source files affecting the library, directories included.
+
+    Libraries implemented as packages can import any module in the package,
+    so all of them are returned. Compiled files are ignored if the source
+    file exists, because they change whenever the source is compiled.
+    """
+    if os.path.splitext(os.path.basename(source))[0] != '__init__':
+        return [source]
+    files = []
+    for dirpath, dirnames, filenames in os.walk(os.path.dirname(source)):
+        files.append(dirpath)
+        names = set(filenames)
+        for name in sorted(filenames):
+            root, ext = os.path.splitext(name)
+            if ext.lower() not in LibrarySpecStore._PYTHON_EXTENSIONS:
+                continue
+            if ext.lower() != '.py' and root + '.py' in names:
+                continue
+            files.append(os.path.join(dirpath, name))
+        dirnames.sort()
+    return files
+
+
+def _mtime(files):
+    # Removing a file changes the modification time of its directory.
+    return max(os.path.getmtime(path) for path in files)
+
+
+def _digest(files):
+    digest = hashlib.md5()
+    for path in files:
+        digest.update(path.encode('UTF-8') if isinstance(path, unicode)
+                      else path)
+        if os.path.isfile(path):
+            with open(path, 'rb') as source:
+                digest.update(source.read())
+    return digest.hexdigest()
@@ -21,7 +21,8 @@ from robotide.robotapi import TestLibrary as RobotTestLibrary
 from robotide.publish import RideLogException
 from robotide import utils
 
-from iteminfo import LibraryKeywordInfo, _XMLKeywordContent
+from iteminfo import (LibraryKeywordInfo, StoredLibraryKeywordInfo,
+                      _XMLKeywordContent)
 
 
 class Spec(object):
@@ -51,13 +52,11 @@ class LibrarySpec(Spec):
 
     _alias = None
     keywords = tuple()
-    _library_import_by_path_endings = ('.py', '.java', '.class', '/', os.sep)
 
-    def __init__(self, name, args=None):
-        self.name = self._get_library_name(name)
-        if args and len(args) >= 2 and isinstance(args[-2], basestring) and args[-2].upper() == 'WITH NAME':
-            self._alias = args[-1]
-            args = args[:-2]
+    def __init__(self, name, args=None, import_pool=None):
+        self.name = _library_name(name)
+        args, self._alias = _split_alias(args)
+        self._import_pool = import_pool
         try:
             self.keywords, self.doc = self._init_from_library(self.name, args)
         except (ImportError, DataError), err:
@@ -67,34 +66,72 @@ class LibrarySpec(Spec):
                 msg = 'Importing test library "%s" failed' % self.name
                 RideLogException(message=msg, exception=err, level='WARN').publish()
 
+    @classmethod
+    def start_import(cls, name, args, import_pool):
+        """Starts importing the library in `import_pool` in the background.
+
+        `LibrarySpec` created later with the same arguments and pool uses the
+        result of this import instead of starting a new one.
+        """
+        args, _ = _split_alias(args)
+        try:
+            path = _import_path(_library_name(name))
+        except DataError:
+            return
+        import_pool.start_import(path, args)
+
     def _init_from_library(self, name, args):
-        path = self._get_path(name.replace('/', os.sep), os.path.abspath('.'))
+        path = _import_path(name)
+        if self._import_pool:
+            return self._init_from_import_pool(path, args)
         lib = RobotTestLibrary(path, args)
         keywords = [LibraryKeywordInfo(kw).with_alias(self._alias) for kw in lib.handlers.values()]
         return keywords, lib.doc
 
-    def _get_path(self, name, basedir):
-        if not self._is_library_by_path(name):
-            return name.replace(' ', '')
-        return self._resolve_path(name.replace('/', os.sep), basedir)
-
-    def _is_library_by_path(self, path):
-        return path.lower().endswith(self._library_import_by_path_endings)
-
-    def _resolve_path(self, path, basedir):
-        for base in [basedir] + sys.path:
-            if not (base and os.path.isdir(base)):
-                continue
-            ret = os.path.join(base, path)
-            if os.path.isfile(ret):
-                return ret
-            if os.path.isdir(ret) and os.path.isfile(os.path.join(ret, '__init__.py')):
-                return ret
-        raise DataError
-
-    def _get_library_name(self, name):
-        if self._alias:
-            return self._alias
-        if os.path.exists(name):
-            return name
+    def _init_from_import_pool(self, path, args):
+        root = utils.ET.fromstring(self._import_pool.import_library(path, args))
+        keywords = [StoredLibraryKeywordInfo(node.get('name'),
+                                             node.find('doc').text or '',
+                                             [arg.text for arg in node.findall('arguments/arg')],
+                                             root.get('name')).with_alias(self._alias)
+                    for node in root.findall('keywords/kw')]
+        return keywords, root.find('doc').text or ''
+
+
+def _split_alias(args):
+    """Returns `args` without 'WITH NAME' and alias, and the alias."""
+    if args and len(args) >= 2 and isinstance(args[-2], basestring) and args[-2].upper() == 'WITH NAME':
+        return args[:-2], args[-1]
+    return args, None
+
+
+def _library_name(name):
+    if os.path.exists(name):
+        return name
+    return name.replace(' ', '')
+
+
+_LIBRARY_IMPORT_BY_PATH_ENDINGS = ('.py', '.java', '.class', '/', os.sep)
+
+
+def _import_path(name):
+    name = name.replace('/', os.sep)
+    if not _is_library_by_path(name):
         return name.replace(' ', '')
+    return _resolve_path(name, os.path.abspath('.'))
+
+
+def _is_library_by_path(path):
+    return path.lower().endswith(_LIBRARY_IMPORT_BY_PATH_ENDINGS)
+
+
+def _resolve_path(path, basedir):
+    for base in [basedir] + sys.path:
+        if not (base and os.path.isdir(base)):
+            continue
+        ret = os.path.join(base, path)
+        if os.path.isfile(ret):
+            return ret
+        if os.path.isdir(ret) and os.path.isfile(os.path.join(ret, '__init__.py')):
+            return ret
+    raise DataError
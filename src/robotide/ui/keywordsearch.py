@@ -19,15 +19,19 @@ import os.path
 from robotide.controller.filecontrollers import (ResourceFileController,
                                                  TestCaseFileController)
 from robotide.pluginapi import (Plugin, ActionInfo, RideOpenSuite,
-        RideOpenResource, RideImportSetting, RideUserKeyword, RideNewProject)
+        RideOpenResource, RideImportSetting, RideUserKeyword, RideNewProject,
+        RideItemSettingsChanged)
+from robotide.spec.keywordindex import KeywordSearchIndex
+from robotide.ui.progress import LoadProgressObserver
 from robotide.usages.UsageRunner import Usages
-from robotide import utils
 from robotide.widgets import (PopupMenuItem, ButtonWithHandler, Label, Font,
         HtmlWindow)
 
 ALL_KEYWORDS = '<all keywords>'
 ALL_USER_KEYWORDS = '<all user keywords>'
 ALL_LIBRARY_KEYWORDS = '<all library keywords>'
+# Number of best matches shown at once. More are shown on request.
+SEARCH_RESULT_PAGE_SIZE = 500
 
 
 class KeywordSearch(Plugin):
@@ -35,8 +39,9 @@ class KeywordSearch(Plugin):
 
     def __init__(self, app):
         Plugin.__init__(self, app)
-        self.all_keywords = []
+        self._index = KeywordSearchIndex()
         self._criteria = _SearchCriteria()
+        self._changed = set()
         self.dirty = False
 
     def enable(self):
@@ -45,16 +50,36 @@ class KeywordSearch(Plugin):
                             doc='Search keywords from libraries and resources')
         self.register_action(action)
         self.subscribe(self.mark_dirty, RideOpenSuite, RideOpenResource,
-                       RideImportSetting, RideUserKeyword, RideNewProject)
+                       RideNewProject)
+        self.subscribe(self.OnImportsChanged, RideImportSetting)
+        self.subscribe(self.OnKeywordsChanged, RideUserKeyword)
+        self.subscribe(self.OnSettingsChanged, RideItemSettingsChanged)
         self._dialog = KeywordSearchDialog(self.frame, self)
         self.tree.register_context_menu_hook(self._search_resource)
 
     def OnSearch(self, event):
         self._dialog.show_search_with_criteria()
 
+    @property
+    def sources(self):
+        return self._index.sources
+
     def mark_dirty(self, message):
         self.dirty = True
 
+    def OnImportsChanged(self, message):
+        self._mark_changed(message.datafile.datafile)
+
+    def OnKeywordsChanged(self, message):
+        self._mark_changed(message.datafile)
+
+    def OnSettingsChanged(self, message):
+        self._mark_changed(message.item.datafile)
+
+    def _mark_changed(self, datafile):
+        self._changed.add(datafile)
+        self.dirty = True
+
     def have_keywords_changed(self):
         if not self.dirty:
             return False
@@ -62,15 +87,44 @@ class KeywordSearch(Plugin):
         return True
 
     def _update(self):
+        # Lazily loaded test case files may contain keywords and import
+        # resources, so they are loaded before listing keywords.
+        self.model.load_all_datafiles(LoadProgressObserver(self.frame))
+        controllers = dict((ctrl.datafile, ctrl)
+                           for ctrl in self.model.datafiles if ctrl.datafile)
+        for datafile in self._index.datafiles:
+            if datafile not in controllers:
+                self._index.remove_datafile(datafile)
+        indexed = set(self._index.datafiles)
+        changed = [ctrl for df, ctrl in controllers.items()
+                   if df in self._changed or df not in indexed]
+        self._index.update_datafiles(
+            (ctrl.datafile, self.model.get_all_keywords_from([ctrl.datafile]))
+            for ctrl in self._with_importers(changed))
+        self._changed = set()
         self.dirty = False
-        self.all_keywords = self.model.get_all_keywords()
 
-    def search(self, pattern, search_docs, source_filter):
-        self._criteria = _SearchCriteria(pattern, search_docs, source_filter)
-        return self._search()
+    def _with_importers(self, controllers):
+        # Keywords available in a resource file are available also in the
+        # files importing it.
+        result = set()
+        while controllers:
+            ctrl = controllers.pop()
+            if ctrl in result:
+                continue
+            result.add(ctrl)
+            if isinstance(ctrl, ResourceFileController):
+                controllers.extend(imp.datafile_controller
+                                   for imp in ctrl.get_where_used())
+        return result
 
-    def _search(self):
-        return [ kw for kw in self.all_keywords if self._criteria.matches(kw) ]
+    def search(self, pattern, search_docs, source_filter, limit=None):
+        """Returns at most `limit` best matching keywords."""
+        self._criteria = _SearchCriteria(pattern, search_docs, source_filter)
+        return self._index.search(self._criteria.pattern,
+                                  self._criteria.search_docs,
+                                  self._criteria.matches_source_filter,
+                                  limit)
 
     def _search_resource(self, item):
         if isinstance(item, (TestCaseFileController, ResourceFileController)):
@@ -85,18 +139,11 @@ class KeywordSearch(Plugin):
 class _SearchCriteria(object):
 
     def __init__(self, pattern='', search_docs=True, source_filter=ALL_KEYWORDS):
-        self._pattern = pattern
-        self._search_docs = search_docs
+        self.pattern = pattern
+        self.search_docs = search_docs
         self._source_filter = source_filter
 
-    def matches(self, kw):
-        if not self._matches_source_filter(kw):
-            return False
-        if self._contains(kw.name, self._pattern):
-            return True
-        return self._search_docs and self._contains(kw.doc, self._pattern)
-
-    def _matches_source_filter(self, kw):
+    def matches_source_filter(self, kw):
         if self._source_filter == ALL_KEYWORDS:
             return True
         if self._source_filter == ALL_USER_KEYWORDS and kw.is_user_keyword():
@@ -105,9 +152,6 @@ class _SearchCriteria(object):
             return True
         return self._source_filter == kw.source
 
-    def _contains(self, string, pattern):
-        return utils.normalize(pattern) in utils.normalize(string)
-
 
 class KeywordSearchDialog(wx.Frame):
 
@@ -117,6 +161,7 @@ class KeywordSearchDialog(wx.Frame):
         self._create_components()
         self._make_bindings()
         self._sort_order = _SortOrder()
+        self._limit = SEARCH_RESULT_PAGE_SIZE
         self._last_selected_kw = None
         self.SetBackgroundColour(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DFACE))
         self.CenterOnParent()
@@ -159,10 +204,8 @@ class KeywordSearchDialog(wx.Frame):
 
     def _get_sources(self):
         sources = []
-        for kw in self._plugin.all_keywords:
-            if kw.source not in sources:
-                sources.append(kw.source)
-        return [ALL_KEYWORDS, ALL_USER_KEYWORDS, ALL_LIBRARY_KEYWORDS] + sorted(sources)
+        return [ALL_KEYWORDS, ALL_USER_KEYWORDS, ALL_LIBRARY_KEYWORDS] + \
+            self._plugin.sources
 
     def _add_keyword_list(self):
         self._list = _KeywordList(self, self._plugin)
@@ -172,12 +215,20 @@ class KeywordSearchDialog(wx.Frame):
     def _add_keyword_details(self):
         self._details = HtmlWindow(self)
         self._add_to_sizer(self._details)
+        buttons = self._horizontal_sizer()
         self._find_usages_button = ButtonWithHandler(self, 'Find Usages')
-        self.Sizer.Add(self._find_usages_button, 0, wx.ALL, 3)
+        buttons.Add(self._find_usages_button)
+        self._show_more_button = ButtonWithHandler(self, 'Show More')
+        buttons.Add(self._show_more_button, 0, wx.LEFT, 3)
+        self.Sizer.Add(buttons, 0, wx.ALL, 3)
 
     def _add_to_sizer(self, component):
         self.Sizer.Add(component, 1, wx.EXPAND | wx.ALL, 3)
 
+    def OnShowMore(self, event):
+        self._limit += SEARCH_RESULT_PAGE_SIZE
+        self._populate_search()
+
     def OnFindUsages(self, event):
         Usages(self._plugin.model, self._plugin.tree.highlight, self._last_selected_kw.name,  self._last_selected_kw).show()
 
@@ -205,14 +256,14 @@ class KeywordSearchDialog(wx.Frame):
             self._populate_search()
 
     def OnUseDocChange(self, event):
-        self._populate_search()
+        self._populate_new_search()
 
     def OnSearch(self, event):
         self._sort_order.searched(self._get_search_text())
-        self._populate_search()
+        self._populate_new_search()
 
     def OnSourceFilterChange(self, event):
-        self._populate_search()
+        self._populate_new_search()
 
     def OnKey(self, event):
         # Needed for HtmlWindow callback
@@ -234,9 +285,17 @@ class KeywordSearchDialog(wx.Frame):
     def OnClose(self, event):
         self.Hide()
 
+    def _populate_new_search(self):
+        self._limit = SEARCH_RESULT_PAGE_SIZE
+        self._populate_search()
+
     def _populate_search(self):
-        self._keywords = _KeywordData(self._plugin.search(*self._get_search_criteria()),
-                                      self._sort_order, self._get_search_text())
+        # One extra keyword is searched to know whether there are more.
+        pattern, search_docs, source = self._get_search_criteria()
+        keywords = self._plugin.search(pattern, search_docs, source,
+                                       self._limit + 1)
+        self._show_more_button.Enable(len(keywords) > self._limit)
+        self._keywords = _KeywordData(keywords[:self._limit], self._sort_order)
         self._update_keyword_selection()
         self._list.show_keywords(self._keywords, self._last_selected_kw)
         self.Refresh()
@@ -262,7 +321,7 @@ class KeywordSearchDialog(wx.Frame):
 
     def show_search_with_criteria(self, pattern='', search_docs=True, source=ALL_KEYWORDS):
         self._update_widgets(pattern, search_docs, source)
-        self._populate_search()
+        self._populate_new_search()
         self._show()
 
     def _update_widgets(self, pattern, search_docs, source):
@@ -309,27 +368,15 @@ class _SortOrder(object):
 class _KeywordData(list):
     headers = ['Name', 'Source', 'Description']
 
-    def __init__(self, keywords, sort_order, search_criteria=None):
-        self.extend(self._sort(keywords, sort_order, search_criteria))
+    def __init__(self, keywords, sort_order):
+        self.extend(self._sort(keywords, sort_order))
 
-    def _sort(self, keywords, sort_order, search_criteria=None):
+    def _sort(self, keywords, sort_order):
+        # Search results are already ordered by relevance.
         if sort_order.default_order:
-            return self._sort_by_search(keywords, sort_order, search_criteria)
+            return keywords
         return self._sort_by_attr(keywords, sort_order)
 
-    def _sort_by_search(self, keywords, sort_order, search_criteria):
-        search_criteria = search_criteria.lower()
-        starts_with = [kw for kw in keywords if kw.name.lower().startswith(search_criteria)]
-        name_contains = [kw for kw in keywords if (search_criteria in kw.name.lower()
-                                                   and kw not in starts_with)]
-        doc_contains = [kw for kw in keywords if (search_criteria in kw.details.lower()
-                                                  and kw not in starts_with
-                                                  and kw not in name_contains)]
-        result = []
-        for to_sort in (starts_with, name_contains, doc_contains):
-            result.extend(self._sort_by_attr(to_sort, sort_order))
-        return result
-
     def _sort_by_attr(self, keywords, sort_order):
         return sorted(keywords, cmp=self._get_comparator_for(self.headers[sort_order.column].lower()),
                       reverse=not sort_order.sort_up)
@@ -21,15 +21,31 @@ from robotide import context
 class ProgressObserver(object):
 
     def __init__(self, frame, title, message):
-        self._progressbar = wx.ProgressDialog(title, message,
-                                              maximum=100, parent=frame,
-                                              style=wx.PD_ELAPSED_TIME)
+        self._frame = frame
+        self._title = title
+        self._message = message
+        self._dialog = None
 
-    def notify(self):
-        self._progressbar.Pulse()
+    @property
+    def _progressbar(self):
+        # Created only when notified, so that no dialog is shown if there
+        # turns out to be nothing to wait for.
+        if not self._dialog:
+            self._dialog = wx.ProgressDialog(self._title, self._message,
+                                             maximum=100, parent=self._frame,
+                                             style=wx.PD_ELAPSED_TIME)
+        return self._dialog
+
+    def notify(self, message=None):
+        if message:
+            self._progressbar.Pulse(message)
+        else:
+            self._progressbar.Pulse()
 
     def finish(self):
-        self._progressbar.Destroy()
+        if self._dialog:
+            self._dialog.Destroy()
+            self._dialog = None
         context.LOG.report_parsing_errors()
 
     def error(self, msg):
@@ -49,7 +65,7 @@ class RenameProgressObserver(ProgressObserver):
         ProgressObserver.__init__(self, frame, 'RIDE', 'Renaming')
         self._notification_occured = 0
 
-    def notify(self):
+    def notify(self, message=None):
         if time.time() - self._notification_occured > 0.1:
             self._progressbar.Pulse()
             self._notification_occured = time.time()
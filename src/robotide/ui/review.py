@@ -15,13 +15,12 @@
 import os
 import wx
 import wx.lib.mixins.listctrl as listmix
-import time
 import re
 from robotide.context.platform import IS_MAC
+from robotide.ui.progress import LoadProgressObserver
 from robotide.ui.searchdots import DottedSearch
 from robotide.widgets import ButtonWithHandler, Label
-from robotide.spec.iteminfo import LibraryKeywordInfo
-from robotide.usages.commands import FindUsages
+from robotide.usages.commands import FindUnusedKeywords
 from robotide.controller.filecontrollers import DirectoryController, TestCaseFileController, ResourceFileController
 from threading import Thread
 
@@ -210,6 +209,7 @@ class ReviewDialog(wx.Frame):
         self.label_filter_status.SetForegroundColour((0,200,0))
 
     def OnSearch(self, event):
+        self._runner.load_all_datafiles(LoadProgressObserver(self))
         self.begin_searching()
         self._runner._run_review()
 
@@ -343,38 +343,32 @@ class ReviewRunner(object):
     def parse_filter_string(self, filter_string):
         self._filter.set_strings(filter_string.split(','))
 
+    def load_all_datafiles(self, load_observer):
+        self._controller.load_all_datafiles(load_observer)
+
     def _get_datafile_list(self):
         return [df for df in self._controller.datafiles if self._filter.include_file(df)]
 
     def _run_review(self):
         self._model.begin_search()
-        Thread(target=self._run).start()
+        thread = Thread(target=self._run)
+        thread.setDaemon(True)
+        thread.start()
 
     def _run(self):
-        self._stop_requested = False
         self._model.status = 'listing datafiles'
-        for df in self._get_datafile_list():
-            libname = os.path.basename(df.source).rsplit('.', 1)[0]
-            self._model.status = 'searching from '+libname
-            for keyword in df.keywords:
-                time.sleep(0) # GIVE SPACE TO OTHER THREADS -- Thread.yield in Java
-                self._model.status = "%s.%s" % (libname, keyword.name)
-                if not self._model.searching:
-                    break
-                # Check if it is unused
-                if not isinstance(keyword, LibraryKeywordInfo) and keyword.name:
-                    if self._is_unused(keyword):
-                        self._model.add_unused_keyword(keyword)
-            if not self._model.searching:
-                break
+        command = FindUnusedKeywords(self._get_datafile_list(),
+                                     cancelled=self._cancelled,
+                                     progress=self._set_status)
+        for keyword in self._controller.execute(command):
+            self._model.add_unused_keyword(keyword)
         self._model.end_search()
 
-    def _is_unused(self, keyword):
-        try:
-            self._controller.execute(FindUsages(keyword.name, keyword_info=keyword.info)).next()
-            return False
-        except StopIteration:
-            return True
+    def _cancelled(self):
+        return not self._model.searching
+
+    def _set_status(self, message):
+        self._model.status = message
 
 
 class ResultFilter(object):
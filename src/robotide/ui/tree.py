@@ -172,6 +172,7 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
 
     def _clear_tree_data(self):
         self.DeleteAllItems()
+        self._controller.clear_nodes()
         self._root = self.AddRoot('')
         self._resource_root = self._create_resource_root()
         self._datafile_nodes = []
@@ -184,6 +185,7 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
         handler = ResourceRootHandler(model, self, self._resource_root,
                                       self._controller.settings)
         self.SetPyData(self._resource_root, handler)
+        self._controller.register_node(self._resource_root, handler)
         if model.data:
             self._render_datafile(self._root, model.data, 0)
         for res in model.external_resources:
@@ -241,7 +243,9 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
         if controller.__class__ == ResourceFileController:
             if not controller.is_used():
                 self.SetItemTextColour(node, wx.ColorRGB(0xA9A9A9))
-        self.SetPyData(node, handler_class(controller, self, node, self._controller.settings))
+        handler = handler_class(controller, self, node, self._controller.settings)
+        self.SetPyData(node, handler)
+        self._controller.register_node(node, handler)
         return node
 
     def set_checkboxes_for_tests(self):
@@ -340,6 +344,7 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
     def _datafile_removed(self, message):
         dfnode = self._get_datafile_node(message.datafile.data)
         self._datafile_nodes.remove(dfnode)
+        self._controller.unregister_node(dfnode)
         self.DeleteChildren(dfnode)
         self.Delete(dfnode)
 
@@ -364,6 +369,7 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
         self._controller.mark_node_dirty(parent)
         if self.IsSelected(node):
             wx.CallAfter(self.SelectItem, parent)
+        self._controller.unregister_node(node)
         wx.CallAfter(self.Delete, node)
 
     def _data_dirty(self, message):
@@ -404,10 +410,7 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
             self.SelectItem(node)
 
     def _get_datafile_node(self, datafile):
-        for node in self._datafile_nodes:
-            if self._controller.get_handler(node).item == datafile:
-                return node
-        return None
+        return self._controller.find_node_by_data(datafile)
 
     def get_selected_datafile(self):
         """Returns currently selected data file.
@@ -457,6 +460,7 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
         """Changes the order of given items, first is expected to be directly above the second"""
         selection = self.GetItemPyData(currently_selected).controller
         controller = self._controller.get_handler(first).controller
+        self._controller.unregister_node(first)
         self.Delete(first)
         self._create_node_with_handler(self.GetItemParent(second),
                                               controller, second)
@@ -499,7 +503,7 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
         self._handle_pending_selection(to_be_selected, new_node)
 
     def _refresh_datafile(self, controller):
-        orig_node = self._get_data_controller_node(controller)
+        orig_node = self._controller.find_node_by_controller(controller)
         if orig_node is not None:
             insertion_index = self._get_datafile_index(orig_node)
             parent = self._get_parent(orig_node)
@@ -518,12 +522,6 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
             return
         return self.GetItemText(item)
 
-    def _get_data_controller_node(self, controller):
-        for node in self._datafile_nodes:
-            if self.GetItemPyData(node).controller == controller:
-                return node
-        return None
-
     def _click_on_item(self, flags):
         return flags & wx.TREE_HITTEST_ONITEM
 
@@ -541,6 +539,7 @@ class Tree(treemixin.DragAndDrop, customtreectrl.CustomTreeCtrl, utils.RideEvent
             if child in self._datafile_nodes:
                 self._remove_datafile_node(child)
         self._datafile_nodes.remove(node)
+        self._controller.unregister_node(node)
         self.Delete(node)
 
     def _handle_pending_selection(self, to_be_selected, parent_node):
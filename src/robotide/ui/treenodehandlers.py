@@ -121,14 +121,22 @@ class _ActionHandler(wx.Window):
         pass
 
     def OnSelectAllTests(self, event):
+        self._load_all_datafiles()
         self._tree.SelectAllTests(self._node)
 
     def OnDeselectAllTests(self, event):
+        self._load_all_datafiles()
         self._tree.DeselectAllTests(self._node)
 
     def OnSelectOnlyFailedTests(self, event):
+        self._load_all_datafiles()
         self._tree.SelectFailedTests(self._node)
 
+    def _load_all_datafiles(self):
+        # Selecting tests expands all nodes below this one. Loading lazily
+        # loaded files first parses them in the background, not one by one.
+        self.controller.load_all_datafiles(LoadProgressObserver(self._tree))
+
     def OnSafeDelete(self, event):
         pass
 
@@ -14,6 +14,7 @@
 
 from robotide.usages.commands import FindUsages, FindResourceUsages, FindVariableUsages
 from robotide.usages.usagesdialog import UsagesDialog, UsagesDialogWithUserKwNavigation, ResourceImportUsageDialog
+from robotide.ui.progress import LoadProgressObserver
 from threading import Thread
 import wx
 import time
@@ -35,6 +36,7 @@ class Usages(object):
         return UsagesDialog(self._name)
 
     def show(self):
+        self._controller.load_all_datafiles(LoadProgressObserver(self._dlg))
         self._dlg.add_selection_listener(self._highlight)
         self._dlg.Bind(wx.EVT_CLOSE, self._stop)
         self._dlg.Show()
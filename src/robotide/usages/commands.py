@@ -15,6 +15,7 @@ import os
 
 from robotide.controller.commands import FindOccurrences, _Command, FindVariableOccurrences
 from robotide.controller.macrocontrollers import KeywordNameController
+from robotide.spec.iteminfo import _UserKeywordInfo
 
 
 class FindUsages(FindOccurrences):
@@ -49,6 +50,63 @@ class FindVariableUsages(FindVariableOccurrences):
             yield prev
 
 
+class FindUnusedKeywords(_Command):
+    """Finds keywords of `datafiles` that are not used anywhere.
+
+    All cells of all datafiles are resolved to keywords in a single pass and
+    the keywords that nothing resolves to are unused. `cancelled` is polled
+    while resolving and the search yields nothing if it returns True.
+    `progress` is called with a message before each datafile.
+    """
+    modifying = False
+
+    def __init__(self, datafiles, cancelled=None, progress=None):
+        self._datafiles = datafiles
+        self._cancelled = cancelled or (lambda: False)
+        self._progress = progress or (lambda message: None)
+
+    def execute(self, context):
+        used = self._find_used_keywords(list(context.datafiles))
+        if used is None:
+            return
+        for df in self._datafiles:
+            for kw in df.keywords:
+                if kw.name and kw.data not in used:
+                    yield kw
+
+    def _find_used_keywords(self, datafiles):
+        used = set()
+        for index, df in enumerate(datafiles):
+            self._progress('Resolving keywords in %s (%d/%d)'
+                           % (df.name, index + 1, len(datafiles)))
+            # Directories without an initialization file have no data.
+            if df.data is None:
+                continue
+            for cell in self._get_cells(df.data):
+                if self._cancelled():
+                    return None
+                info = df.keyword_info(cell)
+                if isinstance(info, _UserKeywordInfo):
+                    used.add(info.item)
+        return used
+
+    def _get_cells(self, datafile):
+        cells = set()
+        for setting in datafile.setting_table:
+            cells.update(setting.as_list()[1:])
+        for macro in list(datafile.testcase_table) + \
+                list(datafile.keyword_table):
+            for setting in macro.settings:
+                cells.update(setting.as_list()[1:])
+            self._add_step_cells(macro.steps, cells)
+        return cells
+
+    def _add_step_cells(self, steps, cells):
+        for step in steps:
+            cells.update(step.as_list())
+            self._add_step_cells(getattr(step, 'steps', []), cells)
+
+
 class FindResourceUsages(_Command):
 
     def execute(self, context):
@@ -0,0 +1,173 @@
+import threading
+import time
+import unittest
+
+from robot.utils.asserts import assert_equals, assert_false, assert_true
+
+from robotide.contrib.testrunner.listenerevents import ListenerEventQueue
+from robotide.contrib.testrunner.testrunner import TestRunner
+from robotide.publish import PUBLISHER
+from robotide.publish.messages import RideTestRunning, RideTestPassed, \
+    RideTestFailed
+
+
+def _test(longname, status=None):
+    attrs = {'longname': longname}
+    if status:
+        attrs['status'] = status
+    return longname.split('.')[-1], attrs
+
+
+class TestListenerEventBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = ListenerEventQueue()
+
+    def test_empty_batch(self):
+        batch = self.queue.flush()
+        assert_false(batch)
+        assert_equals(batch.events, [])
+
+    def test_keywords_are_reduced_to_stack_changes(self):
+        for name in ['Setup', 'Inner', 'Innermost']:
+            self.queue.put('start_keyword', name, {})
+        self.queue.put('end_keyword', 'Innermost', {})
+        batch = self.queue.flush()
+        assert_equals(batch.keywords_ended, 0)
+        assert_equals(batch.keywords_started, ['Setup', 'Inner'])
+        assert_equals(batch.events, [])
+        for _ in range(3):
+            self.queue.put('end_keyword', 'Any', {})
+        self.queue.put('start_keyword', 'Next', {})
+        batch = self.queue.flush()
+        assert_equals(batch.keywords_ended, 3)
+        assert_equals(batch.keywords_started, ['Next'])
+
+    def test_many_keyword_events_in_one_batch(self):
+        self.queue = ListenerEventQueue(max_pending=20000)
+        for _ in range(10000):
+            self.queue.put('start_keyword', 'Log', {})
+            self.queue.put('end_keyword', 'Log', {})
+        batch = self.queue.flush()
+        assert_equals(batch.count, 20000)
+        assert_equals(batch.keywords_ended, 0)
+        assert_equals(batch.keywords_started, [])
+
+    def test_other_events_are_kept_in_order(self):
+        self.queue.put('start_test', *_test('S.T1'))
+        self.queue.put('log_message', {'message': 'Hello'})
+        self.queue.put('start_keyword', 'Log', {})
+        self.queue.put('end_test', *_test('S.T1', 'PASS'))
+        batch = self.queue.flush()
+        assert_equals([event for event, _ in batch.events],
+                      ['start_test', 'log_message', 'end_test'])
+
+    def test_latest_test_statuses_and_counts(self):
+        self.queue.put('start_test', *_test('S.T1'))
+        self.queue.put('end_test', *_test('S.T1', 'PASS'))
+        self.queue.put('start_test', *_test('S.T2'))
+        self.queue.put('end_test', *_test('S.T2', 'FAIL'))
+        self.queue.put('start_test', *_test('S.T3'))
+        batch = self.queue.flush()
+        assert_equals(batch.test_statuses, [('S.T1', 'PASS'), ('S.T2', 'FAIL'),
+                                            ('S.T3', 'RUNNING')])
+        assert_equals((batch.passed, batch.failed), (1, 1))
+
+
+class TestListenerEventBackpressure(unittest.TestCase):
+
+    def _put_in_thread(self, queue, count):
+        thread = threading.Thread(
+            target=lambda: [queue.put('log_message', {}) for _ in range(count)])
+        thread.setDaemon(True)
+        thread.start()
+        return thread
+
+    def test_put_blocks_when_too_many_events_are_pending(self):
+        queue = ListenerEventQueue(max_pending=10, max_wait=10)
+        thread = self._put_in_thread(queue, 15)
+        time.sleep(0.2)
+        assert_true(thread.isAlive())
+        assert_equals(len(queue), 10)
+        assert_equals(queue.flush().count, 10)
+        thread.join(5)
+        assert_false(thread.isAlive())
+        assert_equals(queue.flush().count, 5)
+
+    def test_put_stops_blocking_when_queue_is_not_flushed(self):
+        queue = ListenerEventQueue(max_pending=10, max_wait=0.1)
+        thread = self._put_in_thread(queue, 100)
+        thread.join(5)
+        assert_false(thread.isAlive())
+        assert_equals(queue.flush().count, 100)
+
+    def test_release_unblocks_put_until_queue_is_cleared(self):
+        queue = ListenerEventQueue(max_pending=10, max_wait=10)
+        thread = self._put_in_thread(queue, 15)
+        time.sleep(0.2)
+        queue.release()
+        thread.join(5)
+        assert_false(thread.isAlive())
+        assert_equals(len(queue), 15)
+        queue.clear()
+        thread = self._put_in_thread(queue, 15)
+        time.sleep(0.2)
+        assert_true(thread.isAlive())
+        assert_equals(queue.flush().count, 10)
+        thread.join(5)
+
+    def test_clear_discards_events_and_releases_blocked_put(self):
+        queue = ListenerEventQueue(max_pending=10, max_wait=10)
+        thread = self._put_in_thread(queue, 15)
+        time.sleep(0.2)
+        queue.clear()
+        thread.join(5)
+        assert_false(thread.isAlive())
+        assert_equals(queue.flush().count, 5)
+
+
+class _FakeChief(object):
+
+    def find_controller_by_longname(self, longname):
+        return longname
+
+
+class TestTestRunnerListenerEvents(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = TestRunner(_FakeChief())
+        self.messages = []
+        for message in [RideTestRunning, RideTestPassed, RideTestFailed]:
+            PUBLISHER.subscribe(self._listener, message, key=self)
+
+    def tearDown(self):
+        PUBLISHER.unsubscribe_all(key=self)
+
+    def _listener(self, message):
+        self.messages.append((message.__class__, message.item))
+
+    def _events(self, *events):
+        for event in events:
+            self.runner._listener_events.put(*event)
+        return self.runner.get_listener_events()
+
+    def test_results_are_updated_when_events_are_taken(self):
+        self._events(('start_test',) + _test('S.T1'))
+        assert_equals(self.messages, [(RideTestRunning, 'S.T1')])
+        assert_true(self.runner._results.is_running('S.T1'))
+
+    def test_only_latest_result_is_published(self):
+        self._events(('start_test',) + _test('S.T1'),
+                     ('end_test',) + _test('S.T1', 'PASS'),
+                     ('start_test',) + _test('S.T2'),
+                     ('end_test',) + _test('S.T2', 'FAIL'))
+        assert_equals(self.messages, [(RideTestPassed, 'S.T1'),
+                                      (RideTestFailed, 'S.T2')])
+
+    def test_pid_is_handled_immediately(self):
+        self.runner._result_handler('pid', '42')
+        assert_equals(self.runner._pid_to_kill, 42)
+
+
+if __name__ == '__main__':
+    unittest.main()
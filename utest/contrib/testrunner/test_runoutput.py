@@ -0,0 +1,78 @@
+import codecs
+import shutil
+import tempfile
+import time
+import unittest
+
+from robot.utils.asserts import assert_equals, assert_none, assert_true
+
+from robotide.contrib.testrunner.runoutput import RunOutput
+
+
+class TestRunOutput(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output = RunOutput(self.directory)
+
+    def tearDown(self):
+        self.output.close()
+        shutil.rmtree(self.directory)
+
+    def _content(self):
+        self.output.close()
+        return codecs.open(self.output.path, encoding='UTF-8').read()
+
+    def test_whole_output_is_written_to_file(self):
+        self.output.write(u'first\n')
+        self.output.write(u'sec\xe4nd\n')
+        self.output.write('third')
+        assert_true(self.output.path.startswith(self.directory))
+        assert_equals(self._content(), u'first\nsec\xe4nd\nthird')
+        assert_equals(self.output.line_count, 2)
+        assert_equals(self.output.last_char, 'd')
+
+    def test_report_and_log_are_found(self):
+        self.output.write(u'Output:  /tmp/output.xml\n'
+                          u'Log:     /tmp/log.html\n'
+                          u'Report:  /tmp/report.html\n')
+        assert_equals(self.output.log_file, '/tmp/log.html')
+        assert_equals(self.output.report_file, '/tmp/report.html')
+
+    def test_report_split_to_many_writes(self):
+        for chunk in ['Rep', 'ort:  /tmp/rep', 'ort.html', '\r', '\nDone']:
+            assert_none(self.output.report_file)
+            self.output.write(chunk)
+        assert_equals(self.output.report_file, '/tmp/report.html')
+
+    def test_report_must_start_a_line(self):
+        self.output.write(u'Not a Report:  /tmp/report.html\n')
+        assert_none(self.output.report_file)
+
+    def test_last_line_is_checked_when_closed(self):
+        self.output.write(u'Log:     /tmp/log.html')
+        assert_none(self.output.log_file)
+        self.output.close()
+        assert_equals(self.output.log_file, '/tmp/log.html')
+
+    def test_writing_after_close_is_ignored(self):
+        self.output.write(u'text')
+        self.output.close()
+        self.output.write(u'more')
+        assert_equals(self._content(), u'text')
+
+    def test_detection_time_does_not_grow_with_output(self):
+        line = u'%s\n' % (u'x' * 78)
+        chunk = line * 100
+        start = time.time()
+        for _ in range(1000):
+            self.output.write(chunk)
+        self.output.write(u'Report:  /tmp/report.html\n')
+        elapsed = time.time() - start
+        assert_equals(self.output.report_file, '/tmp/report.html')
+        assert_equals(self.output.line_count, 100001)
+        assert_true(elapsed < 2, 'Writing 8MB took %.2f seconds' % elapsed)
+
+
+if __name__ == '__main__':
+    unittest.main()
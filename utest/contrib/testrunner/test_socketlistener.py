@@ -0,0 +1,154 @@
+import pickle
+import threading
+import time
+import unittest
+from StringIO import StringIO
+
+from robot.utils.asserts import assert_equals, assert_raises, assert_true
+
+from robotide.contrib.testrunner.SocketListener import SocketListener, \
+    FrameSender, read_frame, write_frame
+from robotide.contrib.testrunner.testrunner import RideListenerServer, \
+    RideListenerHandler, TestRunner
+
+
+KEYWORD_ATTRS = {'type': 'Keyword', 'doc': 'Logs the given message.',
+                 'args': ['Hello, world!'], 'starttime': '20121017 12:00:00.000',
+                 'endtime': '20121017 12:00:00.001', 'elapsedtime': 1,
+                 'status': 'PASS'}
+
+
+class TestFrames(unittest.TestCase):
+
+    def test_write_and_read(self):
+        stream = StringIO()
+        write_frame(stream, [('start_test', ('T', {'longname': 'S.T'}))])
+        write_frame(stream, {'end_test': ['status']})
+        stream.seek(0)
+        assert_equals(read_frame(stream),
+                      [('start_test', ('T', {'longname': 'S.T'}))])
+        assert_equals(read_frame(stream), {'end_test': ['status']})
+        assert_raises(EOFError, read_frame, stream)
+
+    def test_truncated_frame(self):
+        stream = StringIO()
+        write_frame(stream, ['event'])
+        stream = StringIO(stream.getvalue()[:-1])
+        assert_raises(EOFError, read_frame, stream)
+
+    def test_keyword_events_are_much_smaller_than_before(self):
+        old = StringIO()
+        pickler = pickle.Pickler(old)
+        for _ in range(100):
+            pickler.dump(('end_keyword', ('BuiltIn.Log', dict(KEYWORD_ATTRS))))
+        new = StringIO()
+        write_frame(new, [('end_keyword', ('BuiltIn.Log', {}))] * 100)
+        assert_true(len(new.getvalue()) * 10 < len(old.getvalue()),
+                    '%d vs %d bytes' % (len(new.getvalue()),
+                                        len(old.getvalue())))
+
+
+class _Stream(object):
+
+    def __init__(self):
+        self.frames = []
+        self._data = ''
+
+    def write(self, data):
+        self._data += data
+
+    def flush(self):
+        self.frames.append(read_frame(StringIO(self._data)))
+        self._data = ''
+
+
+class TestFrameSender(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = _Stream()
+        self.sender = FrameSender(self.stream, batch_size=3,
+                                  flush_interval=60)
+
+    def tearDown(self):
+        self.sender.close()
+
+    def test_events_are_sent_in_batches(self):
+        for index in range(7):
+            self.sender.send('event', (index,))
+        assert_equals([len(frame) for frame in self.stream.frames], [3, 3])
+        self.sender.flush()
+        assert_equals(self.stream.frames[-1], [('event', (6,))])
+
+    def test_send_with_flush(self):
+        self.sender.send('pid', (42,), flush=True)
+        assert_equals(self.stream.frames, [[('pid', (42,))]])
+
+    def test_pending_events_are_sent_periodically(self):
+        sender = FrameSender(self.stream, flush_interval=0.01)
+        sender.send('start_keyword', ('Sleep', {}))
+        time.sleep(0.2)
+        sender.close()
+        assert_equals(self.stream.frames, [[('start_keyword', ('Sleep', {}))]])
+
+
+class TestListenerConnection(unittest.TestCase):
+
+    def setUp(self):
+        self.events = []
+        self.runner = TestRunner(None)
+        self.runner.set_listener_subscription(keywords=False)
+        self.server = RideListenerServer(
+            RideListenerHandler, lambda *args: self.events.append(args),
+            self.runner._listener_subscription)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_only_subscribed_events_and_attributes_are_sent(self):
+        listener = SocketListener(self.server.server_address[1])
+        listener.start_suite('S', {'longname': 'S'})
+        listener.start_test('T', {'longname': 'S.T', 'doc': 'Long doc'})
+        listener.start_keyword('BuiltIn.Log', KEYWORD_ATTRS)
+        listener.log_message({'timestamp': 'now', 'level': 'INFO',
+                              'message': 'Hello', 'html': 'no'})
+        listener.end_keyword('BuiltIn.Log', KEYWORD_ATTRS)
+        listener.end_test('T', {'longname': 'S.T', 'status': 'PASS',
+                                'message': ''})
+        listener.close()
+        listener._killer.shutdown()
+        self._wait_for('close')
+        assert_equals([event[0] for event in self.events],
+                      ['pid', 'port', 'start_test', 'log_message',
+                       'end_test', 'close'])
+        assert_equals(self.events[2], ('start_test', 'T', {'longname': 'S.T'}))
+        assert_equals(self.events[3], ('log_message', {'timestamp': 'now',
+                                                       'level': 'INFO',
+                                                       'message': 'Hello'}))
+        assert_equals(self.events[4], ('end_test', 'T', {'longname': 'S.T',
+                                                         'status': 'PASS'}))
+
+    def test_wait_for_connections_returns_when_listener_disconnects(self):
+        listener = SocketListener(self.server.server_address[1])
+        for index in range(100):
+            listener.start_test('T%d' % index, {'longname': 'S.T%d' % index})
+        listener.close()
+        listener._killer.shutdown()
+        self.server.wait_for_connections(5)
+        assert_equals(self.events[-1][0], 'close')
+        assert_equals(len(self.events), 103)
+
+    def _wait_for(self, name, timeout=5):
+        end = time.time() + timeout
+        while time.time() < end:
+            if self.events and self.events[-1][0] == name:
+                return
+            time.sleep(0.01)
+        raise AssertionError('No %s event received' % name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@ from robot.parsing.populators import FromFilePopulator
 from robotide.controller.basecontroller import WithNamespace
 from robotide.controller.filecontrollers import TestCaseFileController,\
     TestDataDirectoryController
+from robotide.controller.importgraph import ResourceImportGraph
 
 TEST_NAME = 'Test With two Steps'
 STEP1_KEYWORD = 'Step 1'
@@ -38,6 +39,10 @@ class _FakeChief(WithNamespace):
 
     resource_file_controller_factory = None
 
+    @property
+    def import_graph(self):
+        return ResourceImportGraph()
+
 def create(data):
     tcf = TestCaseFile()
     tcf.directory = '/path/to'
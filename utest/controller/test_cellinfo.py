@@ -1,3 +1,4 @@
+import time
 import unittest
 import datafilereader
 from robotide.controller.commands import ChangeCellValue, DeleteRows, AddKeyword,\
@@ -250,5 +251,124 @@ class TestCellInfo(unittest.TestCase):
         assert_equals(cell_info.content_type, contenttype)
 
 
+class TestCellInfoBatches(unittest.TestCase):
+
+    def setUp(self):
+        ctrl = datafilereader.construct_chief_controller(datafilereader.ARGUMENTS_PATH)
+        self.testsuite = datafilereader.get_ctrl_by_name('Suite', ctrl.datafiles)
+        self.test = self.testsuite.tests[0]
+        self.forlooped = [kw for kw in self.testsuite.keywords if kw.name == 'KW3'][0]
+
+    def test_batch_is_same_as_single_cells(self):
+        self.test.execute(PasteArea((0, 0), [['${var}=', 'Set Variable', 'x'],
+                                             ['KW1', '${var}', '${unknown}', 'y']]))
+        for macro in self.test, self.forlooped:
+            for row in range(len(macro.steps)):
+                batch = [(info.content_type, info.cell_type)
+                         for info in macro.get_cell_infos(row, 6)]
+                single = [(info.content_type, info.cell_type) for info in
+                          [macro.get_cell_info(row, col) for col in range(6)]]
+                assert_equals(batch, single)
+
+    def test_no_cell_infos_if_no_data(self):
+        assert_none(self.test.get_cell_infos(len(self.test.steps), 5))
+
+    def test_keyword_is_resolved_once_per_step(self):
+        self.test.execute(PasteArea((0, 0), [['KW1', 'KW1', 'KW1', 'KW1']]))
+        calls = []
+        datafile = self.test.datafile_controller
+        original = datafile.keyword_info
+        datafile.keyword_info = lambda name: calls.append(name) or original(name)
+        try:
+            self.test.get_cell_infos(0, 5)
+        finally:
+            del datafile.keyword_info
+        assert_equals(calls, ['KW1'])
+
+    def test_lookups_are_not_kept_after_batch(self):
+        self.test.execute(ChangeCellValue(0, 0, 'KW1'))
+        self.test.get_cell_infos(0, 3)
+        assert_none(self.test.step(0)._lookups)
+
+
+class TestCellInfoCaching(unittest.TestCase):
+
+    def setUp(self):
+        ctrl = datafilereader.construct_chief_controller(datafilereader.ARGUMENTS_PATH)
+        self.testsuite = datafilereader.get_ctrl_by_name('Suite', ctrl.datafiles)
+        self.test = self.testsuite.tests[0]
+        self.test.execute(PasteArea((0, 0), [['KW1', 'foo'],
+                                             ['Log', '${var}'],
+                                             ['KW2', 'bar']]))
+
+    def tearDown(self):
+        self.test.execute(DeleteRows([i for i in range(len(self.test.steps))]))
+
+    def test_cell_infos_of_unchanged_steps_survive_step_changes(self):
+        infos = [self.test.get_cell_info(row, 1) for row in range(3)]
+        self.test.execute(ChangeCellValue(2, 1, 'quux'))
+        assert_true(self.test.get_cell_info(0, 1) is infos[0])
+        assert_true(self.test.get_cell_info(1, 1) is infos[1])
+        assert_false(self.test.get_cell_info(2, 1) is infos[2])
+
+    def test_assigning_variable_before_step_expires_its_cell_infos(self):
+        self._verify_content_type(1, 1, ContentType.UNKNOWN_VARIABLE)
+        self.test.execute(ChangeCellValue(0, 0, '${var}='))
+        self._verify_content_type(1, 1, ContentType.VARIABLE)
+
+    def test_namespace_update_expires_cell_infos(self):
+        info = self.test.get_cell_info(0, 0)
+        self.test.datafile_controller.update_namespace()
+        assert_false(self.test.get_cell_info(0, 0) is info)
+        self.test.execute(ChangeCellValue(0, 0, 'New Keyword'))
+        self._verify_content_type(0, 0, ContentType.STRING)
+        self.test.execute(AddKeyword('New Keyword'))
+        self._verify_content_type(0, 0, ContentType.USER_KEYWORD)
+
+    def test_steps_expire_lazily_after_namespace_update(self):
+        steps = self.test.steps
+        namespace = self.test.datafile_controller._namespace
+        assert_equals(namespace._update_listeners, [])
+        self.test.datafile_controller.update_namespace()
+        assert_true(self.test._steps_cached is steps)
+        assert_false(self.test.steps is steps)
+
+    def _verify_content_type(self, row, col, contenttype):
+        assert_equals(self.test.get_cell_info(row, col).content_type, contenttype)
+
+
+class TestCellInfoPerformance(unittest.TestCase):
+
+    def setUp(self):
+        ctrl = datafilereader.construct_chief_controller(datafilereader.ARGUMENTS_PATH)
+        self.testsuite = datafilereader.get_ctrl_by_name('Suite', ctrl.datafiles)
+        self.test = self.testsuite.tests[0]
+        rows = []
+        for index in range(200):
+            rows.append(['${var%d}=' % index, 'KW1', '${var%d}' % index, 'arg'])
+            rows.append(['Log', '${var%d}' % index, '${unknown}', 'INFO'])
+        self.test.execute(PasteArea((0, 0), rows))
+
+    def tearDown(self):
+        self.test.execute(DeleteRows([i for i in range(len(self.test.steps))]))
+
+    def test_get_cell_info_throughput(self):
+        self._get_all_cell_infos()
+        start_time = time.time()
+        cells = 0
+        for _ in range(10):
+            self.test.execute(ChangeCellValue(399, 3, 'DEBUG'))
+            cells += self._get_all_cell_infos()
+        elapsed = time.time() - start_time
+        assert_true(elapsed < 1, 'Getting %d cell infos took %.2fs'
+                    % (cells, elapsed))
+
+    def _get_all_cell_infos(self):
+        for row in range(len(self.test.steps)):
+            for col in range(5):
+                self.test.get_cell_info(row, col)
+        return len(self.test.steps) * 5
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -7,6 +7,7 @@ from robot.parsing.model import TestDataDirectory, TestCaseFile, ResourceFile
 from robot.utils.asserts import assert_true, assert_equals, assert_none
 
 from robotide.controller import ChiefController
+from robotide.controller.commands import NullObserver, RenameKeywordOccurrences
 from robotide.namespace import Namespace
 from robotide.controller.filecontrollers import TestCaseFileController, \
     TestDataDirectoryController, ResourceFileController
@@ -252,5 +253,91 @@ class TestFindingControllers(unittest.TestCase):
         assert_equals(result, test)
 
 
+class TestLazyLoading(unittest.TestCase):
+
+    def setUp(self):
+        settings = FakeSettings()
+        settings.set('lazy data loading', True)
+        self.ctrl = ChiefController(Namespace(settings), settings)
+        self.ctrl.load_data(SUITEPATH, MessageRecordingLoadObserver())
+        self.load_observer = MessageRecordingLoadObserver()
+        self.file_controllers = [df for df in self.ctrl.datafiles
+                                 if isinstance(df, TestCaseFileController)]
+
+    def test_test_case_files_are_not_parsed_when_loading(self):
+        assert_equals(sorted(ctrl.name for ctrl in self.file_controllers),
+                      ['Everything', 'Minimal', 'Test'])
+        assert_true(all(not ctrl.data.loaded
+                        for ctrl in self.file_controllers))
+
+    def test_test_case_file_is_parsed_when_needed(self):
+        everything = self._file_controller('Everything')
+        assert_equals(everything.tests[0].name, 'My Test')
+        assert_true(everything.data.loaded)
+        assert_true(not self._file_controller('Minimal').data.loaded)
+
+    def test_loading_all_datafiles(self):
+        resources_before = len(self.ctrl.resources)
+        self.ctrl.load_all_datafiles(self.load_observer)
+        assert_true(all(ctrl.data.loaded for ctrl in self.file_controllers))
+        assert_true(len(self.ctrl.resources) > resources_before)
+        assert_equals(self.load_observer.progress[-1],
+                      'Parsed 3 of 3 test case files')
+
+    def test_loading_all_datafiles_from_child_controller(self):
+        test = self._file_controller('Everything').tests[0]
+        test.load_all_datafiles(self.load_observer)
+        assert_true(all(ctrl.data.loaded for ctrl in self.file_controllers))
+
+    def test_loaded_data_equals_eagerly_loaded_data(self):
+        self.ctrl.load_all_datafiles(self.load_observer)
+        eager = ChiefController(Namespace(FakeSettings()), FakeSettings())
+        eager.load_data(SUITEPATH, MessageRecordingLoadObserver())
+        assert_equals(self._names(self.ctrl), self._names(eager))
+
+    def test_checking_resource_usage_does_not_parse_files(self):
+        for resource in self.ctrl.resources:
+            resource.is_used()
+        assert_true(all(not ctrl.data.loaded
+                        for ctrl in self.file_controllers))
+
+    def test_resources_imported_by_unloaded_files_are_used(self):
+        assert_true(all(res.is_used() for res in self.ctrl.resources))
+        assert_true(all(not ctrl.data.loaded
+                        for ctrl in self.file_controllers))
+
+    def test_finding_imports_loads_only_importing_files(self):
+        resource = self.ctrl.resources[0]
+        imports = list(resource.get_where_used())
+        assert_true(imports)
+        loaded = [ctrl for ctrl in self.file_controllers if ctrl.data.loaded]
+        assert_equals(sorted(set(imp.parent.parent.name for imp in imports)),
+                      sorted(ctrl.name for ctrl in loaded))
+
+    def test_resource_usage_is_resolved_after_loading_all_datafiles(self):
+        for resource in self.ctrl.resources:
+            resource.is_used()
+        self.ctrl.load_all_datafiles(self.load_observer)
+        eager = ChiefController(Namespace(FakeSettings()), FakeSettings())
+        eager.load_data(SUITEPATH, MessageRecordingLoadObserver())
+        assert_equals(self._usages(self.ctrl), self._usages(eager))
+
+    def test_renaming_keyword_loads_all_datafiles(self):
+        self._file_controller('Minimal').execute(
+            RenameKeywordOccurrences('Some Keyword', 'New Name',
+                                     NullObserver()))
+        assert_true(all(ctrl.data.loaded for ctrl in self.file_controllers))
+
+    def _usages(self, ctrl):
+        return sorted((res.name, res.is_used()) for res in ctrl.resources)
+
+    def _names(self, ctrl):
+        return sorted((df.name, [t.name for t in getattr(df, 'tests', [])],
+                       [k.name for k in df.keywords]) for df in ctrl.datafiles)
+
+    def _file_controller(self, name):
+        return [ctrl for ctrl in self.file_controllers if ctrl.name == name][0]
+
+
 if __name__ == "__main__":
     unittest.main()
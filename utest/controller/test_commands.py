@@ -242,6 +242,13 @@ class TestCaseEditingTest(TestCaseCommandTest):
         self._exec(Undo())
         assert_equals(len(self._steps), self._orig_number_of_steps+2)
 
+    def test_purify_notifies_steps_changed_once(self):
+        self._exec(AddRow(1))
+        self._exec(AddRow(2))
+        self._number_of_test_changes = 0
+        self._exec(Purify())
+        self._verify_number_of_test_changes(1)
+
     def test_purify_removes_rows_with_no_data(self):
         self._exec(ChangeCellValue(0,0, ''))
         self._exec(ChangeCellValue(0,1, ''))
@@ -0,0 +1,217 @@
+from __future__ import with_statement
+
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from robot.parsing import model
+from robot.utils.asserts import assert_equals, assert_false, assert_true
+
+from robotide.controller.dataloader import _DataLoader, _ParserPool, \
+    cpu_count
+from robotide.controller.robotdata import LazyTestCaseFile, \
+    TestCaseFileHeader
+
+from resources import DATAPATH, SUITEPATH
+
+
+TEST_CASE_FILE = '''*** Settings ***
+Documentation  Suite %(index)d
+
+*** Test Cases ***
+%(tests)s
+*** Keywords ***
+%(keywords)s
+'''
+
+TEST_CASE = '''Test %(index)d
+    [Documentation]  Test documentation %(index)d
+    Log  Message %(index)d
+    Keyword %(index)d  argument  ${variable}
+    Run Keyword If  ${value}  Keyword %(index)d  other argument
+'''
+
+KEYWORD = '''Keyword %(index)d
+    [Arguments]  ${arg1}  ${arg2}
+    Log Many  ${arg1}  ${arg2}
+    :FOR  ${item}  IN  1  2  3
+    \\    Log  ${item}
+'''
+
+
+class _DataLoaderTest(unittest.TestCase):
+
+    def _load(self, path, workers=0, lazy=False):
+        loader = _DataLoader(path, workers, lazy)
+        loader.files_per_worker = 1
+        loader.start()
+        loader.join()
+        return loader
+
+    def _assert_same_data(self, exp, act):
+        assert_true(isinstance(act, exp.__class__))
+        assert_equals(exp.source, act.source)
+        assert_equals(exp.name, act.name)
+        assert_equals(getattr(exp, 'initfile', None),
+                      getattr(act, 'initfile', None))
+        assert_equals([t.name for t in exp.testcase_table],
+                      [t.name for t in act.testcase_table])
+        assert_equals([k.name for k in exp.keyword_table],
+                      [k.name for k in act.keyword_table])
+        assert_equals(len(exp.children), len(act.children))
+        for exp_child, act_child in zip(exp.children, act.children):
+            assert_true(act_child.parent is act)
+            self._assert_same_data(exp_child, act_child)
+
+
+class TestDataLoader(_DataLoaderTest):
+
+    def test_loading_file(self):
+        path = os.path.join(SUITEPATH, 'everything.html')
+        self._assert_same_data(model.TestData(source=path),
+                               self._load(path).result)
+
+    def test_loading_directory_in_process(self):
+        self._assert_same_data(model.TestData(source=SUITEPATH),
+                               self._load(SUITEPATH).result)
+
+    def test_loading_directory_in_worker_processes(self):
+        self._assert_same_data(model.TestData(source=SUITEPATH),
+                               self._load(SUITEPATH, workers=2).result)
+
+    def test_loading_nested_directories_in_worker_processes(self):
+        path = os.path.join(DATAPATH, 'all_files')
+        self._assert_same_data(model.TestData(source=path),
+                               self._load(path, workers=2).result)
+
+    def test_parsed_data_can_be_modified(self):
+        suite = self._load(SUITEPATH, workers=2).result
+        datafile = [ch for ch in suite.children
+                    if isinstance(ch, model.TestCaseFile)][0]
+        datafile.testcase_table.add('New Test')
+        assert_equals(datafile.testcase_table.tests[-1].name, 'New Test')
+        assert_true(datafile.start_table(['Variables']) is
+                    datafile.variable_table)
+
+    def test_progress_is_reported_per_file(self):
+        loader = self._load(SUITEPATH, workers=2)
+        assert_true(loader.progress.startswith('Parsed '))
+        assert_true(loader.progress.endswith(' test case files'))
+
+    def test_files_without_tests_are_returned_as_errors(self):
+        suite = os.path.join(SUITEPATH, 'minimal.html')
+        resource = os.path.join(DATAPATH, 'resources', 'resource.txt')
+        results = _ParserPool(1).parse([suite, resource],
+                                       lambda parsed, total: None)
+        assert_true(isinstance(results[suite], model.TestCaseFile))
+        assert_equals(results[resource], 'File has no test case table.')
+
+
+class TestLazyDataLoader(_DataLoaderTest):
+
+    def test_test_case_files_are_not_parsed(self):
+        suite = self._load(SUITEPATH, lazy=True).result
+        files = [ch for ch in suite.children
+                 if isinstance(ch, model.TestCaseFile)]
+        assert_equals([f.name for f in files], ['Everything', 'Minimal'])
+        assert_true(all(isinstance(f, LazyTestCaseFile) and not f.loaded
+                        for f in files))
+
+    def test_files_are_parsed_when_accessed(self):
+        suite = self._load(SUITEPATH, lazy=True).result
+        self._assert_same_data(model.TestData(source=SUITEPATH), suite)
+
+    def test_nested_directories(self):
+        path = os.path.join(DATAPATH, 'all_files')
+        self._assert_same_data(model.TestData(source=path),
+                               self._load(path, lazy=True).result)
+
+    def test_resource_imports_are_read_without_parsing(self):
+        suite = self._load(SUITEPATH, lazy=True).result
+        everything = [ch for ch in suite.children if ch.name == 'Everything'][0]
+        assert_true('../resources/resource.html' in everything.resource_imports)
+        assert_true(not everything.loaded)
+
+
+class TestTestCaseFileHeader(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, 'suite.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _header(self, content):
+        with open(self._path, 'w') as suite:
+            suite.write(content)
+        return TestCaseFileHeader(self._path)
+
+    def test_resource_imports(self):
+        header = self._header('*** Settings ***\nLibrary  OperatingSystem\n'
+                              'Resource  res.txt\nResource  ${CURDIR}/x.txt\n'
+                              '*** Test Cases ***\nTest\n    No Operation\n')
+        assert_true(header.has_test_case_table)
+        assert_equals(header.resource_imports,
+                      ['res.txt', self._dir + '/x.txt'])
+
+    def test_reading_stops_at_test_case_table(self):
+        header = self._header('*** Test Cases ***\nTest\n    No Operation\n'
+                              '*** Settings ***\nResource  res.txt\n')
+        assert_true(header.has_test_case_table)
+        assert_equals(header.resource_imports, [])
+
+    def test_file_without_test_case_table(self):
+        header = self._header('*** Keywords ***\nKeyword\n    No Operation\n')
+        assert_false(header.has_test_case_table)
+
+    def test_missing_file(self):
+        assert_false(TestCaseFileHeader(self._path).has_test_case_table)
+
+
+class TestDataLoaderPerformance(_DataLoaderTest):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        for index in range(40):
+            self._write_suite(index)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _write_suite(self, index):
+        content = TEST_CASE_FILE % {
+            'index': index,
+            'tests': ''.join(TEST_CASE % {'index': i} for i in range(200)),
+            'keywords': ''.join(KEYWORD % {'index': i} for i in range(200))}
+        path = os.path.join(self._dir, 'suite_%d.txt' % index)
+        with open(path, 'w') as suite:
+            suite.write(content)
+
+    def test_loading_in_worker_processes_is_faster(self):
+        if cpu_count() < 2:
+            return # Requires multiple processors
+        in_process = self._time_loading(workers=0)
+        parallel = self._time_loading(workers=cpu_count())
+        assert_true(parallel < in_process,
+                    'Loading in %d workers took %.2fs and in process %.2fs'
+                    % (cpu_count(), parallel, in_process))
+
+    def _time_loading(self, workers, lazy=False):
+        start_time = time.time()
+        suite = self._load(self._dir, workers, lazy).result
+        assert_equals(len(suite.children), 40)
+        return time.time() - start_time
+
+    def test_lazy_loading_is_fast(self):
+        eager = self._time_loading(workers=0)
+        lazy = self._time_loading(workers=0, lazy=True)
+        assert_true(lazy < eager / 5,
+                    'Lazy loading took %.2fs and eager loading %.2fs'
+                    % (lazy, eager))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from robot.utils.asserts import assert_equals, assert_false, assert_true
+
+import datafilereader
+
+
+class TestResourceImportGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.chief = datafilereader.construct_chief_controller(
+            datafilereader.ALL_FILES_PATH)
+        self.used = self._get('Used Resource')
+        self.unused = self._get('Unused Resource')
+        self.suite = self._get('Suite')
+        self.suite2 = self._get('Suite2')
+
+    def _get(self, name):
+        return datafilereader.get_ctrl_by_name(name, self.chief.datafiles)
+
+    def test_where_used(self):
+        assert_equals([imp.parent.parent for imp in self.used.get_where_used()],
+                      [self.suite])
+        assert_equals(list(self.unused.get_where_used()), [])
+
+    def test_added_import_is_found(self):
+        self.suite2.imports.add_resource('../unused_resource.txt')
+        assert_true(self.unused.is_used())
+        assert_equals([imp.parent.parent for imp in self.unused.get_where_used()],
+                      [self.suite2])
+
+    def test_removed_import_is_not_found(self):
+        assert_true(self.used.is_used())
+        self.suite.imports.delete(0)
+        assert_false(self.used.is_used())
+
+    def test_changed_import_is_found(self):
+        assert_true(self.used.is_used())
+        self.suite.imports[0].set_value('../unused_resource.txt')
+        assert_false(self.used.is_used())
+        assert_true(self.unused.is_used())
+
+    def test_removing_static_imports(self):
+        self.used.remove_static_imports_to_this()
+        assert_equals(list(self.suite.imports), [])
+        assert_false(self.used.is_used())
+
+    def test_only_changed_datafile_is_resolved_again(self):
+        self.used.is_used()
+        graph = self.chief.import_graph
+        resolved = dict(graph._imports)
+        self.suite.imports.delete(0)
+        self.used.is_used()
+        for df, imports in graph._imports.items():
+            if df is self.suite:
+                assert_equals(imports, [])
+            else:
+                assert_true(imports is resolved[df])
+
+    def test_lookups_do_not_go_through_datafiles(self):
+        self.used.is_used()
+        self.chief.import_graph._datafiles = None
+        assert_true(self.used.is_used())
+        assert_false(self.unused.is_used())
+
+    def test_full_invalidation_forgets_datafiles(self):
+        self.used.is_used()
+        graph = self.chief.import_graph
+        graph.invalidate()
+        assert_equals((graph._imports, graph._users, graph._order),
+                      ({}, {}, {}))
+
+    def test_removed_datafile_is_forgotten(self):
+        self.used.is_used()
+        self.chief.remove_datafile(self.suite2)
+        self.used.is_used()
+        graph = self.chief.import_graph
+        assert_true(self.suite2 not in graph._imports)
+        assert_true(self.suite2 not in graph._order)
+
+
+class TestResourceImportGraphPerformance(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        for index in range(100):
+            self._write('resource_%d.txt' % index,
+                        '*** Keywords ***\nKeyword %d\n    No Operation\n' % index)
+        for index in range(100):
+            imports = ''.join('Resource  resource_%d.txt\n' % ((index + i) % 90)
+                              for i in range(10))
+            self._write('suite_%d.txt' % index,
+                        '*** Settings ***\n%s\n*** Test Cases ***\nTest\n'
+                        '    No Operation\n' % imports)
+        self.chief = datafilereader.construct_chief_controller(self._dir)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _write(self, name, content):
+        with open(os.path.join(self._dir, name), 'w') as datafile:
+            datafile.write(content)
+
+    def test_checking_whether_resources_are_used_is_fast(self):
+        start_time = time.time()
+        used = [res.is_used() for res in self.chief.resources]
+        elapsed = time.time() - start_time
+        assert_equals(used.count(False), 10)
+        assert_true(elapsed < 0.5, 'Checking resources took %.2fs' % elapsed)
+
+
+if __name__ == '__main__':
+    unittest.main()
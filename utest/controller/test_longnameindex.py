@@ -0,0 +1,112 @@
+import time
+import unittest
+
+from robot.parsing.model import TestCaseFile, TestDataDirectory
+from robot.utils.asserts import assert_equals, assert_none, assert_true
+
+from robotide.controller.commands import AddTestCase, MoveTo, RenameTest
+from robotide.controller.filecontrollers import TestCaseFileController, \
+    TestDataDirectoryController
+from robotide.controller.longnameindex import LongnameIndex
+
+
+def _directory(name, *children):
+    ctrl = TestDataDirectoryController(TestDataDirectory(source=name))
+    for child in children:
+        ctrl.add_child(child)
+    return ctrl
+
+
+def _suite(name, *tests):
+    ctrl = TestCaseFileController(TestCaseFile(source=name + '.txt'))
+    for test in tests:
+        ctrl.create_test(test)
+    return ctrl
+
+
+class TestLongnameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.suite = _suite('Suite', 'Test 1', 'Test 2', 'Version 1.2')
+        self.other = _suite('Other', 'Test 1')
+        self.root = _directory('Root', self.suite,
+                               _directory('Sub', self.other))
+        self.index = LongnameIndex()
+
+    def tearDown(self):
+        self.index.close()
+
+    def _find(self, longname, root=None):
+        return self.index.find(root or self.root, longname)
+
+    def test_find_suites(self):
+        assert_true(self._find('Root') is self.root)
+        assert_true(self._find('Root.Suite') is self.suite)
+        assert_true(self._find('Root.Sub.Other') is self.other)
+
+    def test_find_tests(self):
+        assert_true(self._find('Root.Suite.Test 2') is self.suite.tests[1])
+        assert_true(self._find('Root.Sub.Other.Test 1') is
+                    self.other.tests[0])
+
+    def test_names_are_normalized(self):
+        assert_true(self._find('root.SUB.other.test1') is self.other.tests[0])
+
+    def test_test_name_with_dots(self):
+        assert_true(self._find('Root.Suite.Version 1.2') is
+                    self.suite.tests[2])
+
+    def test_unknown_names(self):
+        for name in ['', 'Foo', 'Root.Foo', 'Root.Suite.Foo',
+                     'Root.Suite.Test 1.Foo', 'Foo.Suite.Test 1']:
+            assert_none(self._find(name))
+
+    def test_renamed_test(self):
+        self._find('Root.Suite.Test 1')
+        self.suite.tests[0].execute(RenameTest('Renamed'))
+        assert_none(self._find('Root.Suite.Test 1'))
+        assert_true(self._find('Root.Suite.Renamed') is self.suite.tests[0])
+
+    def test_added_and_removed_test(self):
+        self._find('Root.Suite.Test 1')
+        new = self.suite.execute(AddTestCase('New'))
+        assert_true(self._find('Root.Suite.New') is new)
+        new.delete()
+        assert_none(self._find('Root.Suite.New'))
+
+    def test_moved_test(self):
+        test = self.suite.tests[1]
+        self._find('Root.Sub.Other.Test 2')
+        test.execute(MoveTo(self.other))
+        assert_none(self._find('Root.Suite.Test 2'))
+        assert_true(self._find('Root.Sub.Other.Test 2').data is test.data)
+
+    def test_added_suite(self):
+        self._find('Root')
+        new = _suite('New')
+        self.root.add_child(new)
+        self.root.notify_suite_added(new)
+        assert_true(self._find('Root.New') is new)
+
+    def test_new_root(self):
+        self._find('Root.Suite')
+        root = _directory('Root', _suite('Suite'))
+        assert_true(self._find('Root.Suite', root) is root.children[0])
+
+    def test_test_events_per_second(self):
+        suites = [_suite('Suite %d' % i, *['Test %d' % j for j in range(50)])
+                  for i in range(100)]
+        root = _directory('Root', *suites)
+        names = ['Root.Suite %d.Test %d' % (i, j)
+                 for i in range(100) for j in range(50)]
+        self.index.find(root, names[0])
+        start = time.time()
+        for name in names:
+            self.index.find(root, name)
+        events_per_second = len(names) / max(time.time() - start, 1e-6)
+        assert_true(events_per_second > 20000,
+                    '%d events per second' % events_per_second)
+
+
+if __name__ == '__main__':
+    unittest.main()
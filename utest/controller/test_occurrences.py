@@ -1,3 +1,7 @@
+import os
+import time
+import shutil
+import tempfile
 import unittest
 from robot.parsing.model import TestCaseFile
 
@@ -421,3 +425,41 @@ class RenameOccurrenceTest(unittest.TestCase):
         self.test_ctrl.execute(ChangeCellValue(100, 100, keyword))
         self._steps_have_changed = False
 
+
+class FindVariableOccurrencesPerformance(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        for index in range(60):
+            self._write('res_%d.txt' % index, self._resource(index))
+        for index in range(10):
+            self._write('suite_%d.txt' % index, '*** Settings ***\n'
+                        'Resource  res_59.txt\n'
+                        '*** Test Cases ***\n'
+                        'Test\n    Log  ${var 0}\n')
+        chief = datafilereader.construct_chief_controller(self._dir)
+        self._variable = _get_ctrl_by_name(self, 'Res 0',
+                                           chief.datafiles).variables[0]
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _resource(self, index):
+        imports = 'Resource  res_%d.txt\n' % (index - 1) if index else ''
+        return ('*** Settings ***\n%s'
+                '*** Variables ***\n${var %d}  value\n'
+                '*** Keywords ***\nKeyword %d\n    Log  ${var 0}\n'
+                % (imports, index, index))
+
+    def _write(self, name, content):
+        with open(os.path.join(self._dir, name), 'w') as output:
+            output.write(content)
+
+    def test_variable_occurrences_in_resource_chain(self):
+        start_time = time.time()
+        occurrences = list(self._variable.execute(
+            FindVariableOccurrences('${var 0}')))
+        end_time = time.time() - start_time
+        assert_equals(len(occurrences), 71)
+        assert_true(end_time < 2, 'Finding occurrences took too long: %fs'
+                    % end_time)
@@ -0,0 +1,257 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from robot.utils.asserts import assert_equals, assert_false, assert_none,\
+    assert_true
+
+from robotide.controller.commands import ChangeCellValue
+from robotide.controller.textsync import TxtDataSync, TxtSerializer
+from robotide.publish import PUBLISHER
+from robotide.publish.messages import RideItemNameChanged,\
+    RideItemStepsChanged
+
+import datafilereader
+
+
+SUITE = '''\
+*** Settings ***
+Documentation    Suite for testing text synchronization
+Resource         resource.txt
+
+*** Variables ***
+${VARIABLE}    value
+
+*** Test Cases ***
+First Test
+    [Documentation]    First
+    Log    ${VARIABLE}
+    My Keyword    arg
+
+Second Test
+    [Tags]    tag
+    :FOR    ${i}    IN RANGE    2
+    \\    Log    ${i}
+
+*** Keywords ***
+My Keyword
+    [Arguments]    ${arg}
+    Log    ${arg}
+
+Other Keyword
+    No Operation
+'''
+
+
+def _save(datafile):
+    output = StringIO()
+    datafile.save(output=output, format='txt', txt_separating_spaces=4)
+    return output.getvalue().decode('UTF-8')
+
+
+class _TextSyncTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._write('resource.txt', '*** Keywords ***\nResource Keyword\n'
+                                    '    No Operation\n')
+        self._write('suite.txt', SUITE)
+        self.chief = datafilereader.construct_chief_controller(
+            os.path.join(self._dir, 'suite.txt'))
+        self.suite = datafilereader.get_ctrl_by_name('Suite',
+                                                     self.chief.datafiles)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _write(self, name, content):
+        with open(os.path.join(self._dir, name), 'w') as datafile:
+            datafile.write(content)
+
+
+class TestTxtSerializer(_TextSyncTestCase):
+
+    def test_serialized_text_equals_saved_text(self):
+        serializer = TxtSerializer(4)
+        for datafile in self.chief.datafiles:
+            assert_equals(serializer.serialize(datafile.data),
+                          _save(datafile.data))
+
+    def test_serialized_text_of_data_with_aligned_tables(self):
+        chief = datafilereader.construct_chief_controller(
+            datafilereader.ARGUMENTS_PATH)
+        serializer = TxtSerializer(4)
+        for datafile in chief.datafiles:
+            assert_equals(serializer.serialize(datafile.data),
+                          _save(datafile.data))
+
+    def test_changes_are_serialized(self):
+        serializer = TxtSerializer(4)
+        serializer.serialize(self.suite.data)
+        self.suite.tests[0].execute(ChangeCellValue(0, 1, 'changed'))
+        self.suite.keywords[1].rename('Renamed')
+        assert_equals(serializer.serialize(self.suite.data),
+                      _save(self.suite.data))
+
+    def test_unchanged_items_are_not_formatted_again(self):
+        serializer = TxtSerializer(4)
+        serializer.serialize(self.suite.data)
+        formatted = []
+        original = serializer._formatter.format_table
+        def format_table(table):
+            formatted.append(table)
+            return original(table)
+        serializer._formatter.format_table = format_table
+        self.suite.tests[0].execute(ChangeCellValue(0, 1, 'changed'))
+        serializer.serialize(self.suite.data)
+        assert_equals([list(table) for table in formatted],
+                      [[self.suite.tests[0].data]])
+
+    def test_items_with_unchanged_controllers_are_not_extracted(self):
+        serializer = TxtSerializer(4)
+        controllers = dict((id(item.data), item) for item in
+                           list(self.suite.tests) + list(self.suite.keywords))
+        serializer.serialize(self.suite.data, controllers)
+        extracted = []
+        original = serializer._content_key
+        def content_key(table, item):
+            extracted.append(item)
+            return original(table, item)
+        serializer._content_key = content_key
+        self.suite.tests[0].execute(ChangeCellValue(0, 1, 'changed'))
+        assert_equals(serializer.serialize(self.suite.data, controllers),
+                      _save(self.suite.data))
+        assert_equals([table.type for table in extracted],
+                      ['setting', 'variable'])
+
+
+class TestTxtDataSync(_TextSyncTestCase):
+
+    def setUp(self):
+        _TextSyncTestCase.setUp(self)
+        self.sync = TxtDataSync()
+        self.text = self.sync.serialize(self.suite, 4)
+        self._messages = []
+        PUBLISHER.subscribe(self._item_changed, RideItemStepsChanged)
+        PUBLISHER.subscribe(self._item_changed, RideItemNameChanged)
+
+    def tearDown(self):
+        PUBLISHER.unsubscribe(self._item_changed, RideItemStepsChanged)
+        PUBLISHER.unsubscribe(self._item_changed, RideItemNameChanged)
+        _TextSyncTestCase.tearDown(self)
+
+    def _item_changed(self, message):
+        self._messages.append((type(message), message.item))
+
+    def _update(self, old, new):
+        return self.sync.update(self.suite, self.text,
+                                self.text.replace(old, new))
+
+    def test_changed_keyword_is_updated(self):
+        keyword = self.suite.keywords[0]
+        other = self.suite.keywords[1].data
+        assert_true(self._update('    Log    ${arg}', '    Log Many    ${arg}'))
+        assert_true(self.suite.keywords[0] is keyword)
+        assert_equals(keyword.steps[0].as_list(), ['Log Many', '${arg}'])
+        assert_equals(keyword.data.args.value, ['${arg}'])
+        assert_true(keyword.data.args.parent is keyword.data)
+        assert_true(self.suite.keywords[1].data is other)
+        assert_equals(self._messages, [(RideItemStepsChanged, keyword)])
+        assert_equals(_save(self.suite.data),
+                      self.text.replace('Log    ${arg}', 'Log Many    ${arg}'))
+
+    def test_changed_test_settings_and_for_loop(self):
+        test = self.suite.tests[1]
+        assert_true(self._update('IN RANGE    2', 'IN RANGE    3'))
+        assert_equals(test.data.tags.value, ['tag'])
+        assert_true(test.data.tags.parent is test.data)
+        assert_equals(test.steps[0].as_list(),
+                      [': FOR', '${i}', 'IN RANGE', '3'])
+        assert_equals(len(test.steps), 2)
+
+    def test_renamed_item(self):
+        test = self.suite.tests[0]
+        assert_true(self._update('First Test', 'Renamed Test'))
+        assert_equals(test.name, 'Renamed Test')
+        assert_equals(self._messages, [(RideItemNameChanged, test),
+                                       (RideItemStepsChanged, test)])
+
+    def test_namespace_is_updated(self):
+        assert_true(self._update('My Keyword\n    [Arguments]',
+                                 'New Keyword\n    [Arguments]'))
+        assert_true(self.suite.is_user_keyword('New Keyword'))
+        assert_false(self.suite.is_user_keyword('My Keyword'))
+
+    def test_structural_changes_are_not_updated(self):
+        for old, new in [('Second Test', 'Second Test\n\nThird Test'),
+                         ('Other Keyword\n    No Operation\n', ''),
+                         ('    value', '    changed'),
+                         ('resource.txt', 'other.txt'),
+                         ('*** Keywords ***', '*** Test Cases ***')]:
+            assert_false(self._update(old, new))
+        assert_equals(_save(self.suite.data), self.text)
+        assert_equals(self._messages, [])
+
+    def test_unchanged_text(self):
+        assert_true(self.sync.update(self.suite, self.text, self.text))
+        assert_equals(self._messages, [])
+
+    def test_format_changes(self):
+        edited = self.text.replace('    Log    ${arg}', '  Log  ${arg}')
+        assert_equals(self.sync.format_changes(self.text, edited, 4),
+                      self.text)
+
+    def test_changes_are_parsed_once_when_formatted_and_updated(self):
+        edited = self.text.replace('    Log    ${arg}', '  Log  ${arg}')
+        parsed = []
+        original = self.sync._parse
+        def parse(old_text, new_text):
+            parsed.append(new_text)
+            return original(old_text, new_text)
+        self.sync._parse = parse
+        self.sync.format_changes(self.text, edited, 4)
+        assert_true(self.sync.update(self.suite, self.text, edited))
+        assert_equals(parsed, [edited])
+
+    def test_format_structural_changes(self):
+        edited = self.text.replace('    value', '    changed')
+        assert_none(self.sync.format_changes(self.text, edited, 4))
+
+
+class TestTxtDataSyncPerformance(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        path = os.path.join(self._dir, 'resource.txt')
+        with open(path, 'w') as resource:
+            resource.write('*** Keywords ***\n')
+            for index in range(1000):
+                resource.write('Keyword %d\n    [Arguments]    ${arg}\n'
+                               '    Log    ${arg}\n    No Operation\n'
+                               '    Log Many    a    b    c\n\n' % index)
+        self.chief = datafilereader.construct_chief_controller(path)
+        self.resource = self.chief.resources[0]
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def test_updating_single_keyword_is_fast(self):
+        sync = TxtDataSync()
+        text = sync.serialize(self.resource, 4)
+        start_time = time.time()
+        for index in range(10):
+            edited = text.replace('Keyword 500\n', 'Keyword 500\n    Log    %d\n'
+                                  % index)
+            assert_true(sync.update(self.resource, text, edited))
+            text = sync.serialize(self.resource, 4)
+        elapsed = time.time() - start_time
+        assert_equals(self.resource.keywords[500].steps[0].as_list(),
+                      ['Log', '9'])
+        assert_true(elapsed < 1, 'Updating keywords took %.2fs' % elapsed)
+
+
+if __name__ == '__main__':
+    unittest.main()
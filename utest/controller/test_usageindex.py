@@ -0,0 +1,185 @@
+import re
+import time
+import unittest
+
+from robot.parsing.model import TestCaseFile, TestDataDirectory
+from robot.utils.asserts import assert_equals, assert_true
+
+from robotide.controller import ChiefController
+from robotide.controller.commands import ChangeCellValue, FindOccurrences, \
+    FindVariableOccurrences
+from robotide.controller.filecontrollers import DataController, \
+    TestCaseFileController
+from robotide.controller.usageindex import UsageIndex
+from robotide.namespace import Namespace
+
+from resources import FakeSettings
+import datafilereader
+
+
+class TestUsageIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.chief = datafilereader.construct_chief_controller(
+            datafilereader.OCCURRENCES_PATH)
+        cls.ts1 = datafilereader.get_ctrl_by_name('TestSuite1',
+                                                  cls.chief.datafiles)
+
+    def setUp(self):
+        self.index = UsageIndex()
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_keyword_usages(self):
+        self._assert_keyword_users('None Keyword', ['TestSuite1', 'TestSuite2'])
+        self._assert_keyword_users('NONE keyword', ['TestSuite1', 'TestSuite2'])
+        self._assert_keyword_users('Not Used Anywhere', [])
+
+    def test_keyword_definition_is_usage(self):
+        self._assert_keyword_users('Resu UK', ['Resu'])
+
+    def test_keyword_usages_with_bdd_prefix(self):
+        tcf = TestCaseFile(source='bdd.txt')
+        tcf.testcase_table.add('Test').add_step(['Given My Keyword'])
+        users = self.index.datafiles_using_keyword(
+            [TestCaseFileController(tcf)], 'My Keyword')
+        assert_equals(len(users), 1)
+
+    def test_keyword_usages_with_regexp(self):
+        self._assert_keyword_users(re.compile('^None Key'),
+                                   ['TestSuite1', 'TestSuite2'])
+
+    def test_keyword_usage_locations(self):
+        tcf = TestCaseFile(source='locations.txt')
+        first = tcf.testcase_table.add('First')
+        first.add_step(['My Keyword'])
+        tcf.testcase_table.add('Second').add_step(['Other Keyword'])
+        uk = tcf.keyword_table.add('UK')
+        uk.add_step(['Given my keyword'])
+        tcf.setting_table.suite_setup.populate(['My Keyword'])
+        ctrl = TestCaseFileController(tcf)
+        usages = self.index.keyword_usages([ctrl], 'My Keyword')
+        assert_equals(usages, [(ctrl, set([first, uk, tcf]))])
+        usages = self.index.keyword_usages([ctrl], re.compile('^Other'))
+        assert_equals([locations for _, locations in usages],
+                      [set([tcf.testcase_table.tests[1]])])
+
+    def test_invalidated_datafile_is_removed_from_names(self):
+        self.index.datafiles_using_keyword(self.chief.datafiles, 'Resu UK')
+        for df in self.chief.datafiles:
+            self.index.invalidate(df)
+        assert_equals(self.index._keywords, {})
+
+    def test_variable_usages(self):
+        self._assert_variable_users('${Test Suite 1 Var}', ['TestSuite1'])
+        self._assert_variable_users('${testsuite1var}', ['TestSuite1'])
+        self._assert_variable_users('${Not Used}', [])
+
+    def test_variable_pattern_matches_everything(self):
+        self._assert_variable_users('${Test*}', [df.name for df in
+                                                 self.chief.datafiles])
+
+    def _assert_keyword_users(self, name, expected):
+        users = self.index.datafiles_using_keyword(self.chief.datafiles, name)
+        assert_equals(sorted(df.name for df in users), sorted(expected))
+
+    def _assert_variable_users(self, name, expected):
+        users = self.index.datafiles_using_variable(self.chief.datafiles, name)
+        assert_equals(sorted(df.name for df in users), sorted(expected))
+
+
+class TestUsageIndexUpdates(unittest.TestCase):
+
+    def setUp(self):
+        self.chief = datafilereader.construct_chief_controller(
+            datafilereader.OCCURRENCES_PATH)
+        self.ts1 = datafilereader.get_ctrl_by_name('TestSuite1',
+                                                   self.chief.datafiles)
+        self.test = self.ts1.tests[0]
+
+    def tearDown(self):
+        self.chief.usage_index.close()
+
+    def test_changed_steps_are_found(self):
+        assert_equals(self._count('New Keyword'), 0)
+        self.test.execute(ChangeCellValue(0, 0, 'New Keyword'))
+        assert_equals(self._count('New Keyword'), 1)
+
+    def test_removed_usages_are_not_searched(self):
+        self._count('None Keyword')
+        self.test.execute(ChangeCellValue(1, 0, 'Other Keyword'))
+        users = self.chief.usage_index.datafiles_using_keyword(
+            self.chief.datafiles, 'Other Keyword')
+        assert_equals([df.name for df in users], ['TestSuite1'])
+
+    def test_only_changed_datafile_is_reindexed(self):
+        self._count('My Keyword')
+        indexed = dict(self.chief.usage_index._usages)
+        self.test.execute(ChangeCellValue(0, 0, 'New Keyword'))
+        self._count('My Keyword')
+        for df, usages in self.chief.usage_index._usages.items():
+            if df is self.ts1:
+                assert_true(usages is not indexed[df])
+            else:
+                assert_true(usages is indexed[df])
+
+    def test_variable_usages_are_updated(self):
+        self.test.execute(ChangeCellValue(0, 1, '${new variable}'))
+        assert_equals(len(list(self.test.execute(
+            FindVariableOccurrences('${new variable}')))), 1)
+
+    def _count(self, name):
+        return len(list(self.ts1.execute(FindOccurrences(name))))
+
+
+class TestUsageIndexPerformance(unittest.TestCase):
+
+    def setUp(self):
+        settings = FakeSettings()
+        self.chief = ChiefController(Namespace(settings), settings)
+        directory = TestDataDirectory(source='suites')
+        for index in range(30):
+            directory.children.append(self._create_suite(directory, index))
+        self.chief._controller = DataController(directory, self.chief)
+        self.suite = self.chief.datafiles[1]
+
+    def tearDown(self):
+        self.chief.usage_index.close()
+
+    def _create_suite(self, parent, index):
+        tcf = TestCaseFile(parent, source='suite_%d.txt' % index)
+        for test_index in range(100):
+            test = tcf.testcase_table.add('Test %d' % test_index)
+            test.add_step(['Log', 'Message %d' % test_index])
+            test.add_step(['Keyword %d' % index, '${variable}'])
+        return tcf
+
+    def test_finding_usages_after_changes_is_fast(self):
+        first = self._time_finding('Keyword 0')
+        self.suite.tests[0].execute(ChangeCellValue(0, 0, 'Keyword 0'))
+        second = self._time_finding('Keyword 0')
+        assert_true(second < first / 3,
+                    'Finding usages took %.3fs with index and %.3fs when '
+                    'indexing' % (second, first))
+
+    def test_only_tests_using_keyword_are_searched(self):
+        searched = []
+        command = FindOccurrences('Keyword 1')
+        original = command._items_from_test
+        def items_from_test(test):
+            searched.append(test.name)
+            return original(test)
+        command._items_from_test = items_from_test
+        assert_equals(len(list(self.suite.execute(command))), 100)
+        assert_equals(len(searched), 100)
+
+    def _time_finding(self, name):
+        start_time = time.time()
+        list(self.suite.execute(FindOccurrences(name)))
+        return time.time() - start_time
+
+
+if __name__ == '__main__':
+    unittest.main()
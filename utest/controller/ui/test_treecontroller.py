@@ -12,8 +12,9 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import time
 import unittest
-from robot.utils.asserts import assert_equals
+from robot.utils.asserts import assert_equals, assert_none, assert_true
 from robotide.controller.ui.treecontroller import TreeController, _History
 
 
@@ -30,6 +31,136 @@ class TestTreeController(unittest.TestCase):
         self.assertEquals(["Go &Back", "Go &Forward"], [a.name for a in mocked_ar.action_collections])
 
 
+class _FakeNode(object):
+
+    def __init__(self, handler=None):
+        self.handler = handler
+        self.children = []
+        self.image = None
+
+    def add(self, controller, data=None):
+        child = _FakeNode(_FakeHandler(controller, data))
+        self.children.append(child)
+        return child
+
+
+class _FakeHandler(object):
+
+    def __init__(self, controller, item=None):
+        self.controller = controller
+        self.item = item
+
+
+class _FakeTree(object):
+
+    def __init__(self):
+        self._root = _FakeNode()
+        self.visited = 0
+
+    def GetFirstChild(self, node):
+        return self.GetNextChild(node, 0)
+
+    def GetNextChild(self, node, cookie):
+        self.visited += 1
+        if cookie < len(node.children):
+            return node.children[cookie], cookie + 1
+        return None, cookie
+
+    def ItemHasChildren(self, node):
+        return bool(node.children)
+
+    def GetItemPyData(self, node):
+        return node.handler
+
+    def SetItemImage(self, node, image):
+        node.image = image
+
+
+class TestNodeLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = _FakeTree()
+        self.controller = TreeController(self.tree, None, None)
+        self.suite, self.suite_data = object(), object()
+        self.test = object()
+        self.suite_node = self._add(self.tree._root, self.suite,
+                                    self.suite_data)
+        self.test_node = self._add(self.suite_node, self.test)
+
+    def _add(self, parent, controller, data=None):
+        node = parent.add(controller, data)
+        self.controller.register_node(node, node.handler)
+        return node
+
+    def test_find_by_controller(self):
+        assert_true(self.controller.find_node_by_controller(self.suite)
+                    is self.suite_node)
+        assert_true(self.controller.find_node_by_controller(self.test)
+                    is self.test_node)
+        assert_none(self.controller.find_node_by_controller(object()))
+
+    def test_find_by_data(self):
+        assert_true(self.controller.find_node_by_data(self.suite_data)
+                    is self.suite_node)
+        assert_none(self.controller.find_node_by_data(None))
+
+    def test_unregister_forgets_node_and_its_descendants(self):
+        self.controller.unregister_node(self.suite_node)
+        self.tree._root.children.remove(self.suite_node)
+        assert_none(self.controller.find_node_by_controller(self.suite))
+        assert_none(self.controller.find_node_by_controller(self.test))
+        assert_none(self.controller.find_node_by_data(self.suite_data))
+
+    def test_moved_node_is_found_from_new_position(self):
+        self.controller.unregister_node(self.test_node)
+        self.suite_node.children.remove(self.test_node)
+        other = self._add(self.tree._root, object())
+        moved = self._add(other, self.test)
+        assert_true(self.controller.find_node_by_controller(self.test)
+                    is moved)
+
+    def test_unregistering_old_node_does_not_forget_new_one(self):
+        new = self._add(self.tree._root, self.test)
+        self.controller.unregister_node(self.test_node)
+        assert_true(self.controller.find_node_by_controller(self.test) is new)
+
+    def test_node_with_replaced_handler_is_not_returned(self):
+        self.test_node.handler = _FakeHandler(object())
+        assert_none(self.controller.find_node_by_controller(self.test))
+
+    def test_clear_nodes(self):
+        self.controller.clear_nodes()
+        assert_none(self.controller.find_node_by_controller(self.suite))
+        assert_none(self.controller.find_node_by_data(self.suite_data))
+
+    def _add_suites_with_tests(self, suites=50, tests_per_suite=100):
+        tests = []
+        for _ in range(suites):
+            suite = self._add(self.tree._root, object(), object())
+            for _ in range(tests_per_suite):
+                test = object()
+                self._add(suite, test)
+                tests.append(test)
+        return tests
+
+    def test_lookups_do_not_walk_the_tree(self):
+        tests = self._add_suites_with_tests()
+        self.tree.visited = 0
+        for test in tests:
+            assert_true(self.controller.find_node_by_controller(test))
+        assert_equals(self.tree.visited, 0)
+
+    def _FLICKERS_measure_result_icon_updates_per_second(self):
+        tests = self._add_suites_with_tests()
+        start = time.time()
+        for test in tests:
+            self.tree.SetItemImage(
+                self.controller.find_node_by_controller(test), 1)
+        updates_per_second = len(tests) / max(time.time() - start, 1e-6)
+        assert_true(updates_per_second > 50000,
+                    '%d updates per second' % updates_per_second)
+
+
 class _BaseTreeControllerTest(object):
 
     def setUp(self):
@@ -0,0 +1,87 @@
+import unittest
+
+from robot.utils.asserts import assert_equals, assert_none
+
+from robotide.editor.grid import _GridHistory
+
+
+class TestGridHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.history = _GridHistory()
+
+    def _change(self, *cells, **config):
+        self.history.begin(config.get('coalesce', False))
+        for cell in cells:
+            self.history.record(*cell)
+        self.history.end()
+
+    def test_only_changed_cells_are_stored(self):
+        self._change((0, 0, 'a', 'b'), (0, 1, 'x', 'x'), (1, 0, '', 'c'))
+        assert_equals(self.history.back(), [(0, 0, 'a', 'b'), (1, 0, '', 'c')])
+        assert_none(self.history.back())
+
+    def test_cell_changed_many_times_keeps_original_value(self):
+        self._change((0, 0, 'a', 'b'), (0, 0, 'b', 'c'))
+        assert_equals(self.history.back(), [(0, 0, 'a', 'c')])
+
+    def test_changes_without_modifications_are_ignored(self):
+        self._change((0, 0, 'a', 'b'), (0, 0, 'b', 'a'))
+        assert_none(self.history.back())
+
+    def test_values_are_not_recorded_outside_changes(self):
+        self.history.record(0, 0, 'a', 'b')
+        assert_none(self.history.back())
+
+    def test_nested_changes_are_recorded_as_one(self):
+        self.history.begin()
+        self._change((0, 0, 'a', 'b'))
+        self.history.record(0, 1, 'c', 'd')
+        self.history.end()
+        assert_equals(self.history.back(), [(0, 0, 'a', 'b'), (0, 1, 'c', 'd')])
+        assert_none(self.history.back())
+
+    def test_back_and_forward(self):
+        self._change((0, 0, 'a', 'b'))
+        self._change((1, 1, 'c', 'd'))
+        assert_equals(self.history.back(), [(1, 1, 'c', 'd')])
+        assert_equals(self.history.back(), [(0, 0, 'a', 'b')])
+        assert_equals(self.history.forward(), [(0, 0, 'a', 'b')])
+        assert_equals(self.history.forward(), [(1, 1, 'c', 'd')])
+        assert_none(self.history.forward())
+
+    def test_new_change_clears_forward_history(self):
+        self._change((0, 0, 'a', 'b'))
+        self.history.back()
+        self._change((1, 1, 'c', 'd'))
+        assert_none(self.history.forward())
+
+    def test_consecutive_edits_of_same_cell_are_coalesced(self):
+        self._change((0, 0, 'a', 'b'), coalesce=True)
+        self._change((0, 0, 'b', 'c'), coalesce=True)
+        self._change((0, 1, 'x', 'y'), coalesce=True)
+        assert_equals(self.history.back(), [(0, 1, 'x', 'y')])
+        assert_equals(self.history.back(), [(0, 0, 'a', 'c')])
+        assert_none(self.history.back())
+
+    def test_only_single_cell_edits_are_coalesced(self):
+        self._change((0, 0, 'a', 'b'), (0, 1, 'c', 'd'))
+        self._change((0, 0, 'b', 'e'), coalesce=True)
+        assert_equals(self.history.back(), [(0, 0, 'b', 'e')])
+        assert_equals(len(self.history.back()), 2)
+
+    def test_oldest_changes_are_forgotten_when_over_budget(self):
+        history = self.history = _GridHistory(max_cells=5)
+        for row in range(4):
+            self._change((row, 0, 'a', 'b'), (row, 1, 'c', 'd'))
+        assert_equals([history.back()[0][0] for _ in range(2)], [3, 2])
+        assert_none(history.back())
+
+    def test_clear(self):
+        self._change((0, 0, 'a', 'b'))
+        self.history.clear()
+        assert_none(self.history.back())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ import unittest
 import random
 
 from robot.libraries.String import String
+from robot.utils.asserts import assert_true, assert_false
 
 
 from robotide.controller.cellinfo import CellInfo, ContentType, CellType,\
@@ -15,6 +16,7 @@ import wx
 
 
 class MockGrid(object):
+    NumberCols = 5
     SetCellTextColour = SetCellBackgroundColour = SetCellFont = lambda s, x, y, z: True
 
     def GetCellFont(self, x, y):
@@ -36,6 +38,9 @@ class ControllerWithCellInfo(object):
         return CellInfo(CellContent(self._get(self.content_types), self._get_data(), None),
                         CellPosition(self._get(self.cell_types), None))
 
+    def get_cell_infos(self, row, columns):
+        return [self.get_cell_info(row, col) for col in range(columns)]
+
     def _get(self, items):
         return items[random.randint(0, len(items)-1)]
 
@@ -51,8 +56,18 @@ class TestPerformance(unittest.TestCase):
 
     def test_colorizing_performance(self):
         colorizer = Colorizer(MockGrid(), ControllerWithCellInfo(), ColorizationSettings())
-        for _ in range(0, 500):
-            colorizer._colorize_cell(1,1, self._data[random.randint(0, 4)])
+        for _ in range(0, 100):
+            colorizer._colorize_row(1, self._data[random.randint(0, 4)])
+
+    def test_unchanged_rows_are_not_colored_again(self):
+        controller = ControllerWithCellInfo()
+        infos = controller.get_cell_infos(0, MockGrid.NumberCols)
+        controller.get_cell_infos = lambda row, columns: infos
+        colorizer = Colorizer(MockGrid(), controller, ColorizationSettings())
+        assert_true(colorizer._colorize_row(0, None))
+        assert_false(colorizer._colorize_row(0, None))
+        colorizer.invalidate()
+        assert_true(colorizer._colorize_row(0, None))
 
 
 if __name__ == '__main__':
@@ -2,7 +2,7 @@ import unittest
 import time
 from robot.utils.asserts import assert_none, assert_equals
 
-from robotide.namespace.cache import ExpiringCache
+from robotide.namespace.cache import ExpiringCache, DependencyCache
 
 
 class TestExpiringCache(unittest.TestCase):
@@ -21,5 +21,43 @@ class TestExpiringCache(unittest.TestCase):
         assert_equals('c', cache.get('a'))
 
 
+class TestDependencyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = DependencyCache()
+        self.cache.put('suite', 'suite kws', ['resource', 'inner resource'])
+        self.cache.put('other', 'other kws', ['other resource'])
+
+    def test_cache_hit(self):
+        assert_equals('suite kws', self.cache.get('suite'))
+
+    def test_invalidating_dependency(self):
+        self.cache.invalidate('inner resource')
+        assert_none(self.cache.get('suite'))
+        assert_equals('other kws', self.cache.get('other'))
+
+    def test_invalidating_key_itself(self):
+        self.cache.invalidate('suite')
+        assert_none(self.cache.get('suite'))
+        assert_equals(len(self.cache), 1)
+
+    def test_removed_dependencies_do_not_invalidate_value(self):
+        self.cache.put('suite', 'new suite kws', ['resource'])
+        self.cache.invalidate('inner resource')
+        assert_equals('new suite kws', self.cache.get('suite'))
+        self.cache.invalidate('resource')
+        assert_none(self.cache.get('suite'))
+
+    def test_volatile_values_are_removed_on_any_invalidation(self):
+        self.cache.put('unresolved', 'kws', volatile=True)
+        self.cache.invalidate('something else')
+        assert_none(self.cache.get('unresolved'))
+        assert_equals('suite kws', self.cache.get('suite'))
+
+    def test_clear(self):
+        self.cache.clear()
+        assert_equals(len(self.cache), 0)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import time
 import unittest
 from robotide.namespace.namespace import _Keywords
 from robot.utils.asserts import assert_true, assert_false, assert_equals
@@ -57,5 +58,50 @@ class TestKeywords(unittest.TestCase):
         assert_equals(kws.get('Collision!').arguments, [])
 
 
+class TestEmbeddedKeywords(unittest.TestCase):
+
+    def setUp(self):
+        self.kws = _Keywords([ItemMock('User ${name} logs in', [], 'res.a'),
+                              ItemMock('User ${name} logs out', [], 'res.b'),
+                              ItemMock('Useless ${x}', [], 'res.c'),
+                              ItemMock('${x} is ready', [], 'res.d'),
+                              ItemMock('\xc4ij\xe4 ${x}', [], 'res.e')])
+
+    def test_matching_with_literal_prefix(self):
+        assert_equals(self.kws.get('user john logs in').longname, 'res.a')
+        assert_equals(self.kws.get('USER john logs out').longname, 'res.b')
+        assert_equals(self.kws.get('Useless thing').longname, 'res.c')
+        assert_equals(self.kws.get('Then user john logs in').longname, 'res.a')
+
+    def test_matching_without_literal_prefix(self):
+        assert_equals(self.kws.get('System is ready').longname, 'res.d')
+
+    def test_matching_with_non_ascii_prefix(self):
+        assert_equals(self.kws.get('\xc4ij\xe4 foo').longname, 'res.e')
+
+    def test_only_keywords_with_matching_prefix_are_tried(self):
+        candidates = self.kws.embedded_keywords._candidates('user x logs in')
+        assert_equals(sorted(kw.longname for _, _, kw in candidates),
+                      ['res.a', 'res.b', 'res.d', 'res.e'])
+
+    def test_results_are_cached(self):
+        assert_false(self.kws.get('Nothing matches'))
+        cache = self.kws.embedded_keywords._cache
+        assert_equals(cache, {('Nothing matches', None): None})
+        assert_false(self.kws.get('Nothing matches'))
+        assert_equals(len(cache), 1)
+
+    def test_lookup_time_does_not_depend_on_number_of_embedded_keywords(self):
+        kws = _Keywords([ItemMock('Keyword %d with ${arg}' % i, [], 'l%d' % i)
+                         for i in range(2000)])
+        start_time = time.time()
+        for i in range(2000):
+            assert_false(kws.get('Unknown value %d' % i))
+            assert_false(kws.get('Unknown value %d' % i))
+        assert_equals(kws.get('keyword 1999 with x').longname, 'l1999')
+        elapsed = time.time() - start_time
+        assert_true(elapsed < 0.2, 'Finding keywords took %.2fs' % elapsed)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -2,7 +2,9 @@ import unittest
 import sys
 import os
 
-from robotide.namespace.cache import LibraryCache
+from robot.utils.asserts import assert_equals, assert_none, assert_true
+from robotide.namespace.cache import LibraryCache, _LibraryCache
+from robotide.spec.importpool import LibraryImportPool
 
 from resources import DATAPATH
 
@@ -24,6 +26,19 @@ class TestLibraryCache(unittest.TestCase):
     def test_importing_library_with_dictionary_arg(self):
         LibraryCache({}).add_library('ArgLib', [{'moi':'hoi'}, []])
 
+    def test_prefetching_libraries_with_import_pool(self):
+        pool = LibraryImportPool(size=2)
+        try:
+            cache = LibraryCache({}, import_pool=pool)
+            cache.prefetch_libraries([('TestLib', [], None),
+                                      ('ArgLib', ['foo'], 'MyLib')])
+            self._assert_keyword_in_keywords(
+                cache.get_library_keywords('TestLib'), 'Testlib Keyword')
+            kws = cache.get_library_keywords('ArgLib', ['foo'], 'MyLib')
+            assert_equals(set(kw.source for kw in kws), set(['MyLib']))
+        finally:
+            pool.close()
+
     def _create_cache_with_auto_imports(self, auto_import):
         settings = {'auto imports': [auto_import]}
         return LibraryCache(settings)
@@ -34,6 +49,48 @@ class TestLibraryCache(unittest.TestCase):
                 return
         raise AssertionError('Keyword %s not found in default keywords' % name)
 
+    def test_cache_statistics(self):
+        cache = LibraryCache({})
+        cache.get_library_keywords('TestLib')
+        cache.get_library_keywords('TestLib')
+        cache.get_library_keywords('TestLib', ['arg'])
+        assert_equals(cache.statistics,
+                      {'size': 2, 'hits': 1, 'misses': 2, 'evictions': 0})
+
+
+class TestLibraryKeywordCache(unittest.TestCase):
+
+    def test_mutable_arguments_in_key(self):
+        cache = _LibraryCache()
+        cache[('Lib', ({'a': [1, 2]}, [3]))] = 'value'
+        assert_equals(cache[('Lib', ({'a': [1, 2]}, [3]))], 'value')
+        assert_true(cache.has_key(('Lib', ({'a': (1, 2)}, (3,)))))
+        assert_none(cache.get(('Lib', ({'a': [1]}, [3]))))
+
+    def test_replacing_value(self):
+        cache = _LibraryCache()
+        cache[('Lib', ())] = 1
+        cache[('Lib', ())] = 2
+        assert_equals(cache[('Lib', ())], 2)
+        assert_equals(cache.get_library_names(), ['Lib'])
+
+    def test_unbounded_by_default(self):
+        cache = _LibraryCache()
+        for index in range(1000):
+            cache[('Lib%d' % index, ())] = index
+        assert_equals(cache.statistics['size'], 1000)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = _LibraryCache(max_size=2)
+        cache[('Lib1', ())] = 1
+        cache[('Lib2', ())] = 2
+        cache.get(('Lib1', ()))
+        cache[('Lib3', ())] = 3
+        assert_equals(sorted(cache.get_library_names()), ['Lib1', 'Lib3'])
+        assert_none(cache.get(('Lib2', ())))
+        assert_equals(cache.statistics,
+                      {'size': 2, 'hits': 1, 'misses': 1, 'evictions': 1})
+
 
 if __name__ == "__main__":
     unittest.main()
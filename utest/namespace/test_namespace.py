@@ -427,5 +427,137 @@ class TestResourceCache(_DataFileTest):
             second = self._res_cache.get_resource(imp.directory, imp.name.upper())
             assert_true(first is second)
 
+
+class TestKeywordCacheInvalidation(unittest.TestCase):
+
+    def setUp(self):
+        self.chief = construct_chief_controller(OCCURRENCES_PATH)
+        self.ns = self.chief._namespace
+        self.suite1 = get_ctrl_by_name('TestSuite1', self.chief.datafiles)
+        self.suite2 = get_ctrl_by_name('TestSuite2', self.chief.datafiles)
+        self.resource = get_ctrl_by_name(OCCURRENCES_RESOURCE_NAME,
+                                         self.chief.resources)
+
+    def test_keywords_stay_cached_when_unrelated_file_changes(self):
+        kws = self._keywords(self.suite2)
+        self.ns.update(self.suite1.data)
+        assert_true(kws is self._keywords(self.suite2))
+
+    def test_changing_imported_resource_expires_importing_files(self):
+        kws = self._keywords(self.suite2)
+        self.ns.update(self.resource.data)
+        assert_false(kws is self._keywords(self.suite2))
+
+    def test_changing_file_expires_its_own_keywords(self):
+        kws = self._keywords(self.suite2)
+        self.ns.update(self.suite2.data)
+        assert_false(kws is self._keywords(self.suite2))
+
+    def test_full_update_expires_all_keywords(self):
+        kws = self._keywords(self.suite2)
+        self.ns.update()
+        assert_false(kws is self._keywords(self.suite2))
+
+    def test_keyword_added_to_resource_is_found_from_importing_file(self):
+        assert_none(self.ns.find_keyword(self.suite2.data, 'New Keyword'))
+        self.resource.create_keyword('New Keyword')
+        assert_not_none(self.ns.find_keyword(self.suite2.data, 'New Keyword'))
+
+    def test_keyword_added_to_file_is_found(self):
+        assert_none(self.ns.find_keyword(self.suite2.data, 'New Keyword'))
+        self.suite2.create_keyword('New Keyword')
+        assert_not_none(self.ns.find_keyword(self.suite2.data, 'New Keyword'))
+
+    def test_creating_controller_does_not_update_namespace(self):
+        kws = self._keywords(self.suite2)
+        generation = self.ns.generation
+        DataController(self.suite2.data, self.chief)
+        assert_equals(self.ns.generation, generation)
+        assert_true(kws is self._keywords(self.suite2))
+
+    def test_replacing_datafile_updates_namespace(self):
+        kws = self._keywords(self.suite2)
+        self.suite2.set_datafile(self.suite2.data)
+        assert_false(kws is self._keywords(self.suite2))
+
+    def _keywords(self, ctrl):
+        return self.ns._retriever.get_keywords_cached(ctrl.data,
+                                                      self.ns._context_factory)
+
+
+class TestVariableSources(unittest.TestCase):
+
+    def setUp(self):
+        self.chief = construct_chief_controller(FINDWHEREUSED_VARIABLES_PATH)
+        self.ns = self.chief._namespace
+        self.suite1 = get_ctrl_by_name('Suite 1', self.chief.datafiles)
+        self.suite2 = get_ctrl_by_name('Suite 2', self.chief.datafiles)
+        self.resource = get_ctrl_by_name('Res1', self.chief.datafiles)
+
+    def test_variable_table_source(self):
+        self._assert_source(self.suite1, '${fileVar}', self.suite1)
+        self._assert_source(self.suite1, '${FILE_VAR}', self.suite1)
+
+    def test_resource_source(self):
+        self._assert_source(self.suite2, '${resVar}', self.resource)
+
+    def test_variable_file_source(self):
+        source = self.ns.get_variable_source(self.suite1.data, '${ServerHost}')
+        assert_equals(os.path.basename(source), 'vars.py')
+
+    def test_built_in_and_unknown_variables(self):
+        assert_equals(self.ns.get_variable_source(self.suite1.data, '${EMPTY}'),
+                      'built-in')
+        assert_none(self.ns.get_variable_source(self.suite2.data,
+                                                '${ServerHost}'))
+
+    def test_known_variables(self):
+        kw = self.resource.keywords[0]
+        assert_true(self.ns.is_known_variable(kw, '${arg1}'))
+        assert_true(self.ns.is_known_variable(kw, '${resVar}'))
+        assert_false(self.ns.is_known_variable(self.suite2.tests[0], '${arg1}'))
+
+    def test_variable_added_to_resource_is_visible_in_importing_file(self):
+        assert_none(self.ns.get_variable_source(self.suite2.data, '${new}'))
+        self.resource.variables.add_variable('${new}', 'value')
+        self._assert_source(self.suite2, '${new}', self.resource)
+
+    def test_renamed_variable(self):
+        variable = self.resource.variables[0]
+        variable.set_value('${renamed}', variable.value)
+        variable.notify_value_changed()
+        self._assert_source(self.suite2, '${renamed}', self.resource)
+        assert_none(self.ns.get_variable_source(self.suite2.data, '${resVar}'))
+
+    def test_changed_variable_file_expires_dependent_values(self):
+        retriever = self.ns._retriever
+        self.ns.get_variable_source(self.suite1.data, '${ServerHost}')
+        kws = retriever.get_keywords_cached(self.suite1.data,
+                                            self.ns._context_factory)
+        path = [p for p in retriever._variable_file_mtimes
+                if os.path.basename(p) == 'vars.py'][0]
+        generation = self.ns.generation
+        retriever._variable_file_mtimes[path] = -1
+        retriever._variable_files_checked = 0
+        assert_equals(self.ns.generation, generation + 1)
+        assert_none(retriever.variable_cache.get(self.suite1.data.source))
+        assert_none(retriever.keyword_cache.get(self.suite1.data.source))
+        assert_false(kws is retriever.get_keywords_cached(
+            self.suite1.data, self.ns._context_factory))
+
+    def test_unchanged_variable_files_are_checked_once_a_second(self):
+        retriever = self.ns._retriever
+        self.ns.get_variable_source(self.suite1.data, '${ServerHost}')
+        retriever._variable_files_checked = 0
+        assert_false(retriever.expire_changed_variable_files())
+        for path in retriever._variable_file_mtimes:
+            retriever._variable_file_mtimes[path] = -1
+        assert_false(retriever.expire_changed_variable_files())
+
+    def _assert_source(self, ctrl, name, source_ctrl):
+        assert_equals(self.ns.get_variable_source(ctrl.data, name),
+                      source_ctrl.data.source)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,3 +1,4 @@
+import os
 import time
 import unittest
 
@@ -7,7 +8,8 @@ from robotide.controller.chiefcontroller import ChiefController
 
 from resources import MessageRecordingLoadObserver, FakeSettings
 from datafilereader import TESTCASEFILE_WITH_EVERYTHING, KW1000_TESTCASEFILE,\
-    KW2000_TESTCASEFILE, KW3000_TESTCASEFILE, KW4000_TESTCASEFILE
+    KW2000_TESTCASEFILE, KW3000_TESTCASEFILE, KW4000_TESTCASEFILE,\
+    construct_chief_controller, get_ctrl_by_name
 
 
 class TestNamespacePerformance(unittest.TestCase):
@@ -24,6 +26,41 @@ class TestNamespacePerformance(unittest.TestCase):
         end_time = self._execute_keyword_find_function_n_times('is_library_keyword', times)
         assert_true(end_time < 0.5, 'Checking %d kws took too long: %fs.' % (times, end_time))
 
+    def test_keyword_find_performance_while_editing_other_files(self):
+        chief = construct_chief_controller(os.path.dirname(KW4000_TESTCASEFILE))
+        ns = chief._namespace
+        searched = get_ctrl_by_name('Suite Kw4000', chief.datafiles).data
+        edited = get_ctrl_by_name('Suite Kw1000', chief.datafiles).data
+        times = 2000
+        self._find_keywords(ns, searched, times)
+        baseline = self._find_keywords(ns, searched, times)
+        end_time = self._find_keywords(ns, searched, times, edited)
+        # Rebuilding the cache of the searched file takes about as long as
+        # all the searches, so expiring it on every update is a lot slower.
+        limit = max(10 * baseline, 0.2)
+        assert_true(end_time < limit, 'Finding %d kws took too long: %fs, '
+                    'without editing %fs.' % (times, end_time, baseline))
+
+    def _find_keywords(self, ns, searched, times, edited=None):
+        start_time = time.time()
+        for i in range(times):
+            if edited and i % 10 == 0:
+                ns.update(edited)
+            ns.find_keyword(searched, 'My Keyword %d' % i)
+        return time.time() - start_time
+
+    def test_unknown_variable_check_performance(self):
+        chief = construct_chief_controller(TESTCASEFILE_WITH_EVERYTHING)
+        test = chief.datafiles[0].tests[0]
+        namespace = test.get_local_namespace()
+        times = 2000
+        start_time = time.time()
+        for i in range(times):
+            namespace.has_name('${unknown variable %d}' % i)
+        end_time = time.time() - start_time
+        assert_true(end_time < 0.5, 'Checking %d variables took too long: '
+                    '%fs.' % (times, end_time))
+
     def _FLICKERS_measure_user_keyword_find_performance(self):
         times = 1000
         kw1000_result = self._execute_keyword_find_function_n_times('is_user_keyword', times, KW1000_TESTCASEFILE)
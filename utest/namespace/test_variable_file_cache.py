@@ -0,0 +1,134 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+from robot.errors import DataError
+from robot.utils.asserts import assert_equals, assert_raises, assert_true
+from robotide.namespace.cache import VariableFileCache
+from robotide.spec.importpool import LibraryImportPool
+
+
+VARIABLE_FILE = '''
+import os
+
+def get_variables(value='default'):
+    counter = os.path.join(os.path.dirname(__file__), 'counter.txt')
+    with open(counter, 'a') as output:
+        output.write('x')
+    return {'VALUE': value, 'MODULE': os}
+'''
+
+SLOW_VARIABLE_FILE = '''
+import time
+time.sleep(10)
+VALUE = 1
+'''
+
+
+class _VariableFileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._path = self._write('vars.py', VARIABLE_FILE)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _write(self, name, content, mtime=1000000000):
+        path = os.path.join(self._dir, name)
+        with open(path, 'w') as varfile:
+            varfile.write(content)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    @property
+    def _evaluations(self):
+        with open(os.path.join(self._dir, 'counter.txt')) as counter:
+            return len(counter.read())
+
+    def _get(self, cache, *args):
+        return dict(cache.get_variables(self._path, list(args)))
+
+
+class TestVariableFileCache(_VariableFileTestCase):
+
+    def setUp(self):
+        _VariableFileTestCase.setUp(self)
+        self.cache = VariableFileCache()
+
+    def test_variables(self):
+        assert_equals(self._get(self.cache)['${VALUE}'], 'default')
+        assert_equals(self._get(self.cache, 'arg')['${VALUE}'], 'arg')
+
+    def test_unchanged_file_is_evaluated_once(self):
+        for _ in range(3):
+            self._get(self.cache)
+        assert_equals(self._evaluations, 1)
+
+    def test_arguments_are_part_of_key(self):
+        self._get(self.cache, 'a')
+        self._get(self.cache, 'b')
+        self._get(self.cache, 'a')
+        assert_equals(self._evaluations, 2)
+        assert_equals(len(self.cache), 2)
+
+    def test_failures_are_cached(self):
+        path = self._write('invalid.py', 'raise RuntimeError("fail")')
+        for _ in range(2):
+            assert_raises(DataError, self.cache.get_variables, path, [])
+        assert_equals(len(self.cache), 1)
+        self._write('invalid.py', 'VALUE = 1', mtime=1000000010)
+        assert_equals(dict(self.cache.get_variables(path, [])),
+                      {'${VALUE}': 1})
+
+    def test_non_existing_file(self):
+        path = os.path.join(self._dir, 'nonex.py')
+        assert_raises(DataError, self.cache.get_variables, path, [])
+
+
+class TestVariableFileCacheWithImportPool(_VariableFileTestCase):
+
+    def setUp(self):
+        _VariableFileTestCase.setUp(self)
+        self.pool = LibraryImportPool(size=1, timeout=5)
+        self.cache = VariableFileCache(self.pool)
+
+    def tearDown(self):
+        self.pool.close()
+        _VariableFileTestCase.tearDown(self)
+
+    def test_variables_are_evaluated_in_subprocess(self):
+        modules = set(sys.modules)
+        variables = self._get(self.cache, 'arg')
+        assert_equals(variables['${VALUE}'], 'arg')
+        assert_true(isinstance(variables['${MODULE}'], basestring))
+        assert_equals(set(sys.modules) - modules, set())
+        self._get(self.cache, 'arg')
+        assert_equals(self._evaluations, 1)
+
+    def test_changed_file_is_evaluated_again(self):
+        self._get(self.cache)
+        self._write('vars.py', VARIABLE_FILE.replace('default', 'changed'),
+                    mtime=1000000010)
+        assert_equals(self._get(self.cache)['${VALUE}'], 'changed')
+        assert_equals(self._evaluations, 2)
+        assert_equals(len(self.cache), 1)
+
+    def test_failures_are_reported(self):
+        path = self._write('invalid.py', 'raise RuntimeError("fail")')
+        assert_raises(DataError, self.cache.get_variables, path, [])
+
+    def test_hanging_variable_file_times_out(self):
+        pool = LibraryImportPool(size=1, timeout=0.5)
+        try:
+            path = self._write('slow.py', SLOW_VARIABLE_FILE)
+            assert_raises(DataError,
+                          VariableFileCache(pool).get_variables, path, [])
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
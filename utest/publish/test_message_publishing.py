@@ -12,12 +12,16 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+from __future__ import with_statement
+
+import threading
 import unittest
 
 from robot.utils.asserts import assert_equals, assert_raises_with_msg,\
     assert_true
 
-from robotide.publish import RideMessage, RideLogMessage, RideLogException, Publisher
+from robotide.publish import RideMessage, RideLogMessage, RideLogException, Publisher,\
+    PUBLISHER
 
 
 _ARGS_ERROR = "Argument mismatch, expected: ['foo', 'bar']"
@@ -93,6 +97,25 @@ class TestPublisher(unittest.TestCase):
         pub.publish('test.message', 'content')
         assert_equals(self._msg, 'content')
 
+    def test_listeners_of_parent_topics_get_message(self):
+        pub = Publisher()
+        received = []
+        pub.subscribe(lambda data: received.append(('child', data)),
+                      'test.message')
+        pub.subscribe(lambda data: received.append(('parent', data)), 'test')
+        pub.subscribe(lambda data: received.append(('other', data)),
+                      'test.other')
+        pub.publish('test.message', 'content')
+        assert_equals(received, [('child', 'content'), ('parent', 'content')])
+
+    def test_unsubscribed_listener_does_not_get_messages(self):
+        pub = Publisher()
+        pub.subscribe(self._listener, 'test.message')
+        pub.unsubscribe(self._listener, 'test.message')
+        pub.publish('test.message', 'content')
+        assert_equals(self._msg, '')
+        assert_equals(pub._topics, {})
+
     def _listener(self, data):
         self._msg = data
 
@@ -100,5 +123,94 @@ class TestPublisher(unittest.TestCase):
         self._msg = data
         raise RuntimeError(data)
 
+
+class TestTransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.pub = Publisher()
+        self.received = []
+        self.pub.subscribe(self.received.append, RideTestMessage)
+
+    def _publish(self, foo, bar=None):
+        self.pub.publish(RideTestMessage.topic,
+                         RideTestMessageWithAttrs(foo=foo, bar=bar))
+
+    def test_messages_are_delivered_at_end_of_transaction(self):
+        with self.pub.transaction():
+            self._publish('a')
+            assert_equals(self.received, [])
+        assert_equals([msg.foo for msg in self.received], ['a'])
+
+    def test_identical_messages_are_coalesced(self):
+        with self.pub.transaction():
+            for item in ['a', 'b', 'a', 'a', 'b', 'c']:
+                self._publish(item)
+        assert_equals([msg.foo for msg in self.received], ['a', 'b', 'c'])
+        stats = self.pub.statistics['my.topic']
+        assert_equals((stats.published, stats.coalesced, stats.delivered),
+                      (6, 3, 3))
+
+    def test_messages_with_different_attributes_are_not_coalesced(self):
+        with self.pub.transaction():
+            self._publish('a', 'x')
+            self._publish('a', 'y')
+        assert_equals([msg.bar for msg in self.received], ['x', 'y'])
+
+    def test_nested_transactions(self):
+        with self.pub.transaction():
+            with self.pub.transaction():
+                self._publish('a')
+            self._publish('a')
+            assert_equals(self.received, [])
+        assert_equals(len(self.received), 1)
+
+    def test_messages_are_delivered_when_transaction_fails(self):
+        try:
+            with self.pub.transaction():
+                self._publish('a')
+                raise RuntimeError()
+        except RuntimeError:
+            pass
+        assert_equals(len(self.received), 1)
+        self._publish('b')
+        assert_equals(len(self.received), 2)
+
+    def test_transactions_do_not_delay_messages_of_other_threads(self):
+        with self.pub.transaction():
+            thread = threading.Thread(target=self._publish, args=('a',))
+            thread.start()
+            thread.join()
+            assert_equals([msg.foo for msg in self.received], ['a'])
+            self._publish('b')
+        assert_equals([msg.foo for msg in self.received], ['a', 'b'])
+
+
+class TestBackgroundListeners(unittest.TestCase):
+
+    def test_background_listener_is_called_in_other_thread(self):
+        pub = Publisher()
+        threads = []
+        pub.subscribe(lambda data: threads.append(threading.currentThread()),
+                      'test.message', background=True)
+        pub.publish('test.message', 'content')
+        pub.wait_for_background_listeners()
+        assert_equals(len(threads), 1)
+        assert_true(threads[0] is not threading.currentThread())
+
+    def test_errors_in_background_listeners_are_logged(self):
+        pub = Publisher()
+        errors = []
+        def listener(data):
+            raise RuntimeError('failed')
+        pub.subscribe(listener, 'test.message', background=True)
+        PUBLISHER.subscribe(errors.append, RideLogException)
+        try:
+            pub.publish('test.message', 'content')
+            pub.wait_for_background_listeners()
+        finally:
+            PUBLISHER.unsubscribe(errors.append, RideLogException)
+        assert_equals(len(errors), 1)
+        assert_true('failed' in errors[0].message)
+
 if __name__ == '__main__':
     unittest.main()
@@ -21,11 +21,14 @@ class MessageRecordingLoadObserver(object):
         self._log = ''
         self.finished = False
         self.notified = False
+        self.progress = []
 
-    def notify(self):
+    def notify(self, message=None):
         if self.finished:
             raise RuntimeError('Notified after finished')
         self.notified = True
+        if message:
+            self.progress.append(message)
 
     def finish(self):
         self.finished = True
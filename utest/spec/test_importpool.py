@@ -0,0 +1,139 @@
+from __future__ import with_statement
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+from robot.errors import DataError
+from robot.utils.asserts import assert_equals, assert_raises, assert_true
+from robotide.spec import LibrarySpec
+from robotide.spec.importpool import LibraryImportPool
+
+from resources import DATAPATH
+sys.path.append(os.path.join(DATAPATH, 'libs'))
+
+
+SLOW_LIBRARY = '''
+import time
+time.sleep(%s)
+
+def slow_keyword():
+    pass
+'''
+
+
+class TestLibraryImportPool(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        sys.path.insert(0, self._dir)
+        self._pool = LibraryImportPool(size=3, timeout=5)
+
+    def tearDown(self):
+        self._pool.close()
+        sys.path.remove(self._dir)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def test_keywords_are_same_as_when_imported_to_ride(self):
+        self._assert_same_keywords(LibrarySpec('TestLib'),
+                                   LibrarySpec('TestLib', import_pool=self._pool))
+
+    def test_library_with_arguments_and_alias(self):
+        args = ['val', 'WITH NAME', 'MyLib']
+        self._assert_same_keywords(LibrarySpec('ArgLib', args),
+                                   LibrarySpec('ArgLib', args, self._pool))
+
+    def test_library_by_path(self):
+        self._assert_same_keywords(LibrarySpec('sub/libsi.py'),
+                                   LibrarySpec('sub/libsi.py',
+                                               import_pool=self._pool))
+
+    def test_library_is_not_imported_to_ride(self):
+        self._create_library('NotImportedLib', 0)
+        LibrarySpec('NotImportedLib', import_pool=self._pool)
+        assert_true('NotImportedLib' not in sys.modules)
+
+    def test_failing_import(self):
+        assert_raises(DataError, self._pool.import_library, 'NonExisting')
+
+    def test_falling_back_to_spec_file_when_import_fails(self):
+        spec = LibrarySpec('LibSpecLibrary', import_pool=self._pool)
+        assert_equals(len(spec.keywords), 3)
+
+    def test_pythonpath_changes_reach_running_workers(self):
+        pool = LibraryImportPool(size=1, timeout=5)
+        new_dir = os.path.join(self._dir, 'new')
+        os.mkdir(new_dir)
+        with open(os.path.join(new_dir, 'NewPathLib.py'), 'w') as lib:
+            lib.write('def new_keyword():\n    pass\n')
+        try:
+            assert_true(pool.import_library('TestLib'))
+            sys.path.insert(0, new_dir)
+            assert_true('New Keyword' in pool.import_library('NewPathLib'))
+        finally:
+            sys.path.remove(new_dir)
+            pool.close()
+
+    def test_hanging_import_times_out(self):
+        pool = LibraryImportPool(size=1, timeout=0.5)
+        self._create_library('HangingLib', 10)
+        try:
+            assert_raises(DataError, pool.import_library, 'HangingLib')
+            assert_true(pool.import_library('TestLib'))
+        finally:
+            pool.close()
+
+    def test_libraries_are_imported_in_parallel(self):
+        for index in range(3):
+            self._create_library('SlowLib%d' % index, 1)
+        start_time = time.time()
+        for index in range(3):
+            self._pool.start_import('SlowLib%d' % index)
+        for index in range(3):
+            self._pool.import_library('SlowLib%d' % index)
+        elapsed = time.time() - start_time
+        assert_true(elapsed < 2.5, 'Importing took %.2fs' % elapsed)
+
+    def test_finished_imports_are_not_pending(self):
+        self._pool.import_library('TestLib')
+        self._pool.start_import('ArgLib', ['unused']).result()
+        assert_equals(self._pool._pending, {})
+        assert_equals(self._pool._unused.keys(),
+                      [('library', 'ArgLib', repr(['unused']))])
+
+    def test_prefetched_result_is_used_once(self):
+        prefetched = self._pool.start_import('TestLib')
+        prefetched.result()
+        assert_true(self._pool._start('library', 'TestLib', None, used=True)
+                    is prefetched)
+        assert_equals(self._pool._unused, {})
+
+    def test_number_of_unused_results_is_limited(self):
+        pool = LibraryImportPool(size=1, max_unused=2)
+        try:
+            for index in range(4):
+                pool.start_import('ArgLib', [str(index)]).result()
+            assert_equals(sorted(args for _, _, args in pool._unused),
+                          [repr(['2']), repr(['3'])])
+        finally:
+            pool.close()
+
+    def _create_library(self, name, import_time):
+        with open(os.path.join(self._dir, name + '.py'), 'w') as lib:
+            lib.write(SLOW_LIBRARY % import_time)
+
+    def _assert_same_keywords(self, exp_spec, act_spec):
+        assert_equals(exp_spec.doc, act_spec.doc)
+        assert_equals(len(exp_spec.keywords), len(act_spec.keywords))
+        for exp, act in zip(sorted(exp_spec.keywords),
+                            sorted(act_spec.keywords)):
+            assert_equals(exp, act)
+            assert_equals(exp.doc, act.doc)
+            assert_equals(exp.arguments, act.arguments)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,9 +3,10 @@ import os
 import unittest
 from robot.running import TestLibrary
 from robot.parsing.model import UserKeyword, KeywordTable
-from robot.utils.asserts import assert_true, assert_equals
+from robot.utils.asserts import assert_true, assert_false, assert_equals
 
-from robotide.spec.iteminfo import LibraryKeywordInfo, TestCaseUserKeywordInfo, VariableInfo, ResourceUserKeywordInfo
+from robotide.spec.iteminfo import LibraryKeywordInfo, TestCaseUserKeywordInfo, VariableInfo, ResourceUserKeywordInfo,\
+    StoredLibraryKeywordInfo
 
 
 testlibpath = os.path.join(os.path.dirname(__file__), '..', 'resources', 'robotdata', 'libs')
@@ -47,6 +48,59 @@ class TestKeywordInfo(unittest.TestCase):
         kw_info = ResourceUserKeywordInfo(uk)
         self.assertEquals(kw_info.longname, 'resource.UK')
 
+    def test_doc_and_shortdoc(self):
+        uk = UserKeyword(_FakeTestCaseFile(), 'UK')
+        uk.doc.value = '  First line\\nSecond line  '
+        kw_info = TestCaseUserKeywordInfo(uk)
+        assert_equals(kw_info.doc, 'First line\nSecond line')
+        assert_equals(kw_info.shortdoc, 'First line')
+        uk.doc.value = ''
+        assert_equals(kw_info.shortdoc, '')
+
+    def test_user_keyword_doc_is_unescaped_only_when_changed(self):
+        uk = UserKeyword(_FakeTestCaseFile(), 'UK')
+        uk.doc.value = 'Doc'
+        kw_info = TestCaseUserKeywordInfo(uk)
+        assert_true(kw_info.doc is kw_info.doc)
+        uk.doc.value = 'New\\ndoc'
+        assert_equals(kw_info.doc, 'New\ndoc')
+
+    def test_stored_keyword_doc(self):
+        kw_info = StoredLibraryKeywordInfo('KW', '\nDoc\nMore', ['a'], 'Lib')
+        assert_equals(kw_info.doc, 'Doc\nMore')
+        assert_equals(kw_info.shortdoc, 'Doc')
+        assert_equals(kw_info.arguments, ['a'])
+
+    def test_user_keyword_infos_are_shared(self):
+        uk = UserKeyword(KeywordTable(_FakeResourceFile()), 'UK')
+        kw_info = ResourceUserKeywordInfo.for_keyword(uk)
+        assert_true(ResourceUserKeywordInfo.for_keyword(uk) is kw_info)
+        uk.name = 'Renamed'
+        renamed = ResourceUserKeywordInfo.for_keyword(uk)
+        assert_equals(renamed.name, 'Renamed')
+        assert_equals(kw_info.name, 'UK')
+
+
+class TestKeywordInfoMemory(unittest.TestCase):
+
+    def test_keyword_infos_are_compact(self):
+        infos = [StoredLibraryKeywordInfo('Keyword %d' % i, 'Doc %d' % i,
+                                          ['arg', 'default=1'], 'Library')
+                 for i in range(20000)]
+        assert_false(hasattr(infos[0], '__dict__'))
+        assert_false(hasattr(infos[0].item, '__dict__'))
+        size = sum(sys.getsizeof(info) + sys.getsizeof(info.item)
+                   for info in infos) / len(infos)
+        assert_true(size < 200, 'Keyword info takes %d bytes' % size)
+        assert_true(infos[0].item.arguments[0] is infos[1].item.arguments[0])
+        assert_true(infos[0].source is infos[1].source)
+
+    def test_ascii_unicode_strings_are_shared(self):
+        first = StoredLibraryKeywordInfo('KW', '', [u'\xe4rg'], u'Lib')
+        second = StoredLibraryKeywordInfo('KW', '', [u'\xe4rg'], u'Lib')
+        assert_equals(first.arguments, [u'\xe4rg'])
+        assert_true(first.source is second.source)
+
 
 class TestVariableInfo(unittest.TestCase):
 
@@ -0,0 +1,186 @@
+import time
+import unittest
+
+from robot.utils.asserts import assert_equals, assert_true
+
+from robotide.spec.keywordindex import KeywordSearchIndex
+
+
+class Keyword(object):
+
+    def __init__(self, name, source, doc=''):
+        self.name = name
+        self.source = source
+        self.doc = doc
+
+    def is_user_keyword(self):
+        return '.' in self.source
+
+
+KEYWORDS = [Keyword('Should Be Equal', 'BuiltIn', 'Fails if objects differ.'),
+            Keyword('get bar', 'resource.txt', 'Getting bar'),
+            Keyword('get bar2', 'resource2.txt', 'Getting bar'),
+            Keyword('Get File', 'OperatingSystem', 'Returns a Bar file.'),
+            Keyword('Bar', 'OBarsystem', 'Doc'),
+            Keyword('BarBar', 'OBarBarSystem', 'Doc'),
+            Keyword('Foo Bar', 'resource.txt', 'Doc'),
+            Keyword('User Keyword', 'resource.html', 'Quux')]
+
+
+class TestKeywordSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = KeywordSearchIndex()
+        self.index.update(KEYWORDS)
+
+    def test_empty_pattern_matches_all_in_name_order(self):
+        assert_equals(self._search(''), ['Bar', 'BarBar', 'Foo Bar', 'get bar',
+                                         'get bar2', 'Get File',
+                                         'Should Be Equal', 'User Keyword'])
+
+    def test_results_are_ranked(self):
+        assert_equals(self._search('bar'), ['Bar', 'BarBar', 'Foo Bar',
+                                            'get bar', 'get bar2', 'Get File'])
+
+    def test_name_and_pattern_are_normalized(self):
+        assert_equals(self._search('Be EQUAL'), ['Should Be Equal'])
+        assert_equals(self._search('shouldbe'), ['Should Be Equal'])
+
+    def test_doc_search(self):
+        assert_equals(self._search('objects'), ['Should Be Equal'])
+        assert_equals(self._search('objects', search_docs=False), [])
+        assert_equals(self._search('quux'), ['User Keyword'])
+
+    def test_short_patterns(self):
+        assert_equals(self._search('q'), ['Should Be Equal', 'User Keyword'])
+        assert_equals(self._search('e', search_docs=False),
+                      ['Should Be Equal', 'get bar', 'get bar2', 'Get File',
+                       'User Keyword'])
+
+    def test_fuzzy_matches_come_last(self):
+        assert_equals(self._search('gtfl'), ['Get File'])
+        assert_equals(self._search('getb'), ['get bar', 'get bar2'])
+        assert_equals(self._search('oba', search_docs=False),
+                      ['Foo Bar', 'Should Be Equal'])
+
+    def test_accept(self):
+        accept = lambda kw: kw.source.endswith('.txt')
+        assert_equals(self._search('bar', accept=accept),
+                      ['Foo Bar', 'get bar', 'get bar2'])
+
+    def test_limit(self):
+        assert_equals(self._search('bar', limit=2), ['Bar', 'BarBar'])
+
+    def test_pattern_with_spaces_and_case(self):
+        index = KeywordSearchIndex()
+        index.update([Keyword('start Da ta end', 'source.txt',
+                              'some dO c here')])
+        assert_equals(len(index.search('data', search_docs=False)), 1)
+        assert_equals(index.search('no match'), [])
+        assert_equals(len(index.search('doc')), 1)
+        assert_equals(index.search('doc', search_docs=False), [])
+
+    def test_pattern_with_source_filter(self):
+        accept = lambda kw: kw.source == 'resource.txt'
+        assert_equals(self._search('', accept=accept), ['Foo Bar', 'get bar'])
+        assert_equals(self._search('getting', accept=accept), ['get bar'])
+        assert_equals(self._search('getting', accept=lambda kw: False), [])
+
+    def test_only_changed_sources_are_reindexed(self):
+        sources = dict(self.index._sources)
+        new = Keyword('New Keyword', 'resource.txt')
+        self.index.update(KEYWORDS[1:] + [new])
+        assert_true('BuiltIn' not in self.index._sources)
+        for name, source in self.index._sources.items():
+            if name == 'resource.txt':
+                assert_true(source is not sources[name])
+            else:
+                assert_true(source is sources[name])
+        assert_equals(self._search('newkey'), ['New Keyword'])
+        assert_equals(self._search('equal'), [])
+
+    def test_replaced_keywords_are_reindexed(self):
+        renamed = Keyword('Renamed', 'resource.txt')
+        self.index.update([kw for kw in KEYWORDS if kw.name != 'Foo Bar'] +
+                          [renamed])
+        assert_equals(self._search('foo'), [])
+        assert_equals(self._search('renamed'), ['Renamed'])
+
+    def test_edited_user_keyword_documentation_is_reindexed(self):
+        KEYWORDS[7].doc = 'Edited'
+        try:
+            self.index.update(KEYWORDS)
+            assert_equals(self._search('edited'), ['User Keyword'])
+            assert_equals(self._search('quux'), [])
+        finally:
+            KEYWORDS[7].doc = 'Quux'
+
+    def test_library_keyword_documentation_is_read_only_when_indexed(self):
+        reads = []
+        class CountingDoc(Keyword):
+            def doc(self):
+                reads.append(self.name)
+                return ''
+            doc = property(doc, lambda self, value: None)
+        library = [CountingDoc('Library Keyword', 'Library')]
+        self.index.update(library, 'other.txt')
+        self.index.update(library, 'third.txt')
+        self.index.update(library, 'other.txt')
+        assert_equals(reads, ['Library Keyword'])
+
+    def test_datafiles_are_updated_separately(self):
+        self.index.update([Keyword('Own Keyword', 'other.txt'), KEYWORDS[0]],
+                          'other.txt')
+        self.index.update([], None)
+        assert_equals(self._search(''), ['Own Keyword', 'Should Be Equal'])
+        assert_equals(self.index.sources, ['BuiltIn', 'other.txt'])
+
+    def test_removing_datafile(self):
+        self.index.update([KEYWORDS[0]], 'other.txt')
+        self.index.remove_datafile(None)
+        assert_equals(self._search(''), ['Should Be Equal'])
+        self.index.remove_datafile('other.txt')
+        assert_equals(self._search(''), [])
+        assert_equals(self.index.datafiles, [])
+
+    def test_shared_source_is_indexed_once_per_update(self):
+        self.index.update_datafiles([('first.txt', KEYWORDS[6:7]),
+                                     ('second.txt', KEYWORDS[6:7])])
+        source = self.index._sources['resource.txt']
+        self.index.update_datafiles([('second.txt', KEYWORDS[6:7])])
+        assert_true(self.index._sources['resource.txt'] is source)
+
+    def _search(self, pattern, search_docs=True, accept=None, limit=None):
+        return [kw.name for kw in
+                self.index.search(pattern, search_docs, accept, limit)]
+
+
+class TestKeywordSearchIndexPerformance(unittest.TestCase):
+
+    def setUp(self):
+        self.keywords = [Keyword('Library Keyword %d Number %d' % (i, i % 97),
+                                 'Library%d' % (i % 50),
+                                 'Documentation of keyword %d. ' % i * 20)
+                         for i in range(20000)]
+        self.index = KeywordSearchIndex()
+        self.index.update(self.keywords)
+
+    def test_searching_is_fast(self):
+        start_time = time.time()
+        for pattern in ['l', 'li', 'lib', 'libr', 'libra', 'library',
+                        'keyword1', 'keyword12', 'keyword123', 'number9']:
+            results = self.index.search(pattern, limit=100)
+        elapsed = time.time() - start_time
+        assert_equals(len(results), 100)
+        assert_true(elapsed < 2, 'Searching took %.2fs' % elapsed)
+
+    def test_updating_one_source_is_fast(self):
+        keywords = self.keywords[1:]
+        start_time = time.time()
+        self.index.update(keywords)
+        elapsed = time.time() - start_time
+        assert_true(elapsed < 0.5, 'Updating took %.2fs' % elapsed)
+
+
+if __name__ == '__main__':
+    unittest.main()
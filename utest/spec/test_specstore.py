@@ -0,0 +1,213 @@
+from __future__ import with_statement
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+from robot.utils.asserts import assert_equals, assert_none, assert_true
+from robotide.spec import LibrarySpec
+from robotide.spec.specstore import LibrarySpecStore, find_library_source
+from robotide.spec.iteminfo import StoredLibraryKeywordInfo
+from robotide.namespace.cache import LibraryCache
+
+from resources import DATAPATH
+sys.path.append(os.path.join(DATAPATH, 'libs'))
+
+
+LIBRARY_TEMPLATE = '''
+import time
+time.sleep(%(import_time)s)
+
+%(keywords)s
+'''
+
+KEYWORD_TEMPLATE = '''
+def keyword_%(index)d(arg, default=%(index)d, *varargs):
+    """Documentation for keyword %(index)d.
+
+    More documentation.
+    """
+'''
+
+
+class _SpecStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._libname = 'GeneratedLib%s' % id(self)
+        self._libpath = os.path.join(self._dir, self._libname + '.py')
+        sys.path.insert(0, self._dir)
+        self._store = LibrarySpecStore(os.path.join(self._dir, 'specs.db'))
+
+    def tearDown(self):
+        sys.path.remove(self._dir)
+        sys.modules.pop(self._libname, None)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _write_library(self, keyword_count=2, import_time=0):
+        keywords = ''.join(KEYWORD_TEMPLATE % {'index': i}
+                           for i in range(keyword_count))
+        with open(self._libpath, 'w') as lib:
+            lib.write(LIBRARY_TEMPLATE % {'import_time': import_time,
+                                          'keywords': keywords})
+        sys.modules.pop(self._libname, None)
+        for ext in 'c', 'o':
+            if os.path.exists(self._libpath + ext):
+                os.remove(self._libpath + ext)
+
+
+class TestLibrarySpecStore(_SpecStoreTest):
+
+    def test_finding_library_source_from_pythonpath(self):
+        self._write_library()
+        assert_equals(find_library_source(self._libname),
+                      os.path.normcase(self._libpath))
+
+    def test_finding_library_source_by_path(self):
+        self._write_library()
+        assert_equals(find_library_source(self._libpath),
+                      os.path.normcase(self._libpath))
+
+    def test_source_of_unknown_library_is_not_found(self):
+        assert_none(find_library_source('NonExistingLibrary'))
+
+    def test_missing_library_is_not_in_store(self):
+        self._write_library()
+        assert_none(self._store.get(self._libname))
+
+    def test_stored_keywords_are_returned_without_import(self):
+        self._write_library()
+        self._store_library()
+        sys.modules.pop(self._libname, None)
+        kws = self._store.get(self._libname)
+        assert_true(self._libname not in sys.modules)
+        assert_equals(len(kws), 2)
+        assert_true(all(isinstance(kw, StoredLibraryKeywordInfo) for kw in kws))
+
+    def test_stored_keywords_equal_imported_ones(self):
+        self._write_library()
+        imported = self._store_library()
+        stored = sorted(self._store.get(self._libname))
+        for exp, act in zip(sorted(imported), stored):
+            assert_equals(exp, act)
+            assert_equals(exp.doc, act.doc)
+            assert_equals(exp.shortdoc, act.shortdoc)
+            assert_equals(exp.arguments, act.arguments)
+            assert_equals(exp.details, act.details)
+            assert_true(act.is_library_keyword())
+
+    def test_non_ascii_keyword_data_is_stored(self):
+        self._write_library()
+        kw = StoredLibraryKeywordInfo(u'Keyword \xe4', u'Doc \u2603',
+                                      [u'arg=\xe4'], self._libname)
+        self._store.put(self._libname, None, [kw])
+        stored = self._store.get(self._libname)[0]
+        assert_equals((stored.name, stored.doc, stored.arguments),
+                      (kw.name, kw.doc, kw.arguments))
+
+    def test_library_arguments_are_part_of_key(self):
+        self._write_library()
+        self._store_library()
+        assert_none(self._store.get(self._libname, ['arg']))
+
+    def test_store_is_invalidated_when_library_changes(self):
+        self._write_library()
+        self._store_library()
+        self._write_library(keyword_count=3)
+        os.utime(self._libpath, (time.time() + 10, time.time() + 10))
+        assert_none(self._store.get(self._libname))
+
+    def test_touching_library_does_not_invalidate_store(self):
+        self._write_library()
+        self._store_library()
+        os.utime(self._libpath, (time.time() + 10, time.time() + 10))
+        assert_equals(len(self._store.get(self._libname)), 2)
+
+    def test_store_persists_between_instances(self):
+        self._write_library()
+        self._store_library()
+        store = LibrarySpecStore(os.path.join(self._dir, 'specs.db'))
+        assert_equals(len(store.get(self._libname)), 2)
+
+    def test_keywords_from_spec_file_are_not_stored(self):
+        kws = LibrarySpec('LibSpecLibrary').keywords
+        self._store.put('LibSpecLibrary', None, kws)
+        assert_none(self._store.get('LibSpecLibrary'))
+
+    def test_library_cache_uses_store(self):
+        self._write_library()
+        LibraryCache({}, self._store).get_library_keywords(self._libname)
+        assert_equals(len(self._store.get(self._libname)), 2)
+
+    def _store_library(self, args=None):
+        kws = LibrarySpec(self._libname, args).keywords
+        self._store.put(self._libname, args, kws)
+        return kws
+
+
+class TestPackageLibrarySpecStore(_SpecStoreTest):
+
+    def setUp(self):
+        _SpecStoreTest.setUp(self)
+        self._package = os.path.join(self._dir, self._libname)
+        os.mkdir(self._package)
+        self._write_module('__init__', 'from impl import *\n')
+        self._write_module('impl', KEYWORD_TEMPLATE % {'index': 1})
+
+    def tearDown(self):
+        sys.modules.pop(self._libname + '.impl', None)
+        _SpecStoreTest.tearDown(self)
+
+    def _write_module(self, name, content):
+        path = os.path.join(self._package, name + '.py')
+        with open(path, 'w') as module:
+            module.write(content)
+        os.utime(path, (time.time() + 10, time.time() + 10))
+
+    def _store_library(self):
+        kws = LibrarySpec(self._libname).keywords
+        self._store.put(self._libname, None, kws)
+        return kws
+
+    def test_store_is_invalidated_when_submodule_changes(self):
+        self._store_library()
+        assert_equals(len(self._store.get(self._libname)), 1)
+        self._write_module('impl', KEYWORD_TEMPLATE % {'index': 1} +
+                                   KEYWORD_TEMPLATE % {'index': 2})
+        assert_none(self._store.get(self._libname))
+
+    def test_store_is_invalidated_when_submodule_is_added(self):
+        self._store_library()
+        self._write_module('other', '')
+        assert_none(self._store.get(self._libname))
+
+    def test_compiling_package_does_not_invalidate_store(self):
+        self._store_library()
+        with open(os.path.join(self._package, 'impl.pyc'), 'w') as compiled:
+            compiled.write('compiled')
+        assert_equals(len(self._store.get(self._libname)), 1)
+
+
+class TestLibrarySpecStorePerformance(_SpecStoreTest):
+
+    def test_warm_open_is_faster_than_cold_open(self):
+        self._write_library(keyword_count=300, import_time=0.5)
+        cold = self._open_project()
+        warm = self._open_project()
+        assert_true(warm < cold / 2,
+                    'Warm open %.3fs was not faster than cold open %.3fs'
+                    % (warm, cold))
+
+    def _open_project(self):
+        sys.modules.pop(self._libname, None)
+        start_time = time.time()
+        kws = LibraryCache({}, self._store).get_library_keywords(self._libname)
+        assert_equals(len(kws), 300)
+        return time.time() - start_time
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -51,55 +51,38 @@ class TestSearchCriteria(unittest.TestCase):
     def test_defaults(self):
         criteria = _SearchCriteria()
         for kw in test_kws:
-            assert_true(criteria.matches(kw))
-
-    def test_pattern(self):
-        self._test_criteria(True, 'data', False, self.keyword)
-        self._test_criteria(False, 'no match', False, self.keyword)
-
-    def test_doc_search(self):
-        self._test_criteria(True, 'doc', True, self.keyword)
-        self._test_criteria(False, 'doc', False, self.keyword)
+            assert_true(criteria.matches_source_filter(kw))
 
     def test_exact_source_filter_matches(self):
-        self._test_criteria(True, '', True, self.keyword, 'source.txt')
-        self._test_criteria(True, 'data', True, self.keyword, 'source.txt')
-        self._test_criteria(False, 'no match', True, self.keyword, 'source.txt')
+        self._test_criteria(True, self.keyword, 'source.txt')
 
     def test_exact_source_filter_does_not_match(self):
-        self._test_criteria(False, 'doc', True, self.keyword,  'Some')
-        self._test_criteria(False, 'data', False, self.keyword, 'Some')
+        self._test_criteria(False, self.keyword, 'Some')
 
     def test_source_filter_all_keywords(self):
-        self._test_criteria(True, '', True, self.keyword, ALL_KEYWORDS)
-        self._test_criteria(True, '', True, self.library_keyword, ALL_KEYWORDS)
+        self._test_criteria(True, self.keyword, ALL_KEYWORDS)
+        self._test_criteria(True, self.library_keyword, ALL_KEYWORDS)
 
     def test_source_filter_resource_keywords(self):
-        self._test_criteria(True, '', True, self.keyword, ALL_USER_KEYWORDS)
-        self._test_criteria(False, '', True, self.library_keyword, ALL_USER_KEYWORDS)
+        self._test_criteria(True, self.keyword, ALL_USER_KEYWORDS)
+        self._test_criteria(False, self.library_keyword, ALL_USER_KEYWORDS)
 
     def test_source_filter_library_keywords(self):
-        self._test_criteria(True, '', True, self.library_keyword, ALL_LIBRARY_KEYWORDS)
-        self._test_criteria(False, '', True, self.keyword, ALL_LIBRARY_KEYWORDS)
+        self._test_criteria(True, self.library_keyword, ALL_LIBRARY_KEYWORDS)
+        self._test_criteria(False, self.keyword, ALL_LIBRARY_KEYWORDS)
 
-    def _test_criteria(self, expected, pattern, search_doc, keyword,
-                       source_filter=ALL_KEYWORDS):
-        criteria = _SearchCriteria(pattern, search_doc, source_filter)
-        assert_equals(criteria.matches(keyword), expected)
+    def _test_criteria(self, expected, keyword, source_filter):
+        criteria = _SearchCriteria('', True, source_filter)
+        assert_equals(criteria.matches_source_filter(keyword), expected)
 
 
 class TestKeyWordData(unittest.TestCase):
 
-    def test_sort_by_search(self):
+    def test_search_results_keep_their_order(self):
         order = _SortOrder()
         order.searched('Bar')
-        kw_data = _KeywordData(test_kws, order, search_criteria='Bar')
-        for index, name in enumerate(['Bar',
-                                      'BarBar',
-                                      'get bar',
-                                      'get bar2',
-                                      'Get File']):
-            assert_equals(kw_data[index].name, name)
+        kw_data = _KeywordData(test_kws, order)
+        assert_equals(kw_data, test_kws)
 
     def test_sort_by_name(self):
         order = _SortOrder()
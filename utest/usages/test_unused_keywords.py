@@ -0,0 +1,77 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+import datafilereader
+from robot.utils.asserts import assert_equals, assert_true
+from robotide.usages.commands import FindUnusedKeywords
+
+
+RESOURCE_KEYWORD = '''Keyword %(index)d
+    [Arguments]  ${arg}
+    Log  ${arg}
+'''
+
+
+class UnusedKeywordsTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.chief = datafilereader.construct_chief_controller(datafilereader.UNUSED_KEYWORDS_PATH)
+        cls.datafiles = [df for df in cls.chief.datafiles if df.data is not None]
+
+    def test_unused_keywords(self):
+        self._assert_unused(self.datafiles, ['A third unused keyword',
+                                             'Another keyword',
+                                             'Not used keyword'])
+
+    def test_only_keywords_of_given_datafiles_are_reported(self):
+        res1 = datafilereader.get_ctrl_by_name('Res1', self.chief.datafiles)
+        self._assert_unused([res1], ['Not used keyword'])
+
+    def test_progress_is_reported_per_datafile(self):
+        messages = []
+        list(self.chief.execute(FindUnusedKeywords(self.datafiles,
+                                                   progress=messages.append)))
+        assert_equals(len(messages), len(self.chief.datafiles))
+        assert_true(any(m.startswith('Resolving keywords in Res1') for m in messages))
+
+    def test_cancelled_search_finds_nothing(self):
+        command = FindUnusedKeywords(self.datafiles, cancelled=lambda: True)
+        assert_equals(list(self.chief.execute(command)), [])
+
+    def _assert_unused(self, datafiles, expected):
+        unused = self.chief.execute(FindUnusedKeywords(datafiles))
+        assert_equals(sorted(kw.name for kw in unused), expected)
+
+
+class UnusedKeywordsPerformanceTests(unittest.TestCase):
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        with open(os.path.join(self._dir, 'library.txt'), 'w') as resource:
+            resource.write('*** Keywords ***\n')
+            for index in range(3000):
+                resource.write(RESOURCE_KEYWORD % {'index': index})
+        with open(os.path.join(self._dir, 'suite.txt'), 'w') as suite:
+            suite.write('*** Settings ***\nResource  library.txt\n\n'
+                        '*** Test Cases ***\nTest\n')
+            for index in range(0, 3000, 2):
+                suite.write('    Keyword %d  argument\n' % index)
+        self.chief = datafilereader.construct_chief_controller(self._dir)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def test_finding_unused_keywords_of_large_resource_is_fast(self):
+        library = datafilereader.get_ctrl_by_name('Library', self.chief.datafiles)
+        start_time = time.time()
+        unused = list(self.chief.execute(FindUnusedKeywords([library])))
+        elapsed = time.time() - start_time
+        assert_equals(len(unused), 1500)
+        assert_true(elapsed < 2, 'Finding unused keywords took %.2fs' % elapsed)
+
+
+if __name__ == '__main__':
+    unittest.main()